@@ -0,0 +1,612 @@
+"""
+오프라인 종단 간 벤치마크 (Supabase / Gemini 없이)
+- 대상: hybrid_search_test_cases, hybrid_search_spec_docs, rerank_* 4가지,
+  save_test_case_to_supabase (신규 / 정확 중복), AI 페이지 3개 (recommend / risk / verify)
+- Supabase: benchmarks/fake_supabase.py (인메모리, 요청마다 --db-latency 지연)
+- Gemini: LLM_PROVIDER = "stub" 게이트웨이의 공급자를 지연 주입 스텁으로 교체
+  (제한기 / 브레이커 / 마이크로 배치 / 모델 라우팅은 앱 설정 그대로)
+- 합성 코퍼스: 테스트 케이스 1k ~ 200k행 (표 그룹 + 줄글), 기획 문서는 1/10
+  벤치마크 질문의 스텁 임베딩 주변에 관련 행을 뿌려서 임계값 완화 / 적응형 후보 수 / MMR이 실제처럼 동작
+- 측정: 시나리오 × 코퍼스 크기별 wall time (중앙값), 앱 CPU 시간, Supabase 요청 수, Gemini 호출 수 / 토큰,
+  최대 메모리 (tracemalloc, 별도 1회 실행) - CPU / 메모리는 대체 서버 내부 처리분 제외
+- 기준선: --save-baseline으로 저장 → --baseline으로 비교 (허용 범위를 넘으면 종료 코드 1)
+
+실행:
+    python benchmarks/bench_end_to_end.py --sizes 1000,10000 --repeat 3
+    python benchmarks/bench_end_to_end.py --save-baseline benchmarks/baseline_end_to_end.json
+    python benchmarks/bench_end_to_end.py --baseline benchmarks/baseline_end_to_end.json
+옵션: --scenarios search_test_cases,page_risk  --dim 128  --embed-latency 0.05  --generate-latency 0.3
+      --db-latency 0.02  --jitter 0.2  --set RERANK_METHOD='"hybrid"' (앱 secrets 덮어쓰기, TOML 값)
+
+streamlit / supabase 패키지가 필요 (앱과 같은 환경), 실행 중에는 임시 폴더를 작업 폴더로 사용
+(벤치마크용 .streamlit/secrets.toml, 저장 작업 SQLite 등은 실행 후 삭제)
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_gateway import StubProvider  # noqa: E402
+from resilience import set_deadline, clear_deadline  # noqa: E402
+from table_rows import TABLE_COLUMNS  # noqa: E402
+from timing import start_trace, clear_trace  # noqa: E402
+from fake_supabase import FakeSupabase  # noqa: E402
+
+
+# ========================================
+# 벤치마크 설정 (앱 secrets)
+# ========================================
+# 제한기는 통과만 (벤치마크 대상은 앱 코드 경로, 할당량 대기는 제외), 계측 로그 파일은 쓰지 않음
+BENCH_SECRETS = {
+    'SUPABASE_URL': "http://offline.invalid",
+    'SUPABASE_KEY': "offline",
+    'GOOGLE_API_KEY': "",
+    'LLM_PROVIDER': "stub",
+    'GEMINI_RPM': 1_000_000,
+    'GEMINI_TPM': 1_000_000_000,
+    'TIMING_LOG_PATH': "",
+    'EMBEDDING_QUEUE_POLL_SECONDS': 3600,
+}
+
+QUERIES = [
+    "쿠폰과 적립금을 동시에 사용할 수 있나요?",
+    "정기 발행 쿠폰이 매월 오전 7시에 발행되는지 확인",
+    "비밀번호 5회 오류 시 계정 잠금",
+    "예약 상품 결제 후 취소 시 환불 처리",
+]
+
+SCENARIOS = [
+    'search_test_cases',
+    'search_spec_docs',
+    'rerank_similarity',
+    'rerank_gemini',
+    'rerank_cosine',
+    'rerank_hybrid',
+    'save_table_group',
+    'save_duplicate',
+    'page_recommend',
+    'page_risk',
+    'page_verify',
+]
+
+# AI 페이지 흐름 (qtbot.py의 버튼 처리와 같은 검색 인자 / 프롬프트 필드 / 라우팅 작업)
+PAGES = {
+    'recommend': {
+        'task': 'generation',
+        'search': {'limit': 50, 'similarity_threshold': 0.3, 'fallback_thresholds': [0.2, 0.0]},
+        'spec_search': {},
+        'fields': ["id", "category", "name", "description", "data", "similarity"],
+        'row_fields': None,
+        'spec_chars': 500,
+    },
+    'risk': {
+        'task': 'risk',
+        'search': {'limit': 30, 'similarity_threshold': 0.3},
+        'spec_search': {'limit': 10},
+        'fields': ["id", "name", "description"],
+        'row_fields': ["depth1", "depth2", "step"],
+        'spec_chars': 300,
+    },
+    'verify': {
+        'task': 'verify',
+        'search': {},
+        'spec_search': {},
+        'fields': ["name", "description", "data"],
+        'row_fields': None,
+        'spec_chars': None,
+    },
+}
+
+
+# ========================================
+# 지연 주입 Gemini 스텁
+# ========================================
+class LatencyStub(StubProvider):
+    """
+    StubProvider 응답 + 호출 종류별 지연 (로그정규 지터)
+
+    embed_seconds / generate_seconds: 호출 1건 기본 지연
+    jitter: 로그정규 σ (0이면 고정 지연)
+    """
+
+    def __init__(self, embed_seconds=0.05, generate_seconds=0.3, jitter=0.0, seed=0):
+        super().__init__()
+        self.embed_seconds = embed_seconds
+        self.generate_seconds = generate_seconds
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _sleep(self, seconds: float, timeout: float):
+        if self.jitter:
+            with self._lock:
+                seconds *= self._rng.lognormvariate(0.0, self.jitter)
+        if seconds:
+            time.sleep(min(seconds, timeout))
+
+    def embed(self, texts: list, model: str, dim: int, task_type: str, timeout: float):
+        self._sleep(self.embed_seconds, timeout)
+        return super().embed(texts, model, dim, task_type, timeout)
+
+    def generate(self, prompt: str, model: str, config: dict, timeout: float):
+        self._sleep(self.generate_seconds, timeout)
+        return super().generate(prompt, model, config, timeout)
+
+
+# ========================================
+# 합성 코퍼스
+# ========================================
+CATEGORIES = ["쿠폰", "적립금", "주문", "결제", "배송", "회원", "로그인", "게시판", "예약", "디자인 모드", "상품", "장바구니"]
+DEPTH1 = ["주문서", "쿠폰 관리", "적립금 설정", "회원 가입", "로그인", "예약 관리", "상품 상세", "장바구니", "게시판", "배송 설정"]
+DEPTH2 = ["쿠폰 적용", "적립금 사용", "결제 수단 선택", "비밀번호 입력", "예약 취소", "옵션 선택", "수량 변경", "정기 발행", ""]
+PRE_CONDITIONS = ["로그인 상태", "관리자 계정", "쿠폰 1장 보유", "적립금 1,000원 보유", "예약 가능 상품 등록", ""]
+STEPS = [
+    "주문서에서 쿠폰 적용 후 적립금 입력",
+    "관리자 페이지에서 정기 발행 쿠폰 템플릿 생성",
+    "비밀번호를 5회 연속 잘못 입력",
+    "예약 상품 결제 후 마이페이지에서 예약 취소",
+    "장바구니에서 상품 수량을 0으로 변경",
+    "디자인 모드에서 상품 상세 위젯 추가",
+]
+EXPECTS = [
+    "쿠폰과 적립금이 합산 할인된다",
+    "매월 지정일 오전 7시에 자동 발행된다",
+    "계정이 잠기고 안내 메일이 발송된다",
+    "결제 금액이 전액 환불된다",
+    "상품이 장바구니에서 삭제된다",
+    "위젯이 상세 페이지에 노출된다",
+]
+SPEC_CONTENTS = [
+    ("쿠폰 정책. " + " ".join(STEPS[:2]) + " ") * 20,
+    ("회원 보안 정책. " + STEPS[2] + " " + EXPECTS[2] + " ") * 20,
+    ("예약 / 환불 정책. " + STEPS[3] + " " + EXPECTS[3] + " ") * 20,
+    ("디자인 모드 가이드. " + STEPS[5] + " " + EXPECTS[5] + " ") * 20,
+]
+
+QUERY_TOPIC_SHARE = 0.02      # 질문 1개와 관련된 행 비율
+BACKGROUND_TOPICS = 40
+
+
+def topic_vectors(rng, n: int, centroids: np.ndarray, topics: np.ndarray, strength: np.ndarray) -> np.ndarray:
+    """주제 중심과의 코사인 ≈ strength인 벡터 (중심 * s + 잡음 * √(1 - s²))"""
+    noise = rng.standard_normal((n, centroids.shape[1])).astype(np.float32)
+    noise /= np.linalg.norm(noise, axis=1, keepdims=True)
+    strength = strength.astype(np.float32)[:, None]
+    return strength * centroids[topics] + np.sqrt(1.0 - strength ** 2) * noise
+
+
+def make_centroids(rng, dim: int) -> np.ndarray:
+    """벤치마크 질문의 스텁 임베딩 + 배경 주제 (질문 임베딩과 같은 벡터여야 검색이 걸림)"""
+    stub = StubProvider()
+    query_vectors = np.array([stub._vector(query, dim) for query in QUERIES], dtype=np.float32)
+    background = rng.standard_normal((BACKGROUND_TOPICS, dim)).astype(np.float32)
+    background /= np.linalg.norm(background, axis=1, keepdims=True)
+    return np.vstack([query_vectors, background])
+
+
+def assign_topics(rng, n: int) -> np.ndarray:
+    shares = [QUERY_TOPIC_SHARE] * len(QUERIES)
+    rest = (1.0 - sum(shares)) / BACKGROUND_TOPICS
+    return rng.choice(len(QUERIES) + BACKGROUND_TOPICS, size=n, p=shares + [rest] * BACKGROUND_TOPICS)
+
+
+def build_test_cases(rng, n_rows: int, centroids: np.ndarray):
+    """표 그룹(1~12행, 70%) + 줄글 행 → (행 목록, 벡터)"""
+    rows, group_topics, group_strength = [], [], []
+    group_no = 0
+    while len(rows) < n_rows:
+        topic = assign_topics(rng, 1)[0]
+        base = float(rng.beta(2, 5))
+        category = CATEGORIES[rng.integers(len(CATEGORIES))]
+        size = int(rng.integers(1, 13)) if rng.random() < 0.7 else 1
+        size = min(size, n_rows - len(rows))
+        group_id = f"bench_group_{group_no}" if size > 1 else None
+        group_no += 1
+        for no in range(1, size + 1):
+            depth1, depth2 = DEPTH1[rng.integers(len(DEPTH1))], DEPTH2[rng.integers(len(DEPTH2))]
+            step, expect = STEPS[rng.integers(len(STEPS))], EXPECTS[rng.integers(len(EXPECTS))]
+            if group_id:
+                data = {
+                    'group_id': group_id, 'input_type': 'table_group', 'no': str(no), 'category': category,
+                    'depth1': depth1, 'depth2': depth2, 'depth3': '',
+                    'pre_condition': PRE_CONDITIONS[rng.integers(len(PRE_CONDITIONS))],
+                    'step': step, 'expect_result': expect,
+                }
+                name, description = f"{depth1} - {depth2}", step
+            else:
+                data = {'input_type': 'free_form', 'content': expect}
+                name, description = f"{depth1} {depth2} 확인", f"{step} → {expect}"
+            rows.append({
+                'category': category, 'name': name, 'link': '', 'description': description, 'data': data,
+                'content_hash': f"bench-{len(rows)}", 'embedding_stale': False,
+            })
+            group_topics.append(topic)
+            group_strength.append(min(0.95, max(0.0, base + float(rng.normal(0, 0.03)))))
+
+    vectors = topic_vectors(rng, len(rows), centroids, np.array(group_topics), np.array(group_strength))
+    return rows, vectors
+
+
+def build_spec_docs(rng, n_docs: int, centroids: np.ndarray):
+    rows = [
+        {
+            'title': f"{DEPTH1[i % len(DEPTH1)]} 기획서 v{i}",
+            'doc_type': "Notion",
+            'link': f"https://notion.invalid/spec-{i}",
+            'content': SPEC_CONTENTS[i % len(SPEC_CONTENTS)],
+            'content_hash': f"bench-spec-{i}",
+            'embedding_stale': False,
+        }
+        for i in range(n_docs)
+    ]
+    vectors = topic_vectors(rng, n_docs, centroids, assign_topics(rng, n_docs), rng.beta(2, 5, size=n_docs))
+    return rows, vectors
+
+
+def new_table_group(seed: int, n_rows=20) -> dict:
+    """저장 시나리오용 표 그룹 (seed마다 내용이 다름 → 중복 제거에 걸리지 않음)"""
+    return {
+        'input_type': 'table_group',
+        'group_id': f"bench_save_{seed}",
+        'category': "벤치마크",
+        'table_data': [
+            dict(zip(TABLE_COLUMNS, [
+                str(no), CATEGORIES[no % len(CATEGORIES)], DEPTH1[no % len(DEPTH1)],
+                f"{DEPTH2[no % len(DEPTH2)]} {seed}-{no}", '', PRE_CONDITIONS[no % len(PRE_CONDITIONS)],
+                f"{STEPS[no % len(STEPS)]} (케이스 {seed}-{no})", EXPECTS[no % len(EXPECTS)],
+            ]))
+            for no in range(1, n_rows + 1)
+        ],
+    }
+
+
+# ========================================
+# 앱 로드 (임시 작업 폴더 + 벤치마크 secrets)
+# ========================================
+class RawToml(str):
+    """--set 으로 받은 TOML 값 (그대로 기록)"""
+
+
+def toml_value(value) -> str:
+    if isinstance(value, RawToml):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def load_app(workdir: str, secrets: dict):
+    """
+    workdir/.streamlit/secrets.toml 작성 → 작업 폴더 이동 → supabase_helpers import
+
+    st.secrets는 작업 폴더의 .streamlit/secrets.toml을 읽으므로 import 전에 이동
+    """
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        for key, value in secrets.items():
+            f.write(f"{key} = {toml_value(value)}\n")
+    os.chdir(workdir)
+
+    import streamlit as st
+    from streamlit import logger as streamlit_logger
+
+    # bare 모드 경고(ScriptRunContext / 런타임 없음)가 UI 호출마다 출력되지 않게
+    # (첫 secrets 조회 때 설정 파일을 읽으며 로그 레벨이 다시 정해지므로 먼저 읽고 나서 설정)
+    st.secrets.get("LLM_PROVIDER")
+    streamlit_logger.set_log_level(logging.ERROR)
+    import supabase_helpers
+    return st, supabase_helpers
+
+
+# ========================================
+# 시나리오
+# ========================================
+def run_page(helpers, page: str, query: str):
+    """AI 페이지 1회: 검색 2개 → 프롬프트 → 생성 → JSON 파싱 (UI 표시 제외)"""
+    flow = PAGES[page]
+    set_deadline(180)
+    try:
+        if page != 'verify':
+            helpers.get_test_case_categories()   # 카테고리 선택 상자
+        relevant_cases = helpers.hybrid_search_test_cases(query_text=query, **flow['search'])
+        spec_docs = helpers.hybrid_search_spec_docs(query_text=query, **flow['spec_search'])
+
+        test_cases_str = json.dumps(
+            [helpers.case_for_prompt(tc, flow['fields'], row_fields=flow['row_fields']) for tc in relevant_cases],
+            ensure_ascii=False
+        )
+        spec_docs_str = "".join(
+            f"\n[{doc['title']}]\n{doc['content'][:flow['spec_chars']] if flow['spec_chars'] else doc['content']}\n"
+            for doc in spec_docs
+        )
+        prompt = f"[요청]\n{query}\n\n[학습 데이터]\n{test_cases_str}\n{spec_docs_str}\n응답 형식 (JSON)"
+
+        response_text = helpers.generate_text(prompt, task=flow['task'], hedge=True)
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        return json.loads(response_text.strip())
+    finally:
+        clear_deadline()
+
+
+def make_scenarios(helpers, fake: FakeSupabase):
+    """시나리오 이름 → fn(질문, 실행 번호)"""
+    final_count = helpers.FINAL_SEARCH_COUNT
+
+    # 재랭킹 시나리오 후보: 질문별 벡터 검색 결과 (측정 전에 1번 조회)
+    candidates = {}
+    for query in QUERIES:
+        embedding = helpers.generate_embedding(query)
+        candidates[query] = fake.rpc('match_test_cases_v21', {
+            'query_embedding': embedding,
+            'match_count': helpers.INITIAL_SEARCH_COUNT,
+            'similarity_threshold': 0.0,
+        }).execute().data
+
+    duplicate_group = new_table_group(-1)
+    helpers.save_test_case_to_supabase(duplicate_group)
+
+    return {
+        'search_test_cases': lambda q, i: helpers.hybrid_search_test_cases(
+            q, limit=50, similarity_threshold=0.3, fallback_thresholds=[0.2, 0.0]),
+        'search_spec_docs': lambda q, i: helpers.hybrid_search_spec_docs(q),
+        'rerank_similarity': lambda q, i: helpers.rerank_by_similarity(candidates[q], final_count),
+        'rerank_gemini': lambda q, i: helpers.rerank_with_gemini(q, candidates[q], final_count),
+        'rerank_cosine': lambda q, i: helpers.rerank_with_cosine(q, candidates[q], final_count),
+        'rerank_hybrid': lambda q, i: helpers.rerank_hybrid(q, candidates[q], final_count),
+        'save_table_group': lambda q, i: helpers.save_test_case_to_supabase(new_table_group(i)),
+        'save_duplicate': lambda q, i: helpers.save_test_case_to_supabase(duplicate_group),
+        'page_recommend': lambda q, i: run_page(helpers, 'recommend', q),
+        'page_risk': lambda q, i: run_page(helpers, 'risk', q),
+        'page_verify': lambda q, i: run_page(helpers, 'verify', q),
+    }
+
+
+# ========================================
+# 측정
+# ========================================
+def llm_totals(gateway) -> dict:
+    totals = {'embed': 0, 'generate': 0, 'tokens': 0}
+    for entry in gateway.stats():
+        totals[entry['kind']] += entry['calls']
+        totals['tokens'] += entry['input_tokens'] + entry['output_tokens']
+    return totals
+
+
+def db_totals(fake: FakeSupabase) -> dict:
+    stats = fake.stats()
+    return {
+        key: sum(entry[key] for entry in stats.values())
+        for key in ('calls', 'seconds', 'cpu_seconds')
+    }
+
+
+def measure(fn, query: str, run: int, fake: FakeSupabase, gateway, scenario: str) -> dict:
+    """1회 실행 → wall / 앱 CPU 시간 (대체 서버 처리 제외), Supabase / Gemini 호출 수, 단계별 시간"""
+    db_before, llm_before = db_totals(fake), llm_totals(gateway)
+    trace = start_trace(scenario)
+    cpu_started, started = time.process_time(), time.perf_counter()
+    try:
+        fn(query, run)
+    finally:
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        clear_trace()
+    db_after, llm_after = db_totals(fake), llm_totals(gateway)
+    return {
+        'wall_ms': wall * 1000,
+        'cpu_ms': (cpu - (db_after['cpu_seconds'] - db_before['cpu_seconds'])) * 1000,
+        'supabase_calls': db_after['calls'] - db_before['calls'],
+        'supabase_ms': (db_after['seconds'] - db_before['seconds']) * 1000,
+        'gemini_embed_calls': llm_after['embed'] - llm_before['embed'],
+        'gemini_generate_calls': llm_after['generate'] - llm_before['generate'],
+        'tokens': llm_after['tokens'] - llm_before['tokens'],
+        'stages': {entry['stage']: entry['total_ms'] for entry in trace.summary()},
+    }
+
+
+def run_scenario(fn, scenario: str, rows: int, repeat: int, fake, gateway, run_offset: int) -> dict:
+    runs = [
+        measure(fn, QUERIES[i % len(QUERIES)], run_offset + i, fake, gateway, scenario)
+        for i in range(repeat)
+    ]
+
+    # 최대 메모리: tracemalloc은 느려지므로 시간 측정과 분리해서 1회 (대체 서버 내부 임시 메모리 제외)
+    fake.client_peak = 0
+    tracemalloc.start()
+    try:
+        fn(QUERIES[0], run_offset + repeat)
+        peak_kb = max(fake.client_peak, tracemalloc.get_traced_memory()[1]) / 1024
+    finally:
+        tracemalloc.stop()
+
+    mean = lambda key: round(statistics.mean(run[key] for run in runs), 2)  # noqa: E731
+    stages = {}
+    for run in runs:
+        for stage_name, total_ms in run['stages'].items():
+            stages[stage_name] = stages.get(stage_name, 0.0) + total_ms / len(runs)
+    return {
+        'scenario': scenario,
+        'rows': rows,
+        'runs': repeat,
+        'wall_ms': round(statistics.median(run['wall_ms'] for run in runs), 1),
+        'wall_ms_max': round(max(run['wall_ms'] for run in runs), 1),
+        'cpu_ms': round(statistics.median(run['cpu_ms'] for run in runs), 1),
+        'supabase_calls': mean('supabase_calls'),
+        'supabase_ms': mean('supabase_ms'),
+        'gemini_calls': round(mean('gemini_embed_calls') + mean('gemini_generate_calls'), 2),
+        'gemini_embed_calls': mean('gemini_embed_calls'),
+        'gemini_generate_calls': mean('gemini_generate_calls'),
+        'tokens': mean('tokens'),
+        'peak_kb': round(peak_kb, 1),
+        'stages_ms': {name: round(ms, 1) for name, ms in stages.items()},
+    }
+
+
+# ========================================
+# 기준선 비교
+# ========================================
+# 지표 → 종류 (time / memory: --tolerance 비율, calls: --call-tolerance 비율 + 0.5 이상 증가)
+COMPARED_METRICS = {
+    'wall_ms': 'time',
+    'cpu_ms': 'time',
+    'peak_kb': 'memory',
+    'supabase_calls': 'calls',
+    'gemini_calls': 'calls',
+    'tokens': 'calls',
+}
+
+
+def compare_baseline(results: list, baseline: dict, tolerance: float, call_tolerance: float) -> list:
+    """기준선보다 나빠진 항목 ["시나리오@행 수 지표: 이전 → 이후 (+n%)", ...]"""
+    previous = {(row['scenario'], row['rows']): row for row in baseline.get('results', [])}
+    regressions = []
+    for row in results:
+        before = previous.get((row['scenario'], row['rows']))
+        if before is None:
+            continue
+        for metric, kind in COMPARED_METRICS.items():
+            old, new = before.get(metric), row.get(metric)
+            if old is None or new is None:
+                continue
+            allowed = old * (1 + (call_tolerance if kind == 'calls' else tolerance))
+            if kind == 'calls':
+                allowed = max(allowed, old + 0.5)
+            if new > allowed:
+                change = f"+{(new - old) / old:.0%}" if old else "신규"
+                regressions.append(f"{row['scenario']}@{row['rows']} {metric}: {old} → {new} ({change})")
+    return regressions
+
+
+# ========================================
+# 실행
+# ========================================
+def print_results(results: list):
+    print(f"\n{'시나리오':<20}{'행 수':>9}{'wall ms':>10}{'max ms':>9}{'앱 CPU':>9}"
+          f"{'DB 요청':>8}{'DB ms':>9}{'Gemini':>8}{'토큰':>9}{'최대 KB':>10}")
+    for row in results:
+        print(f"{row['scenario']:<20}{row['rows']:>9}{row['wall_ms']:>10.1f}{row['wall_ms_max']:>9.1f}"
+              f"{row['cpu_ms']:>9.1f}{row['supabase_calls']:>8.1f}{row['supabase_ms']:>9.1f}"
+              f"{row['gemini_calls']:>8.1f}{row['tokens']:>9.0f}{row['peak_kb']:>10.1f}")
+
+
+def parse_overrides(values: list) -> dict:
+    """--set KEY=VALUE (VALUE는 TOML 값: 숫자, true, "문자열", { ... })"""
+    import tomllib
+    overrides = {}
+    for item in values or []:
+        key, _, value = item.partition("=")
+        tomllib.loads(f"v = {value}")   # 형식 확인
+        overrides[key.strip()] = RawToml(value)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 종단 간 벤치마크")
+    parser.add_argument("--sizes", default="1000,10000,50000,200000", help="테스트 케이스 행 수 목록")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="시나리오별 측정 횟수 (질문을 돌아가며 사용)")
+    parser.add_argument("--dim", type=int, default=128, help="임베딩 차원 (200k × 768은 행렬만 600MB)")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Gemini 임베딩 호출 1건 지연 (초)")
+    parser.add_argument("--generate-latency", type=float, default=0.3, help="Gemini 생성 호출 1건 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연 로그정규 σ (0: 고정)")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="Supabase 요청 1건 지연 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", dest="overrides", action="append", help="앱 secrets 덮어쓰기 KEY=TOML값")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--save-baseline", help="결과를 기준선 파일로 저장")
+    parser.add_argument("--baseline", help="비교할 기준선 파일")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="시간 / 메모리 허용 증가 비율")
+    parser.add_argument("--call-tolerance", type=float, default=0.0, help="호출 수 / 토큰 허용 증가 비율")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    scenarios = args.scenarios.split(",")
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"알 수 없는 시나리오: {', '.join(unknown)} (가능: {', '.join(SCENARIOS)})")
+    output_paths = {
+        name: os.path.abspath(path) if path else None
+        for name, path in (('json', args.json_path), ('save', args.save_baseline), ('baseline', args.baseline))
+    }
+
+    secrets = {**BENCH_SECRETS, 'EMBEDDING_DIM': args.dim, **parse_overrides(args.overrides)}
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="qtbot-bench-") as workdir:
+        try:
+            st, helpers = load_app(workdir, secrets)
+            gateway = helpers.get_llm_gateway()
+            gateway.provider = LatencyStub(args.embed_latency, args.generate_latency, args.jitter, args.seed)
+
+            results = []
+            for size in sizes:
+                rng = np.random.default_rng(args.seed)
+                centroids = make_centroids(rng, args.dim)
+                fake = FakeSupabase(args.dim, latency_seconds=args.db_latency,
+                                    tables=(helpers.TABLE_NAME, helpers.SPEC_TABLE_NAME))
+                started = time.perf_counter()
+                fake.get_table(helpers.TABLE_NAME).load(*build_test_cases(rng, size, centroids))
+                fake.get_table(helpers.SPEC_TABLE_NAME).load(*build_spec_docs(rng, max(50, size // 10), centroids))
+                print(f"▶ {size}행 코퍼스 생성 {time.perf_counter() - started:.1f}초", flush=True)
+
+                helpers.get_supabase_client = lambda fake=fake: fake
+                st.cache_data.clear()
+                helpers.get_test_case_categories()
+                helpers.get_active_embedding_model()
+
+                functions = make_scenarios(helpers, fake)
+                for index, scenario in enumerate(scenarios):
+                    row = run_scenario(functions[scenario], scenario, size, args.repeat, fake, gateway,
+                                       run_offset=index * 1000)
+                    results.append(row)
+                    print(f"  {scenario:<20} {row['wall_ms']:>9.1f} ms", flush=True)
+        finally:
+            os.chdir(original_cwd)
+
+    print_results(results)
+    report = {
+        'meta': {
+            'created_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': sys.version.split()[0],
+            'settings': {k: v for k, v in vars(args).items() if k not in ('json_path', 'save_baseline', 'baseline')},
+        },
+        'results': results,
+    }
+    for path in (output_paths['json'], output_paths['save']):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if output_paths['baseline']:
+        with open(output_paths['baseline'], encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(results, baseline, args.tolerance, args.call_tolerance)
+        keys = {(row['scenario'], row['rows']) for row in baseline.get('results', [])}
+        compared = sum((row['scenario'], row['rows']) in keys for row in results)
+        print(f"\n기준선 비교: {compared}/{len(results)}개 항목 ({baseline.get('meta', {}).get('created_at', '?')} 기준선)")
+        if regressions:
+            print(f"❌ 기준선 대비 악화 {len(regressions)}건")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("✅ 기준선 대비 악화 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+모델 라우팅 벤치마크 (작업 × 등급별 지연 시간 / 비용 / 품질)
+- rerank: 라벨(0~10)이 있는 (질문, 후보) 묶음 → 질문별 스피어만 상관계수 평균, 점수 파싱 성공률
+- verify / risk / generation: 짧은 합성 프롬프트 → 필수 키가 있는 JSON 응답 비율
+- 비용: 게이트웨이 토큰 집계 × model_routing 가격표
+
+실행:
+    GOOGLE_API_KEY=... python benchmarks/bench_model_routes.py --provider gemini
+    python benchmarks/bench_model_routes.py --provider stub --stub-latency 0.2   # 네트워크 없이 경로만 확인
+옵션: --tiers lite,standard,pro  --tasks rerank,verify  --repeat 3  --json 결과.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_gateway import LLMGateway, GeminiProvider, StubProvider  # noqa: E402
+from model_routing import ModelRouter  # noqa: E402
+from rerank_prompts import build_relevance_prompt, parse_relevance_scores  # noqa: E402
+
+
+# ========================================
+# 평가 데이터
+# ========================================
+RERANK_CASES = [
+    {
+        'query': "쿠폰과 적립금을 동시에 사용할 수 있나요?",
+        'docs': [
+            ("쿠폰 적용 후 적립금 사용 - 주문서에서 쿠폰 적용 후 적립금 입력 시 합산 할인", 10),
+            ("적립금 단독 사용 - 주문서에서 보유 적립금 전액 사용", 6),
+            ("쿠폰 발급 - 관리자 페이지에서 정액 쿠폰 발급", 4),
+            ("회원 가입 - 이메일 인증 후 가입 완료", 0),
+            ("배송지 변경 - 주문 완료 후 배송지 수정", 1),
+        ],
+    },
+    {
+        'query': "정기 발행 쿠폰이 매월 오전 7시에 발행되는지 확인",
+        'docs': [
+            ("정기 발행 쿠폰 템플릿 - 매월 지정일 오전 7시 자동 발행", 10),
+            ("지정 발행 쿠폰 - 관리자가 특정 회원에게 수동 발행", 6),
+            ("쿠폰 만료 알림 - 만료 3일 전 알림 발송", 3),
+            ("상품 상세 - 이미지 확대 보기", 0),
+            ("정기 결제 - 매월 자동 결제 실패 시 재시도", 2),
+        ],
+    },
+    {
+        'query': "비밀번호 5회 오류 시 계정 잠금",
+        'docs': [
+            ("로그인 실패 횟수 제한 - 5회 연속 실패 시 계정 잠금 및 안내", 10),
+            ("비밀번호 재설정 - 이메일 링크로 재설정", 5),
+            ("로그인 - 아이디/비밀번호 정상 입력 시 로그인", 4),
+            ("장바구니 - 상품 수량 변경", 0),
+            ("관리자 계정 잠금 해제 - 관리자 페이지에서 잠금 해제", 7),
+        ],
+    },
+]
+
+GENERATION_CASES = {
+    'verify': {
+        'prompt': """
+[역할]
+너는 QA 전문가로, 학습 데이터만을 근거로 동작을 판단한다.
+
+[질문]
+쿠폰 사용 시 적립금도 함께 사용할 수 있나요?
+
+[학습 데이터]
+[{"name": "쿠폰 적용 후 적립금 사용", "description": "쿠폰 적용 후 적립금 입력 시 합산 할인된다"}]
+
+응답 형식 (JSON):
+```json
+{"found_in_data": true/false, "answer": "...", "evidence": "...", "confidence": "높음/중간/낮음"}
+```
+""",
+        'keys': ['found_in_data', 'answer', 'evidence', 'confidence'],
+    },
+    'risk': {
+        'prompt': """
+[역할]
+너는 IT SaaS 전문가로, 사전 리스크 검토를 담당한다.
+
+[요청]
+정기 발행 쿠폰 기능이 추가될 예정입니다. 매월 오전 7시에 지정 발행 쿠폰으로 발행됩니다.
+
+응답 형식 (JSON):
+```json
+{"direct_risks": [], "chain_risks": [], "side_effects": [], "test_recommendations": [], "overall_risk_level": "높음/중간/낮음"}
+```
+""",
+        'keys': ['direct_risks', 'chain_risks', 'side_effects', 'test_recommendations', 'overall_risk_level'],
+    },
+    'generation': {
+        'prompt': """
+사용자 요청: 비밀번호 5회 오류 시 계정 잠금 기능 테스트 케이스를 만들어줘.
+
+[테스트 케이스 표 양식]
+| NO | CATEGORY | DEPTH 1 | DEPTH 2 | DEPTH 3 | PRE-CONDITION | STEP | EXPECT RESULT |
+
+응답 형식:
+```json
+{"reasoning": "...", "existing_test_cases": [], "new_test_cases": [{"no": 1, "category": "", "depth1": "", "depth2": "", "depth3": "", "pre_condition": "", "step": "", "expect_result": ""}], "test_order": "...", "additional_suggestions": "..."}
+```
+""",
+        'keys': ['reasoning', 'new_test_cases'],
+    },
+}
+
+
+# ========================================
+# 품질 지표
+# ========================================
+def spearman(xs: list, ys: list) -> float:
+    """스피어만 순위 상관계수 (동점은 평균 순위)"""
+    def ranks(values):
+        order = sorted(range(len(values)), key=lambda i: values[i])
+        result = [0.0] * len(values)
+        i = 0
+        while i < len(order):
+            j = i
+            while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+                j += 1
+            for k in range(i, j + 1):
+                result[order[k]] = (i + j) / 2.0
+            i = j + 1
+        return result
+
+    rx, ry = ranks(xs), ranks(ys)
+    mx, my = statistics.mean(rx), statistics.mean(ry)
+    cov = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    var = (sum((a - mx) ** 2 for a in rx) * sum((b - my) ** 2 for b in ry)) ** 0.5
+    return cov / var if var else 0.0
+
+
+def json_has_keys(text: str, keys: list) -> bool:
+    """응답(```json 블록 포함 가능)이 필수 키를 모두 가진 JSON인지"""
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    try:
+        data = json.loads(text.strip())
+    except (json.JSONDecodeError, ValueError):
+        return False
+    return isinstance(data, dict) and all(key in data for key in keys)
+
+
+# ========================================
+# 실행
+# ========================================
+def run_rerank(gateway, router, model: str):
+    """질문 1개 = 배치 프롬프트 1개 → (지연 시간 목록, 품질, 파싱 성공률)"""
+    latencies, correlations, parsed = [], [], 0
+    for case in RERANK_CASES:
+        items = [(case['query'], doc) for doc, _ in case['docs']]
+        labels = [label for _, label in case['docs']]
+        started = time.perf_counter()
+        try:
+            text = gateway.generate(build_relevance_prompt(items), model, **router.config('rerank', items=len(items)))
+            scores = parse_relevance_scores(text, len(items))
+            parsed += 1
+            correlations.append(spearman(scores, labels))
+        except Exception:
+            correlations.append(0.0)
+        latencies.append(time.perf_counter() - started)
+    return latencies, statistics.mean(correlations), parsed / len(RERANK_CASES)
+
+
+def run_generation(gateway, router, task: str, model: str):
+    case = GENERATION_CASES[task]
+    started = time.perf_counter()
+    try:
+        ok = json_has_keys(gateway.generate(case['prompt'], model, **router.config(task)), case['keys'])
+    except Exception:
+        ok = False
+    return [time.perf_counter() - started], float(ok), float(ok)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="작업 × 모델 등급 벤치마크")
+    parser.add_argument("--provider", choices=["gemini", "stub"], default="stub")
+    parser.add_argument("--stub-latency", type=float, default=0.0)
+    parser.add_argument("--tiers", default="lite,standard,pro")
+    parser.add_argument("--tasks", default="rerank,verify,risk,generation")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    if args.provider == "gemini":
+        api_key = os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            sys.exit("GOOGLE_API_KEY 환경 변수가 필요합니다.")
+        provider = GeminiProvider(api_key)
+    else:
+        provider = StubProvider(latency_seconds=args.stub_latency)
+
+    router = ModelRouter()
+    results = []
+    for task in args.tasks.split(","):
+        for tier in args.tiers.split(","):
+            model = router.tiers[tier]
+            gateway = LLMGateway(provider, retries=1)
+            latencies, qualities, valid = [], [], []
+            for _ in range(args.repeat):
+                if task == "rerank":
+                    lat, quality, ok = run_rerank(gateway, router, model)
+                else:
+                    lat, quality, ok = run_generation(gateway, router, task, model)
+                latencies += lat
+                qualities.append(quality)
+                valid.append(ok)
+
+            usage = gateway.stats()
+            input_tokens = sum(entry['input_tokens'] for entry in usage)
+            output_tokens = sum(entry['output_tokens'] for entry in usage)
+            cost = router.estimate_cost(model, input_tokens, output_tokens)
+            results.append({
+                'task': task,
+                'tier': tier,
+                'model': model,
+                'routed': router.route(task)['tier'] == tier,
+                'calls': len(latencies),
+                'p50_seconds': round(percentile(latencies, 50), 3),
+                'p95_seconds': round(percentile(latencies, 95), 3),
+                'cost_per_call_usd': round(cost / len(latencies), 6) if cost is not None else None,
+                'quality': round(statistics.mean(qualities), 3),
+                'valid_rate': round(statistics.mean(valid), 3),
+            })
+
+    print(f"{'작업':<11}{'등급':<10}{'모델':<24}{'p50':>7}{'p95':>7}{'$/호출':>11}{'품질':>7}{'유효':>6}")
+    for row in results:
+        cost = f"{row['cost_per_call_usd']:.6f}" if row['cost_per_call_usd'] is not None else "-"
+        mark = " *" if row['routed'] else ""
+        print(f"{row['task']:<11}{row['tier']:<10}{row['model']:<24}{row['p50_seconds']:>7.2f}"
+              f"{row['p95_seconds']:>7.2f}{cost:>11}{row['quality']:>7.2f}{row['valid_rate']:>6.2f}{mark}")
+    print("* 현재 라우팅 (품질: rerank=스피어만 평균, 그 외=필수 키 JSON 비율)")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
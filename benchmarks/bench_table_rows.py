@@ -0,0 +1,102 @@
+"""
+표 정규화 마이크로벤치마크 (10k행)
+- 기존: iterrows + 셀마다 pd.isna/str + 행마다 레코드 dict 생성
+- 현재: table_rows (DataFrame 연산)
+
+실행: python benchmarks/bench_table_rows.py [행 수]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_rows import TABLE_COLUMNS, table_to_rows, table_to_records  # noqa: E402
+
+
+def make_frame(n_rows: int, seed=0) -> pd.DataFrame:
+    """편집기/업로드와 비슷한 표 (빈 셀, NaN, 'None', 숫자 NO 섞음)"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        col: [f"{col.lower()} 값 {i}" for i in range(n_rows)] for col in TABLE_COLUMNS
+    })
+    df['NO'] = np.arange(1, n_rows + 1, dtype=float)
+    for col in TABLE_COLUMNS[1:]:
+        mask = rng.random(n_rows) < 0.05
+        df.loc[mask, col] = rng.choice([np.nan, 'None', '', '  '], size=int(mask.sum()))
+    return df
+
+
+def legacy_rows(df: pd.DataFrame) -> list:
+    """기존 표 저장 경로 (qtbot의 iterrows 루프)"""
+    table_data = []
+    for _, row in df.iterrows():
+        if pd.isna(row['CATEGORY']) or row['CATEGORY'] == '' or pd.isna(row['DEPTH 1']) or row['DEPTH 1'] == '':
+            continue
+        table_data.append({
+            'NO': str(row['NO']) if row['NO'] and str(row['NO']).strip() else '',
+            'CATEGORY': str(row['CATEGORY']),
+            'DEPTH 1': str(row['DEPTH 1']),
+            'DEPTH 2': str(row.get('DEPTH 2', '')),
+            'DEPTH 3': str(row.get('DEPTH 3', '')),
+            'PRE-CONDITION': str(row.get('PRE-CONDITION', '')),
+            'STEP': str(row.get('STEP', '')),
+            'EXPECT RESULT': str(row.get('EXPECT RESULT', ''))
+        })
+    return table_data
+
+
+def legacy_records(table_data: list, group_id: str, category: str) -> list:
+    """기존 행 → 레코드 변환 (행마다 dict 생성)"""
+    records = []
+    for idx, row in enumerate(table_data, 1):
+        records.append({
+            "category": category,
+            "name": f"{row.get('DEPTH 1', '')} - {row.get('DEPTH 2', '')}",
+            "link": "",
+            "description": row.get('STEP', ''),
+            "data": {
+                "group_id": group_id,
+                "input_type": "table_group",
+                "no": row.get('NO', idx),
+                "category": row.get('CATEGORY', ''),
+                "depth1": row.get('DEPTH 1', ''),
+                "depth2": row.get('DEPTH 2', ''),
+                "depth3": row.get('DEPTH 3', ''),
+                "pre_condition": row.get('PRE-CONDITION', ''),
+                "step": row.get('STEP', ''),
+                "expect_result": row.get('EXPECT RESULT', '')
+            }
+        })
+    return records
+
+
+def timed(fn, repeat=3):
+    """repeat회 중 최소 시간 (초), 마지막 결과"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    df = make_frame(n_rows)
+
+    legacy_time, legacy = timed(lambda: legacy_records(legacy_rows(df), "bench", "벤치"))
+    current_time, current = timed(lambda: table_to_records(table_to_rows(df), "bench", "벤치"))
+
+    print(f"rows: {n_rows}")
+    print(f"legacy  (iterrows): {legacy_time * 1000:8.1f} ms  → {len(legacy)} records")
+    print(f"current (vectorized): {current_time * 1000:6.1f} ms  → {len(current)} records")
+    print(f"speedup: {legacy_time / current_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
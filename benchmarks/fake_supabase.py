@@ -0,0 +1,434 @@
+"""
+Supabase 인메모리 대체 (오프라인 벤치마크용)
+- supabase_helpers가 쓰는 호출만 지원
+    table(): select(count='exact') / insert / update / delete + eq / in_ / order / limit
+             컬럼은 'id', 'category' 같은 이름 또는 'data->>group_id' 경로
+    rpc():   match_test_cases_v21 (필터 / include_embedding), match_spec_docs_v21,
+             nearest_test_cases, merge_test_case_duplicates
+- 벡터는 정규화한 numpy 행렬로 보관 → 코사인 유사도 = 내적 (pgvector <=> 와 같은 순위)
+  embedding은 pgvector처럼 "[0.1,...]" 문자열로 반환
+- eq / in_ 조건은 컬럼별 해시 인덱스 사용 (실제 DB의 content_hash / group_id / category 인덱스 대응)
+- 요청마다 latency_seconds만큼 대기 (네트워크 왕복 흉내), 요청 이름별 호출 수 / 시간 / CPU 집계 (stats)
+- tracemalloc 추적 중이면 요청 처리 중 생긴 임시 메모리는 최대 메모리에서 빼고
+  (요청 전까지의 최대값은 client_peak에 보관) 앱 코드의 메모리만 남김
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+class Result:
+    """postgrest 응답과 같은 모양 (data, count)"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def column_value(row: dict, column: str):
+    """'data->>group_id' 같은 JSON 경로 → 텍스트 값 (PostgREST ->> 와 같이 문자열)"""
+    if "->>" not in column:
+        return row.get(column)
+    name, key = column.split("->>", 1)
+    value = (row.get(name) or {}).get(key)
+    return None if value is None else str(value)
+
+
+def vector_text(vector) -> str:
+    return json.dumps(np.round(vector.astype(float), 6).tolist())
+
+
+class FakeTable:
+    """
+    행 dict 목록 + 벡터 행렬 (같은 위치)
+
+    삭제된 행은 None으로 남겨 위치를 유지 → 벡터 행렬을 다시 만들지 않음
+    """
+
+    # 실제 테이블에 인덱스가 있는 컬럼 (적재 직후 생성 → 첫 요청에 인덱스 생성 시간이 섞이지 않음)
+    INDEXED_COLUMNS = ('id', 'category', 'content_hash', 'link', 'data->>group_id', 'data->>input_type')
+
+    def __init__(self, name: str, dim: int):
+        self.name = name
+        self.dim = dim
+        self.rows = []
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.has_vector = np.zeros(0, dtype=bool)
+        self._next_id = 1
+        self._indexes = {}
+
+    # ========================================
+    # 쓰기
+    # ========================================
+    def _grow(self, needed: int):
+        """행렬 용량을 두 배씩 늘림 (insert마다 전체 복사하지 않음)"""
+        if needed <= len(self.matrix):
+            return
+        capacity = max(needed, len(self.matrix) * 2, 1024)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:len(self.rows)] = self.matrix[:len(self.rows)]
+        has_vector = np.zeros(capacity, dtype=bool)
+        has_vector[:len(self.rows)] = self.has_vector[:len(self.rows)]
+        self.matrix, self.has_vector = matrix, has_vector
+
+    def _set_vector(self, position: int, vector):
+        if vector is None:
+            self.has_vector[position] = False
+            return
+        if isinstance(vector, str):
+            vector = json.loads(vector)
+        vec = np.asarray(vector, dtype=np.float32)
+        self.matrix[position] = vec / (np.linalg.norm(vec) + 1e-12)
+        self.has_vector[position] = True
+
+    def load(self, rows: list, vectors: np.ndarray):
+        """합성 데이터 일괄 적재 (vectors: 행 순서대로, 정규화 전 값도 가능)"""
+        start = len(self.rows)
+        self._grow(start + len(rows))
+        now = datetime.now(timezone.utc).isoformat()
+        for offset, row in enumerate(rows):
+            row.setdefault('id', self._next_id + offset)
+            row.setdefault('created_at', now)
+        self._next_id += len(rows)
+        self.rows.extend(rows)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        self.matrix[start:start + len(rows)] = vectors / norms
+        self.has_vector[start:start + len(rows)] = True
+        self._indexes = {}
+        for column in self.INDEXED_COLUMNS:
+            self.index(column)
+
+    def insert(self, records: list):
+        self._grow(len(self.rows) + len(records))
+        now = datetime.now(timezone.utc).isoformat()
+        for record in records:
+            row = {k: v for k, v in record.items() if k != 'embedding'}
+            row['id'] = self._next_id
+            row.setdefault('created_at', now)
+            self._next_id += 1
+            position = len(self.rows)
+            self.rows.append(row)
+            self._set_vector(position, record.get('embedding'))
+            for column, index in self._indexes.items():
+                index.setdefault(column_value(row, column), []).append(position)
+
+    def update(self, positions: list, values: dict):
+        for position in positions:
+            row = self.rows[position]
+            for key, value in values.items():
+                if key == 'embedding':
+                    self._set_vector(position, value)
+                else:
+                    row[key] = value
+        self._indexes = {}
+
+    def delete(self, positions: list):
+        for position in positions:
+            self.rows[position] = None
+            self.has_vector[position] = False
+        self._indexes = {}
+
+    # ========================================
+    # 읽기
+    # ========================================
+    def index(self, column: str) -> dict:
+        """컬럼 값 → 행 위치 목록 (처음 쓸 때 생성, update/delete 후 다시 생성)"""
+        if column not in self._indexes:
+            index = {}
+            for position, row in enumerate(self.rows):
+                if row is not None:
+                    index.setdefault(column_value(row, column), []).append(position)
+            self._indexes[column] = index
+        return self._indexes[column]
+
+    def positions(self, filters: list) -> list:
+        """[(op, column, value), ...] 조건을 모두 만족하는 행 위치"""
+        indexed = [f for f in filters if f[0] in ('eq', 'in')]
+        if indexed:
+            op, column, value = indexed[0]
+            index = self.index(column)
+            if op == 'eq':
+                candidates = list(index.get(value, []))
+            else:
+                candidates = sorted({p for v in value for p in index.get(v, [])})
+            rest = [f for f in filters if f is not indexed[0]]
+        else:
+            candidates = [p for p, row in enumerate(self.rows) if row is not None]
+            rest = filters
+
+        def matches(row):
+            for op, column, value in rest:
+                actual = column_value(row, column)
+                if op == 'eq' and actual != value:
+                    return False
+                if op == 'in' and actual not in value:
+                    return False
+            return True
+
+        return [p for p in candidates if self.rows[p] is not None and matches(self.rows[p])]
+
+    def similarities(self, query_embedding) -> np.ndarray:
+        """모든 위치의 코사인 유사도 (벡터 없는 행은 -inf)"""
+        n = len(self.rows)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+        sims = self.matrix[:n] @ query
+        sims[~self.has_vector[:n]] = -np.inf
+        return sims
+
+
+class QueryBuilder:
+    """supabase.table(name).select(...).eq(...).execute() 체인"""
+
+    def __init__(self, client, table: FakeTable):
+        self.client = client
+        self.table = table
+        self.action = 'select'
+        self.columns = None
+        self.values = None
+        self.count = None
+        self.filters = []
+        self.order_by = []
+        self.limit_count = None
+
+    def select(self, columns='*', count=None):
+        self.action, self.count = 'select', count
+        self.columns = None if columns.strip() == '*' else [c.strip() for c in columns.split(',')]
+        return self
+
+    def insert(self, records, returning='representation'):
+        self.action = 'insert'
+        self.values = records if isinstance(records, list) else [records]
+        return self
+
+    def update(self, values: dict, returning='representation'):
+        self.action, self.values = 'update', values
+        return self
+
+    def delete(self, count=None, returning='representation'):
+        self.action, self.count = 'delete', count
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(('eq', column, value))
+        return self
+
+    def in_(self, column: str, values):
+        self.filters.append(('in', column, set(values)))
+        return self
+
+    def order(self, column: str, desc=False):
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self.limit_count = count
+        return self
+
+    def _project(self, row: dict) -> dict:
+        if self.columns is None:
+            return {**row, 'data': dict(row['data'])} if isinstance(row.get('data'), dict) else dict(row)
+        return {
+            column: dict(row[column]) if isinstance(row.get(column), dict) else row.get(column)
+            for column in self.columns
+        }
+
+    def _run(self):
+        table = self.table
+        if self.action == 'insert':
+            table.insert(self.values)
+            return Result([])
+
+        positions = table.positions(self.filters)
+        if self.action == 'update':
+            table.update(positions, self.values)
+            return Result([])
+        if self.action == 'delete':
+            table.delete(positions)
+            return Result([], count=len(positions) if self.count else None)
+
+        rows = [table.rows[p] for p in positions]
+        for column, desc in reversed(self.order_by):
+            rows.sort(key=lambda r: (column_value(r, column) is None, column_value(r, column)), reverse=desc)
+        total = len(rows)
+        if self.limit_count is not None:
+            rows = rows[:self.limit_count]
+        return Result([self._project(row) for row in rows], count=total if self.count else None)
+
+    def execute(self):
+        return self.client.timed(f"table.{self.table.name}.{self.action}", self._run)
+
+
+class RpcCall:
+    def __init__(self, client, name: str, params: dict):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        handler = getattr(self.client, f"_rpc_{self.name}", None)
+        if handler is None:
+            raise ValueError(f"지원하지 않는 RPC: {self.name}")
+        return self.client.timed(f"rpc.{self.name}", lambda: handler(self.params))
+
+
+class FakeSupabase:
+    """
+    Args:
+        dim: 임베딩 차원
+        latency_seconds: 요청 1건마다 더할 지연 (네트워크 왕복)
+        tables: 테스트 케이스 / 기획 문서 테이블 이름 (supabase_helpers의 TABLE_NAME / SPEC_TABLE_NAME)
+    """
+
+    def __init__(self, dim: int, latency_seconds=0.0, tables=("test_cases_v21", "spec_docs_v21")):
+        self.dim = dim
+        self.latency_seconds = latency_seconds
+        self.test_cases_table, self.spec_docs_table = tables
+        self.tables = {}
+        self.client_peak = 0
+        self._stats = {}
+        self._lock = threading.RLock()
+
+    def get_table(self, name: str) -> FakeTable:
+        if name not in self.tables:
+            self.tables[name] = FakeTable(name, self.dim)
+        return self.tables[name]
+
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self, self.get_table(name))
+
+    def rpc(self, name: str, params: dict) -> RpcCall:
+        return RpcCall(self, name, params)
+
+    # ========================================
+    # 집계
+    # ========================================
+    def timed(self, name: str, fn):
+        """요청 1건 처리 (지연 + 집계, 쓰기와 읽기를 직렬화)"""
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        with self._lock:
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                self.client_peak = max(self.client_peak, tracemalloc.get_traced_memory()[1])
+            result = fn()
+            if tracing:
+                tracemalloc.reset_peak()
+        seconds, cpu_seconds = time.perf_counter() - started, time.thread_time() - cpu_started
+        with self._lock:
+            entry = self._stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['cpu_seconds'] += cpu_seconds
+        return result
+
+    def stats(self) -> dict:
+        """요청 이름 → {calls, seconds, cpu_seconds}"""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
+
+    # ========================================
+    # RPC
+    # ========================================
+    @staticmethod
+    def _top(sims: np.ndarray, mask: np.ndarray, threshold: float, count: int) -> np.ndarray:
+        """mask 안에서 유사도 threshold 이상 상위 count개 위치 (유사도 내림차순)"""
+        candidates = np.flatnonzero(mask & (sims >= threshold))
+        if len(candidates) > count:
+            candidates = candidates[np.argpartition(-sims[candidates], count - 1)[:count]]
+        return candidates[np.argsort(-sims[candidates], kind='stable')]
+
+    def _rpc_match_test_cases_v21(self, params: dict):
+        table = self.get_table(self.test_cases_table)
+        sims = table.similarities(params['query_embedding'])
+        mask = np.isfinite(sims)
+
+        filters = [
+            ('eq', column, params[name])
+            for name, column in (
+                ('filter_category', 'category'),
+                ('filter_input_type', 'data->>input_type'),
+                ('filter_group_id', 'data->>group_id'),
+            )
+            if params.get(name) is not None
+        ]
+        if filters:
+            allowed = np.zeros(len(mask), dtype=bool)
+            allowed[table.positions(filters)] = True
+            mask &= allowed
+        created_from, created_to = params.get('filter_created_from'), params.get('filter_created_to')
+        if created_from or created_to:
+            for position in np.flatnonzero(mask):
+                created_at = table.rows[position]['created_at']
+                if (created_from and created_at < created_from) or (created_to and created_at >= created_to):
+                    mask[position] = False
+
+        include_embedding = params.get('include_embedding', False)
+        data = []
+        for position in self._top(sims, mask, params.get('similarity_threshold', 0.3), params.get('match_count', 30)):
+            row = table.rows[position]
+            data.append({
+                'id': row['id'],
+                'category': row.get('category'),
+                'name': row.get('name'),
+                'link': row.get('link'),
+                'description': row.get('description'),
+                'data': dict(row.get('data') or {}),
+                'created_at': row.get('created_at'),
+                'similarity': float(sims[position]),
+                'embedding': vector_text(table.matrix[position]) if include_embedding else None,
+            })
+        return Result(data)
+
+    def _rpc_match_spec_docs_v21(self, params: dict):
+        table = self.get_table(self.spec_docs_table)
+        sims = table.similarities(params['query_embedding'])
+        data = []
+        for position in self._top(sims, np.isfinite(sims), params.get('similarity_threshold', 0.3),
+                                  params.get('match_count', 20)):
+            row = table.rows[position]
+            data.append({
+                'id': row['id'],
+                'title': row.get('title'),
+                'doc_type': row.get('doc_type'),
+                'link': row.get('link'),
+                'content': row.get('content'),
+                'similarity': float(sims[position]),
+            })
+        return Result(data)
+
+    def _rpc_nearest_test_cases(self, params: dict):
+        table = self.get_table(self.test_cases_table)
+        n = len(table.rows)
+        embeddings = np.asarray(params['p_embeddings'], dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        sims = table.matrix[:n] @ embeddings.T
+        sims[~table.has_vector[:n]] = -np.inf
+        data = []
+        if n:
+            best = np.argmax(sims, axis=0)
+            for idx, position in enumerate(best):
+                similarity = float(sims[position, idx])
+                if similarity >= params.get('p_threshold', 0.9):
+                    data.append({'idx': idx, 'id': table.rows[position]['id'], 'similarity': similarity})
+        return Result(data)
+
+    def _rpc_merge_test_case_duplicates(self, params: dict):
+        table = self.get_table(self.test_cases_table)
+        sources_by_id = {}
+        for merge in params['p_merges']:
+            sources_by_id.setdefault(merge['id'], []).append(merge['source'])
+        merged = 0
+        for row_id, sources in sources_by_id.items():
+            for position in table.positions([('eq', 'id', row_id)]):
+                data = table.rows[position]['data']
+                data['merged_from'] = list(data.get('merged_from') or []) + sources
+                data['merged_count'] = int(data.get('merged_count') or 0) + len(sources)
+                merged += 1
+        return Result(merged)
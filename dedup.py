@@ -0,0 +1,153 @@
+"""
+저장 시 중복 / 유사 중복 판정
+- 행 해시(row_hash): 행의 모든 컬럼(category, name, link, description, data의 표 컬럼 전체)을 정규화한 해시
+  (임베딩 텍스트 해시인 content_hash와 달리 DEPTH 3, PRE-CONDITION, EXPECT RESULT 차이도 구분)
+- 표 그룹(table_group, ai_generated_group): 행 단위로는 절대 빼거나 합치지 않음
+  - 그룹 단위 정확 중복: 저장하려는 그룹의 행 해시 묶음이 기존 그룹 하나와 완전히 같으면 그룹 전체 skip
+- 단건(줄글, 파일 업로드 행):
+  - 정확 중복: 행 해시가 기존 행 또는 같은 배치의 앞선 행과 일치 → skip
+    (임베딩 호출 전에 걸러서 API 호출도 줄임)
+  - 유사 중복: 임베딩 코사인 유사도
+    - 같은 배치 안: 행렬 곱 한 번으로 전체 유사도 계산 → skip_threshold 이상이면 skip
+    - 기존 행: DB 최근접 1개 유사도
+        skip_threshold 이상 → skip
+        merge_threshold 이상 → merge (새 행은 넣지 않고 기존 행에 출처만 기록)
+  - 나머지 → keep
+"""
+
+import hashlib
+import json
+
+import numpy as np
+
+KEEP = 'keep'
+SKIP = 'skip'
+MERGE = 'merge'
+
+# 행 해시에서 빼는 data 키 (저장 위치 / 출처 정보, 내용 아님)
+PROVENANCE_KEYS = ('group_id', 'input_type', 'merged_from', 'merged_count', 'ingest_key')
+
+
+def decision(action=KEEP, reason=None, target_id=None, similarity=None):
+    """행 1개의 판정 결과"""
+    return {'action': action, 'reason': reason, 'target_id': target_id, 'similarity': similarity}
+
+
+def _normalize(value) -> str:
+    """문자열로 바꾸고 공백 정리 (None은 빈 문자열, 숫자로 저장된 NO 1 == "1")"""
+    if value is None:
+        return ""
+    return " ".join(str(value).split())
+
+
+def row_hash(row: dict) -> str:
+    """테스트 케이스 행 전체(출처 정보 제외)의 해시 → 정확 중복 판정용"""
+    data = row.get('data') or {}
+    normalized = {
+        'category': _normalize(row.get('category')),
+        'name': _normalize(row.get('name')),
+        'link': _normalize(row.get('link')),
+        'description': _normalize(row.get('description')),
+        'data': {
+            key: _normalize(value) for key, value in data.items()
+            if key not in PROVENANCE_KEYS and _normalize(value)
+        },
+    }
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def duplicate_group(new_hashes: list, existing_groups: dict):
+    """
+    그룹 단위 정확 중복 판정
+
+    Args:
+        new_hashes: 저장하려는 그룹의 행 해시 리스트
+        existing_groups: {기존 group_id: 행 해시 리스트}
+
+    Returns:
+        행 구성이 완전히 같은(순서 무관, 개수 포함) 기존 group_id (없으면 None)
+    """
+    target = sorted(new_hashes)
+    if not target:
+        return None
+    for group_id, hashes in existing_groups.items():
+        if sorted(hashes) == target:
+            return group_id
+    return None
+
+
+def exact_duplicates(hashes: list, existing: dict):
+    """
+    행 해시 기준 정확 중복 판정 (단건 저장용)
+
+    Args:
+        hashes: 들어온 행의 row_hash 리스트
+        existing: {row_hash: 기존 행 id} (DB에 이미 있는 해시)
+
+    Returns:
+        행별 판정 리스트
+    """
+    seen = set()
+    decisions = []
+    for h in hashes:
+        if h in existing:
+            decisions.append(decision(SKIP, 'hash', target_id=existing[h], similarity=1.0))
+        elif h in seen:
+            decisions.append(decision(SKIP, 'batch_hash', similarity=1.0))
+        else:
+            seen.add(h)
+            decisions.append(decision())
+    return decisions
+
+
+def batch_near_duplicates(vectors: list, threshold: float):
+    """
+    같은 배치 안의 유사 중복 판정 (앞선 keep 행과 threshold 이상이면 skip)
+
+    Args:
+        vectors: 행별 임베딩 (임베딩 실패 행은 None → 항상 keep)
+        threshold: skip 기준 코사인 유사도
+
+    Returns:
+        행별 판정 리스트
+    """
+    decisions = [decision() for _ in vectors]
+    idx = [i for i, v in enumerate(vectors) if v is not None]
+    if len(idx) < 2:
+        return decisions
+
+    matrix = np.asarray([vectors[i] for i in idx], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1.0, norms)
+    sims = matrix @ matrix.T
+
+    kept = np.zeros(len(idx), dtype=bool)
+    for pos in range(len(idx)):
+        if pos and kept[:pos].any():
+            row = np.where(kept[:pos], sims[pos, :pos], -1.0)
+            best = int(row.argmax())
+            if row[best] >= threshold:
+                decisions[idx[pos]] = decision(SKIP, 'batch_similar', similarity=float(row[best]))
+                continue
+        kept[pos] = True
+    return decisions
+
+
+def existing_near_duplicate(similarity: float, target_id, skip_threshold: float, merge_threshold: float):
+    """기존 최근접 행과의 유사도 → 판정"""
+    if similarity is None:
+        return decision()
+    if similarity >= skip_threshold:
+        return decision(SKIP, 'similar', target_id=target_id, similarity=similarity)
+    if similarity >= merge_threshold:
+        return decision(MERGE, 'similar', target_id=target_id, similarity=similarity)
+    return decision()
+
+
+def summarize(decisions: list):
+    """판정 리스트 → {'keep': n, 'skip': n, 'merge': n}"""
+    report = {KEEP: 0, SKIP: 0, MERGE: 0}
+    for d in decisions:
+        report[d['action']] += 1
+    return report
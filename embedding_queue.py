@@ -0,0 +1,186 @@
+"""
+임베딩 재생성 큐 (content hash 기반)
+- 모든 저장/수정 경로는 임베딩 대상 텍스트의 content_hash를 기록
+- 해시가 바뀐 행은 embedding_stale = true 로 표시 (= 큐에 들어감)
+- 백그라운드 워커가 stale 행을 배치로 임베딩 → apply_embeddings RPC로 한 번에 갱신
+- 임베딩에 실패한 행은 시도 횟수 / 마지막 오류 / 다음 시도 시각을 기록하고 지수 백오프
+  (다음 시도 시각 순서로 가져옴 → 계속 실패하는 행이 뒤의 행을 막지 않음, sql/008_embedding_queue_retry.sql)
+"""
+
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# 표 형식 행으로 저장되는 input_type (행마다 depth/step 컬럼을 가짐)
+TABLE_INPUT_TYPES = ("table_group", "ai_generated_group")
+
+
+# ========================================
+# 임베딩 대상 텍스트 / 해시
+# ========================================
+def content_hash(text: str) -> str:
+    """임베딩 대상 텍스트의 해시 (공백 차이는 무시)"""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def test_case_embedding_text(row: dict) -> str:
+    """테스트 케이스 행 → 임베딩 대상 텍스트 (저장 시와 동일한 규칙)"""
+    data = row.get('data') or {}
+    if data.get('input_type') in TABLE_INPUT_TYPES:
+        return (
+            f"{data.get('category', '')} {data.get('depth1', '')} "
+            f"{data.get('depth2', '')} {data.get('step', '')}"
+        )
+    return f"{row.get('name', '')} {row.get('description', '')}"
+
+
+def spec_doc_embedding_text(row: dict) -> str:
+    """기획 문서 행 → 임베딩 대상 텍스트"""
+    return f"{row.get('title', '')} {row.get('content', '')}"
+
+
+# ========================================
+# 백그라운드 워커
+# ========================================
+class EmbeddingWorker:
+    """
+    stale 행을 주기적으로(또는 notify 시 즉시) 배치 임베딩하는 데몬 스레드
+
+    Args:
+        get_client: Supabase 클라이언트 반환 함수
+        embed_batch: 텍스트 리스트 → 벡터 리스트 (실패 시 예외)
+        tables: {테이블명: 임베딩 텍스트 함수}
+        batch_size: 한 번에 임베딩할 행 수
+        poll_interval: notify 없을 때 큐 확인 주기 (초)
+        max_attempts: 이 횟수만큼 실패한 행은 내용이 바뀔 때까지 건너뜀
+        retry_base_seconds / retry_max_seconds: 실패 행 재시도 간격 (지수 백오프, 상한)
+    """
+
+    def __init__(self, get_client, embed_batch, tables: dict, batch_size=50, poll_interval=60,
+                 max_attempts=8, retry_base_seconds=60, retry_max_seconds=6 * 3600):
+        self.get_client = get_client
+        self.embed_batch = embed_batch
+        self.tables = tables
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+
+        self.processed = 0
+        self.failed = 0
+        self.last_error = None
+
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="embedding-queue", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def notify(self):
+        """저장/수정 직후 호출 → 대기 없이 큐 처리"""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                while self.run_once():
+                    pass
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("embedding queue failed")
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def run_once(self) -> bool:
+        """테이블별로 시도할 때가 된 stale 행 1배치 처리. 처리(또는 실패 기록)한 행이 있으면 True"""
+        supabase = self.get_client()
+        if not supabase:
+            return False
+
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        did_work = False
+        for table_name, text_fn in self.tables.items():
+            result = supabase.table(table_name)\
+                .select('*')\
+                .eq('embedding_stale', True)\
+                .lt('embed_attempts', self.max_attempts)\
+                .or_(f'embed_next_attempt_at.is.null,embed_next_attempt_at.lte.{now}')\
+                .order('embed_next_attempt_at', nullsfirst=True)\
+                .order('id')\
+                .limit(self.batch_size)\
+                .execute()
+
+            rows = result.data or []
+            if not rows:
+                continue
+
+            texts = [text_fn(row) for row in rows]
+            vectors, errors = self.embed_rows(texts)
+
+            payload = [
+                {
+                    'id': row['id'],
+                    'content_hash': content_hash(text),
+                    'embedding': vector
+                }
+                for row, text, vector in zip(rows, texts, vectors) if vector is not None
+            ]
+            if payload:
+                # 임베딩 중에 다시 수정된 행(content_hash 불일치)은 RPC가 건너뜀 → 다음 배치에서 재처리
+                supabase.rpc('apply_embeddings', {
+                    'target_table': table_name,
+                    'payload': payload
+                }).execute()
+
+            # 실패 행은 오류별로 시도 횟수 증가 + 다음 시도 시각 연기
+            failed_ids = {}
+            for row, error in zip(rows, errors):
+                if error is not None:
+                    failed_ids.setdefault(error, []).append(row['id'])
+            for error, ids in failed_ids.items():
+                logger.warning("embedding failed (%s, %d rows): %s", table_name, len(ids), error)
+                supabase.rpc('record_embedding_failures', {
+                    'target_table': table_name,
+                    'p_ids': ids,
+                    'p_error': error,
+                    'p_base_seconds': self.retry_base_seconds,
+                    'p_max_seconds': self.retry_max_seconds
+                }).execute()
+
+            self.processed += len(payload)
+            self.failed += len(rows) - len(payload)
+            did_work = True
+
+        return did_work
+
+    def embed_rows(self, texts: list):
+        """
+        배치 임베딩, 실패하면 행 단위로 다시 시도해서 실패 행만 골라냄
+
+        Returns:
+            (행별 벡터 또는 None, 행별 오류 메시지 또는 None)
+        """
+        try:
+            return list(self.embed_batch(texts)), [None] * len(texts)
+        except Exception as e:
+            self.last_error = str(e)
+            if len(texts) == 1:
+                return [None], [str(e)]
+
+        vectors, errors = [], []
+        for text in texts:
+            try:
+                vectors.append(self.embed_batch([text])[0])
+                errors.append(None)
+            except Exception as e:
+                self.last_error = str(e)
+                vectors.append(None)
+                errors.append(str(e))
+        return vectors, errors
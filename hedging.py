@@ -0,0 +1,170 @@
+"""
+생성 요청 헤징 (꼬리 지연 줄이기)
+- 모델별 최근 지연 시간 분포를 기록 → 호출이 p{percentile} 시간 안에 끝나지 않으면 같은 요청을 1번 더 보냄
+- 먼저 도착한 유효한 응답을 사용, 나머지는 취소
+  (아직 제한기 대기 중이면 호출하지 않음, 이미 보낸 호출은 응답을 버림)
+- 추가 비용 상한: 일반 호출 1건마다 max_ratio만큼 크레딧 적립, 헤지 1건에 크레딧 1 소모
+"""
+
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from resilience import DeadlineExceeded
+
+
+class HedgeCancelled(DeadlineExceeded):
+    """다른 시도가 먼저 끝나서 취소된 호출 (브레이커/재시도에서 마감 초과와 같게 취급)"""
+
+
+def valid_text(text) -> bool:
+    """기본 유효성 검사: 비어 있지 않은 응답"""
+    return bool(text and str(text).strip())
+
+
+class LatencyWindow:
+    """최근 size건의 지연 시간 (초)"""
+
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class Hedger:
+    """
+    Args:
+        percentile: 이 백분위 지연 시간이 지나면 헤지 요청 전송
+        min_delay_seconds: 헤지까지 최소 대기 시간 (분포가 짧아도 너무 빨리 중복 호출하지 않음)
+        min_samples: 이만큼 기록이 쌓이기 전에는 헤지하지 않음
+        max_ratio: 헤지 요청 비율 상한 (0.1 → 일반 호출 10건당 최대 1건)
+        burst: 쌓아 둘 수 있는 최대 크레딧
+        workers: 시도를 실행할 스레드 수
+    """
+
+    def __init__(self, percentile=95, min_delay_seconds=1.0, min_samples=20, max_ratio=0.1,
+                 burst=3.0, window_size=200, workers=8):
+        self.percentile = percentile
+        self.min_delay_seconds = min_delay_seconds
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self.window_size = window_size
+
+        self.credits = burst
+        self.windows = {}
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge")
+
+    # ========================================
+    # 지연 시간 기록 / 헤지 시점
+    # ========================================
+    def observe(self, key, seconds: float):
+        """성공한 호출 1건의 지연 시간 기록 (헤지 여부와 무관하게 모든 호출)"""
+        with self._lock:
+            self.windows.setdefault(key, LatencyWindow(self.window_size)).add(seconds)
+
+    def hedge_delay(self, key):
+        """헤지까지 기다릴 시간 (기록이 부족하면 None → 헤지 안 함)"""
+        with self._lock:
+            window = self.windows.get(key)
+            if window is None or len(window.samples) < self.min_samples:
+                return None
+            return max(self.min_delay_seconds, window.percentile(self.percentile))
+
+    def _take_credit(self) -> bool:
+        with self._lock:
+            if self.credits >= 1.0:
+                self.credits -= 1.0
+                self.hedged += 1
+                return True
+            self.budget_denied += 1
+            return False
+
+    # ========================================
+    # 실행
+    # ========================================
+    def run(self, key, call, is_valid=valid_text):
+        """
+        call(cancelled) 실행, 느리면 헤지
+
+        Args:
+            key: 지연 시간 분포 구분 (모델 이름 등)
+            call: threading.Event를 받아서 호출 직전에 확인하는 함수
+            is_valid: 응답 유효성 검사 (무효 응답은 다른 시도를 기다림)
+
+        호출 측 contextvars(요청 마감 시간)는 각 시도 스레드로 복사됨
+        """
+        with self._lock:
+            self.calls += 1
+            self.credits = min(self.burst, self.credits + self.max_ratio)
+
+        delay = self.hedge_delay(key)
+        cancelled = threading.Event()
+
+        def submit():
+            context = contextvars.copy_context()
+            return self._executor.submit(context.run, call, cancelled)
+
+        if delay is None:
+            return call(cancelled)
+
+        primary = submit()
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_credit():
+            return primary.result()
+
+        hedge = submit()
+        pending = {primary, hedge}
+        last_error, invalid = None, []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if is_valid(result):
+                    cancelled.set()
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return result
+                invalid.append(result)
+
+        # 둘 다 무효/실패 → 무효 응답이라도 있으면 그대로 돌려줌 (호출 측 파싱 에러 처리에 맡김)
+        if invalid:
+            return invalid[0]
+        raise last_error
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'budget_denied': self.budget_denied,
+                'credits': round(self.credits, 2),
+                'delays': {
+                    key: round(window.percentile(self.percentile), 3)
+                    for key, window in self.windows.items() if window.samples
+                },
+            }
@@ -0,0 +1,335 @@
+"""
+저장 작업(ingestion job) 큐
+- 저장 버튼은 작업만 등록하고 바로 반환 → 워커 스레드가 배치로 임베딩 + insert
+- 작업/행 상태는 로컬 SQLite에 저장 → rerun, 탭 닫기, 프로세스 재시작 후에도 이어서 처리
+- 상태: draft(행 추가 중) → pending → running → done / failed(일부 행 실패)
+- 배치는 저장 후에 SQLite에 완료를 기록 → 그 사이 프로세스가 죽으면 재시작 후 같은 배치를 다시 처리
+  (process_batch가 (작업 ID, 행 번호) 키로 이미 저장된 행을 건너뜀)
+- 멱등성 키: 같은 저장 요청(더블 클릭, rerun)은 새 작업을 만들지 않고 이전 작업을 반환
+  - 키는 내용 + 저장 동작 범위(세션/폼 nonce)로 만들고 짧은 기간(idempotency_ttl)만 유효
+  - 완료된 작업이라도 저장 대상(그룹)이 지워졌으면 재사용하지 않음 → 삭제 후 다시 저장하면 새로 insert
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+SCHEMA = """
+create table if not exists jobs (
+    id text primary key,
+    kind text not null,
+    group_id text,
+    category text,
+    status text not null,
+    total_rows integer not null default 0,
+    rows_done integer not null default 0,
+    rows_failed integer not null default 0,
+    rows_skipped integer not null default 0,
+    idempotency_key text,
+    error text,
+    created_at text not null,
+    updated_at text not null
+);
+create table if not exists job_rows (
+    job_id text not null,
+    row_no integer not null,
+    payload text not null,
+    status text not null default 'pending',
+    error text,
+    primary key (job_id, row_no)
+);
+create index if not exists job_rows_pending_idx on job_rows (job_id, status, row_no);
+"""
+
+# 이전 버전 DB에 없을 수 있는 컬럼
+ADDED_COLUMNS = {
+    'rows_skipped': "integer not null default 0",
+    'idempotency_key': "text",
+}
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def make_idempotency_key(kind: str, *parts) -> str:
+    """
+    저장 요청 → 결정적 멱등성 키 (같은 parts면 같은 키)
+
+    parts: JSON 직렬화 가능한 값 또는 bytes (업로드 파일 원본 등)
+        저장 동작 범위(세션/폼 nonce)를 같이 넣어야 다른 세션이나 새 입력의 저장과 섞이지 않음
+    """
+    digest = hashlib.sha256(kind.encode("utf-8"))
+    for part in parts:
+        if isinstance(part, bytes):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class IngestJobQueue:
+    """
+    SQLite 기반 저장 작업 큐 + 워커 풀
+
+    Args:
+        db_path: SQLite 파일 경로
+        process_batch: (rows, job) → 저장된 행 수 (실패 시 예외, 저장되지 않은 나머지(빈 행)는 rows_skipped로 집계)
+            job에는 start_no와 행 번호 목록 row_nos가 들어옴
+            저장 후 완료 기록 전에 프로세스가 죽으면 같은 행이 다시 들어오므로
+            (작업 ID, 행 번호)로 이미 저장된 행을 건너뛰어야 함
+        workers: 워커 스레드 수
+        batch_size: 한 번에 처리할 행 수
+        poll_interval: 대기 작업 확인 주기 (초)
+        idempotency_ttl: 같은 키의 이전 작업을 재사용하는 기간 (초)
+        target_exists: 작업 dict → 저장 대상(그룹)이 아직 있는지 (없으면 완료된 작업도 재사용하지 않음)
+    """
+
+    def __init__(self, db_path: str, process_batch, workers=2, batch_size=50, poll_interval=5,
+                 idempotency_ttl=600, target_exists=None):
+        self.db_path = db_path
+        self.process_batch = process_batch
+        self.target_exists = target_exists
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.idempotency_ttl = idempotency_ttl
+
+        self._claim_lock = threading.Lock()
+        self._create_lock = threading.Lock()
+        self._wake = threading.Event()
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = [row['name'] for row in conn.execute("pragma table_info(jobs)")]
+            for name, definition in ADDED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"alter table jobs add column {name} {definition}")
+            conn.execute("create index if not exists jobs_idempotency_key_idx on jobs (idempotency_key)")
+            # 이전 프로세스에서 처리 중이던 작업은 다시 대기열로 (완료된 행은 유지)
+            conn.execute("update jobs set status = 'pending' where status = 'running'")
+
+    @contextmanager
+    def _connect(self):
+        """커밋 후 닫히는 연결 (스레드마다 새 연결 사용)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ========================================
+    # 작업 등록
+    # ========================================
+    def create_job(self, kind: str, group_id=None, category=None, idempotency_key=None) -> str:
+        """빈 작업 생성 (draft). add_rows → submit 순서로 사용"""
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "insert into jobs (id, kind, group_id, category, status, idempotency_key, created_at, updated_at) "
+                "values (?, ?, ?, ?, 'draft', ?, ?, ?)",
+                (job_id, kind, group_id, category, idempotency_key, _now(), _now())
+            )
+        return job_id
+
+    def find_job(self, idempotency_key: str):
+        """
+        같은 키로 최근(idempotency_ttl 이내) 등록된 작업 (없으면 None)
+
+        다시 저장할 수 있도록 재사용하지 않는 작업
+        - 실패한 작업, 등록이 끝나지 않은 draft 작업
+        - 완료됐지만 저장 대상(그룹)이 그 사이 삭제된 작업
+        """
+        if not idempotency_key:
+            return None
+        since = (datetime.now() - timedelta(seconds=self.idempotency_ttl)).strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as conn:
+            rows = conn.execute(
+                "select * from jobs where idempotency_key = ? and status not in ('draft', 'failed') "
+                "and created_at >= ? order by created_at desc, rowid desc",
+                (idempotency_key, since)
+            ).fetchall()
+        for row in rows:
+            job = dict(row)
+            if job['status'] == 'done' and self.target_exists is not None and not self.target_exists(job):
+                continue
+            return job
+        return None
+
+    def add_rows(self, job_id: str, rows: list):
+        """작업에 행 추가 (대용량 파일은 청크마다 호출)"""
+        if not rows:
+            return
+        with self._connect() as conn:
+            start = conn.execute(
+                "select total_rows from jobs where id = ?", (job_id,)
+            ).fetchone()['total_rows']
+            conn.executemany(
+                "insert into job_rows (job_id, row_no, payload) values (?, ?, ?)",
+                [(job_id, start + i, json.dumps(row, ensure_ascii=False)) for i, row in enumerate(rows, 1)]
+            )
+            conn.execute(
+                "update jobs set total_rows = total_rows + ?, updated_at = ? where id = ?",
+                (len(rows), _now(), job_id)
+            )
+
+    def submit(self, job_id: str, idempotency_key=None):
+        """
+        draft → pending (워커가 처리 시작)
+
+        idempotency_key: 행을 모두 추가한 뒤에야 키를 기록 (중간에 실패한 작업이 키를 차지하지 않음)
+            그 사이 같은 키의 작업이 먼저 등록됐으면 이 작업은 버리고 그 작업 ID를 반환
+
+        Returns:
+            제출된 작업 ID
+        """
+        with self._create_lock:
+            if idempotency_key:
+                existing = self.find_job(idempotency_key)
+                if existing and existing['id'] != job_id:
+                    self.discard(job_id, "같은 요청의 작업이 이미 등록됨")
+                    return existing['id']
+            with self._connect() as conn:
+                conn.execute(
+                    "update jobs set status = 'pending', idempotency_key = coalesce(?, idempotency_key), "
+                    "updated_at = ? where id = ? and status = 'draft'",
+                    (idempotency_key, _now(), job_id)
+                )
+        self._wake.set()
+        return job_id
+
+    def discard(self, job_id: str, error=None):
+        """등록 도중 실패한 draft 작업 정리: 추가된 행 삭제 + failed (재사용되지 않음)"""
+        with self._connect() as conn:
+            conn.execute("delete from job_rows where job_id = ?", (job_id,))
+            conn.execute(
+                "update jobs set status = 'failed', total_rows = 0, error = ?, idempotency_key = null, "
+                "updated_at = ? where id = ?",
+                (error, _now(), job_id)
+            )
+
+    def enqueue(self, kind: str, rows: list, group_id=None, category=None, idempotency_key=None):
+        """
+        행 목록으로 작업 생성 + 바로 제출
+
+        같은 idempotency_key의 작업이 이미 있으면 새로 만들지 않고 그 작업 ID를 반환
+
+        Returns:
+            (작업 ID, 새로 만든 작업이면 True / 이전 작업을 반환했으면 False)
+        """
+        with self._create_lock:
+            existing = self.find_job(idempotency_key)
+            if existing:
+                return existing['id'], False
+            job_id = self.create_job(kind, group_id=group_id, category=category)
+            self.add_rows(job_id, rows)
+            # 같은 잠금 안에서 제출 → 키 확인과 등록 사이에 다른 작업이 끼어들 수 없음
+            with self._connect() as conn:
+                conn.execute(
+                    "update jobs set status = 'pending', idempotency_key = ?, updated_at = ? where id = ?",
+                    (idempotency_key, _now(), job_id)
+                )
+        self._wake.set()
+        return job_id, True
+
+    # ========================================
+    # 조회
+    # ========================================
+    def get_job(self, job_id: str):
+        with self._connect() as conn:
+            row = conn.execute("select * from jobs where id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, limit=10):
+        """최근 작업 목록 (사이드바 진행률 표시용)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "select * from jobs where status != 'draft' order by created_at desc limit ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # ========================================
+    # 워커
+    # ========================================
+    def start(self):
+        for idx in range(self.workers):
+            threading.Thread(target=self._run, name=f"ingest-worker-{idx}", daemon=True).start()
+        return self
+
+    def _claim_job(self):
+        """대기 중인 작업 1개를 running으로 변경 후 반환"""
+        with self._claim_lock, self._connect() as conn:
+            row = conn.execute(
+                "select * from jobs where status = 'pending' order by created_at limit 1"
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "update jobs set status = 'running', updated_at = ? where id = ?", (_now(), row['id'])
+            )
+            return dict(row)
+
+    def _run(self):
+        while True:
+            job = self._claim_job()
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                self.run_job(job)
+            except Exception as e:
+                with self._connect() as conn:
+                    conn.execute(
+                        "update jobs set status = 'failed', error = ?, updated_at = ? where id = ?",
+                        (str(e), _now(), job['id'])
+                    )
+
+    def run_job(self, job: dict):
+        """남은 행을 batch_size씩 처리 (행 단위로 완료/실패 기록)"""
+        while True:
+            with self._connect() as conn:
+                batch = conn.execute(
+                    "select row_no, payload from job_rows where job_id = ? and status = 'pending' "
+                    "order by row_no limit ?",
+                    (job['id'], self.batch_size)
+                ).fetchall()
+            if not batch:
+                break
+
+            row_nos = [row['row_no'] for row in batch]
+            rows = [json.loads(row['payload']) for row in batch]
+
+            skipped = 0
+            try:
+                saved = self.process_batch(rows, {**job, 'start_no': row_nos[0], 'row_nos': row_nos})
+                skipped = len(rows) - saved if saved is not None else 0
+                status, error = 'done', None
+            except Exception as e:
+                status, error = 'failed', str(e)
+
+            with self._connect() as conn:
+                conn.executemany(
+                    "update job_rows set status = ?, error = ? where job_id = ? and row_no = ?",
+                    [(status, error, job['id'], row_no) for row_no in row_nos]
+                )
+                counter = 'rows_done' if status == 'done' else 'rows_failed'
+                conn.execute(
+                    f"update jobs set {counter} = {counter} + ?, rows_skipped = rows_skipped + ?, "
+                    "error = coalesce(?, error), updated_at = ? where id = ?",
+                    (len(row_nos), skipped, error, _now(), job['id'])
+                )
+
+        with self._connect() as conn:
+            conn.execute(
+                "update jobs set status = case when rows_failed > 0 then 'failed' else 'done' end, "
+                "updated_at = ? where id = ?",
+                (_now(), job['id'])
+            )
@@ -0,0 +1,262 @@
+"""
+LLM 게이트웨이 (모든 임베딩/생성 호출의 단일 진입점)
+- 공급자(provider) 교체 가능: gemini(기본), stub(네트워크 없이 결정적 응답 → 오프라인 부하 테스트)
+- 모델 핸들 캐시 (GenerativeModel을 매번 만들지 않음)
+- 공통 훅: 마감 시간 확인 → 서킷 브레이커 → 재시도(지터) → 제한기(RPM/TPM/동시 요청)
+- 선택적 헤징: 대화형 생성 호출이 최근 지연 p95를 넘기면 중복 요청 (hedging.Hedger)
+- 호출 수 / 에러 / 토큰 / 지연 시간 집계 (stats) + 호출마다 llm.embed / llm.generate 계측 이벤트
+"""
+
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+
+from rate_limit import estimate_tokens
+from hedging import HedgeCancelled
+from timing import record as record_timing
+from resilience import check_deadline, remaining_time, retry_call, is_transient_error
+
+# Gemini SDK 확인 (stub 공급자만 쓰면 없어도 됨)
+try:
+    import google.generativeai as genai
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+
+# ========================================
+# 공급자
+# ========================================
+class GeminiProvider:
+    """Google Gemini (google.generativeai)"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        if not GENAI_AVAILABLE:
+            raise RuntimeError("google-generativeai가 설치되어 있지 않습니다.")
+        self.api_key = api_key
+        genai.configure(api_key=api_key)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def ready(self) -> bool:
+        return bool(self.api_key)
+
+    def model(self, name: str):
+        """모델 이름별 GenerativeModel 캐시"""
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = genai.GenerativeModel(name)
+            return self._models[name]
+
+    def embed(self, texts: list, model: str, dim: int, task_type: str, timeout: float):
+        result = genai.embed_content(
+            model=model,
+            content=texts,
+            task_type=task_type,
+            output_dimensionality=dim,
+            request_options={'timeout': timeout}
+        )
+        return result['embedding'], {'input_tokens': sum(estimate_tokens(t) for t in texts), 'output_tokens': 0}
+
+    def generate(self, prompt: str, model: str, config: dict, timeout: float):
+        response = self.model(model).generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(**config) if config else None,
+            request_options={'timeout': timeout}
+        )
+        usage = getattr(response, 'usage_metadata', None)
+        return response.text, {
+            'input_tokens': getattr(usage, 'prompt_token_count', 0) or estimate_tokens(prompt),
+            'output_tokens': getattr(usage, 'candidates_token_count', 0) or 0,
+        }
+
+
+class StubProvider:
+    """
+    네트워크 없이 결정적인 응답을 주는 공급자 (오프라인 부하 테스트 / 벤치마크용)
+
+    - 임베딩: 텍스트 해시로 만든 단위 벡터 (같은 텍스트 → 같은 벡터)
+    - 관련성 점수 프롬프트("0~10"): 해시 기반 0~10 숫자
+      (배치 프롬프트면 "[항목 n]" 개수만큼의 JSON 배열)
+    - 그 외 생성: responder(prompt)가 있으면 그 결과, 없으면 빈 JSON
+    - latency_seconds: 호출마다 흉내 낼 지연 시간
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_seconds=0.0, responder=None):
+        self.latency_seconds = latency_seconds
+        self.responder = responder
+
+    def ready(self) -> bool:
+        return True
+
+    @staticmethod
+    def _seed(text: str) -> int:
+        return struct.unpack("<Q", hashlib.sha256((text or "").encode("utf-8")).digest()[:8])[0]
+
+    def _vector(self, text: str, dim: int):
+        rng = random.Random(self._seed(text))
+        values = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+        norm = sum(v * v for v in values) ** 0.5 or 1.0
+        return [v / norm for v in values]
+
+    def embed(self, texts: list, model: str, dim: int, task_type: str, timeout: float):
+        if self.latency_seconds:
+            time.sleep(min(self.latency_seconds, timeout))
+        return [self._vector(text, dim) for text in texts], \
+            {'input_tokens': sum(estimate_tokens(t) for t in texts), 'output_tokens': 0}
+
+    def generate(self, prompt: str, model: str, config: dict, timeout: float):
+        if self.latency_seconds:
+            time.sleep(min(self.latency_seconds, timeout))
+        if self.responder:
+            text = self.responder(prompt)
+        elif "0~10" in prompt:
+            blocks = prompt.split("[항목 ")[1:]
+            if blocks:
+                text = json.dumps([self._seed(block) % 11 for block in blocks])
+            else:
+                text = str(self._seed(prompt) % 11)
+        else:
+            text = "```json\n{}\n```"
+        return text, {'input_tokens': estimate_tokens(prompt), 'output_tokens': estimate_tokens(text)}
+
+
+# ========================================
+# 게이트웨이
+# ========================================
+class LLMGateway:
+    """
+    Args:
+        provider: GeminiProvider / StubProvider
+        limiter: rate_limit.GeminiLimiter (None이면 제한 없음)
+        breakers: {'embed': CircuitBreaker, 'generate': CircuitBreaker} (없으면 차단 없음)
+        retries: 429/5xx/타임아웃 재시도 횟수
+        timeout: 호출 1건 최대 시간 (요청 남은 시간이 더 짧으면 그 값)
+        hedger: hedging.Hedger (None이면 헤징 안 함)
+    """
+
+    def __init__(self, provider, limiter=None, breakers=None, retries=2, timeout=60, hedger=None):
+        self.provider = provider
+        self.limiter = limiter
+        self.breakers = breakers or {}
+        self.retries = retries
+        self.timeout = timeout
+        self.hedger = hedger
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    # ========================================
+    # 호출
+    # ========================================
+    def embed(self, texts: list, model: str, dim: int, task_type="retrieval_document"):
+        """텍스트 리스트 → 벡터 리스트 (한 번의 API 호출)"""
+        tokens = sum(estimate_tokens(text) for text in texts)
+        return self._call(
+            "embed", model, tokens,
+            lambda timeout: self.provider.embed(texts, model, dim, task_type, timeout)
+        )
+
+    def generate(self, prompt: str, model: str, hedge=False, **config):
+        """
+        프롬프트 → 응답 텍스트
+
+        hedge: True면 느린 호출에 중복 요청 (대화형 페이지용, hedger가 있을 때만)
+        config: temperature, max_output_tokens 등 GenerationConfig 값
+        """
+        tokens = estimate_tokens(prompt) + (config.get('max_output_tokens') or 0)
+
+        def call(cancelled=None):
+            return self._call(
+                "generate", model, tokens,
+                lambda timeout: self.provider.generate(prompt, model, config, timeout),
+                cancelled=cancelled
+            )
+
+        if hedge and self.hedger is not None:
+            return self.hedger.run(model, call)
+        return call()
+
+    def _call(self, kind: str, model: str, tokens: int, fn, cancelled=None):
+        """
+        마감 확인 → 브레이커 → 재시도 → 제한기 → 공급자 호출 (+ 집계)
+
+        cancelled: 헤지 시도의 취소 신호 (제한기 통과 후 호출 직전에 확인)
+        """
+        started = time.perf_counter()
+
+        def checked(timeout):
+            if cancelled is not None and cancelled.is_set():
+                raise HedgeCancelled(f"LLM {kind} 헤지 취소")
+            return fn(timeout)
+
+        def attempt():
+            check_deadline(f"(LLM {kind})")
+            timeout = min(remaining_time(self.timeout), self.timeout)
+            if self.limiter is None:
+                return checked(timeout)
+            with self.limiter.slot(tokens):
+                return checked(timeout)
+
+        def with_retry():
+            return retry_call(attempt, retries=self.retries, retry_on=is_transient_error)
+
+        breaker = self.breakers.get(kind)
+        try:
+            result, usage = breaker.call(with_retry) if breaker else with_retry()
+        except HedgeCancelled:
+            # 호출하지 않았으므로 집계 없음
+            raise
+        except Exception:
+            self._record(kind, model, time.perf_counter() - started, None)
+            raise
+        seconds = time.perf_counter() - started
+        self._record(kind, model, seconds, usage)
+        if self.hedger is not None and kind == "generate":
+            self.hedger.observe(model, seconds)
+        return result
+
+    # ========================================
+    # 집계
+    # ========================================
+    def _record(self, kind: str, model: str, seconds: float, usage):
+        record_timing(
+            f"llm.{kind}", seconds * 1000,
+            model=model,
+            ok=usage is not None,
+            **(usage or {})
+        )
+        with self._stats_lock:
+            entry = self._stats.setdefault((kind, model), {
+                'calls': 0, 'errors': 0, 'input_tokens': 0, 'output_tokens': 0,
+                'total_seconds': 0.0, 'max_seconds': 0.0,
+            })
+            entry['calls'] += 1
+            entry['total_seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            if usage is None:
+                entry['errors'] += 1
+            else:
+                entry['input_tokens'] += usage.get('input_tokens', 0)
+                entry['output_tokens'] += usage.get('output_tokens', 0)
+
+    def stats(self) -> list:
+        """[{kind, model, calls, errors, input_tokens, output_tokens, avg_seconds, max_seconds}, ...]"""
+        with self._stats_lock:
+            return [
+                {
+                    'kind': kind,
+                    'model': model,
+                    **{k: v for k, v in entry.items() if k != 'total_seconds'},
+                    'avg_seconds': round(entry['total_seconds'] / entry['calls'], 3) if entry['calls'] else 0.0,
+                    'max_seconds': round(entry['max_seconds'], 3),
+                }
+                for (kind, model), entry in sorted(self._stats.items())
+            ]
@@ -0,0 +1,124 @@
+"""
+계측 로그(JSONL) 집계 (지표 대시보드 ?page=metrics 용)
+- load_events: 최근 since_seconds 동안의 이벤트 (회전된 .1 파일 포함, 깨진 줄은 건너뜀)
+- latency_percentiles: 단계/페이지별 p50/p95/p99 + 에러율
+- fleet_summary: 요청당 Gemini 호출/토큰, Supabase 왕복 수
+  (마이크로 배치 호출은 특정 요청에 속하지 않으므로 전체 호출 수 ÷ 요청 수로 계산)
+- request_costs: 요청별 (해당 요청 스레드에서 일어난) 호출 / 토큰 / 왕복 수
+- cache_hit_ratios, timeseries: 캐시 적중률, 시간 구간별 추이
+"""
+
+import json
+import os
+import time
+
+import pandas as pd
+
+PERCENTILES = [0.5, 0.95, 0.99]
+
+
+def load_events(path: str, since_seconds=None) -> pd.DataFrame:
+    """JSONL → DataFrame (time 컬럼 추가, page 없음 → '(배치/백그라운드)')"""
+    cutoff = time.time() - since_seconds if since_seconds else None
+    rows = []
+    for file_path in (path + ".1", path):
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if cutoff is None or event.get('ts', 0) >= cutoff:
+                    rows.append(event)
+
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df['time'] = pd.to_datetime(df['ts'], unit='s')
+    df['page'] = df['page'].fillna('(배치/백그라운드)')
+    df['ok'] = df['ok'].fillna(True).astype(bool)
+    for col in ('input_tokens', 'output_tokens'):
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0) if col in df else 0
+    return df
+
+
+def latency_percentiles(df: pd.DataFrame, by=('stage',)) -> pd.DataFrame:
+    """by 그룹별 count, p50/p95/p99 (ms), error_rate"""
+    grouped = df.groupby(list(by))
+    result = grouped['duration_ms'].quantile(PERCENTILES).unstack()
+    result.columns = ['p50_ms', 'p95_ms', 'p99_ms']
+    result = result.round(1)
+    result.insert(0, 'count', grouped.size())
+    result['error_rate'] = (1 - grouped['ok'].mean()).round(3)
+    return result.reset_index().sort_values('p95_ms', ascending=False)
+
+
+def _flags(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(
+        is_llm=df['stage'].str.startswith('llm.'),
+        is_rpc=df['stage'].str.startswith('rpc.'),
+    )
+
+
+def fleet_summary(df: pd.DataFrame) -> dict:
+    """구간 전체 지표 (요청 = 'total' 이벤트)"""
+    df = _flags(df)
+    totals = df[df['stage'] == 'total']
+    requests = len(totals)
+    llm = df[df['is_llm']]
+    per_query = (lambda value: round(float(value) / requests, 2)) if requests else (lambda value: None)
+    return {
+        'requests': requests,
+        'p50_ms': round(float(totals['duration_ms'].quantile(0.5)), 1) if requests else None,
+        'p95_ms': round(float(totals['duration_ms'].quantile(0.95)), 1) if requests else None,
+        'gemini_calls_per_query': per_query(len(llm)),
+        'tokens_per_query': per_query(llm['input_tokens'].sum() + llm['output_tokens'].sum()),
+        'supabase_calls_per_query': per_query(df['is_rpc'].sum()),
+        'error_rate': round(float(1 - df['ok'].mean()), 3),
+    }
+
+
+def request_costs(df: pd.DataFrame) -> pd.DataFrame:
+    """요청별 page, total_ms, gemini_calls, tokens, supabase_calls (최근 요청 먼저)"""
+    df = _flags(df[df['request_id'].notna()])
+    if df.empty:
+        return pd.DataFrame()
+    df = df.assign(
+        llm_tokens=(df['input_tokens'] + df['output_tokens']).where(df['is_llm'], 0),
+        total_ms=df['duration_ms'].where(df['stage'] == 'total'),
+    )
+    result = df.groupby('request_id').agg(
+        time=('time', 'min'),
+        page=('page', 'first'),
+        total_ms=('total_ms', 'max'),
+        gemini_calls=('is_llm', 'sum'),
+        tokens=('llm_tokens', 'sum'),
+        supabase_calls=('is_rpc', 'sum'),
+        errors=('ok', lambda ok: int((~ok).sum())),
+    )
+    return result.reset_index().sort_values('time', ascending=False)
+
+
+def cache_hit_ratios(df: pd.DataFrame) -> pd.DataFrame:
+    """캐시별 조회 수 / 적중률"""
+    caches = df[df['stage'] == 'cache']
+    if caches.empty or 'cache' not in caches:
+        return pd.DataFrame()
+    grouped = caches.groupby('cache')['hit']
+    return pd.DataFrame({
+        'lookups': grouped.size(),
+        'hit_ratio': grouped.apply(lambda hits: hits.astype(bool).mean()).round(3),
+    }).reset_index()
+
+
+def timeseries(df: pd.DataFrame, freq='5min') -> pd.DataFrame:
+    """구간별 requests, p95_ms (요청 전체), error_rate (모든 이벤트)"""
+    totals = df[df['stage'] == 'total'].set_index('time')['duration_ms'].resample(freq)
+    events = df.set_index('time')['ok'].resample(freq)
+    return pd.DataFrame({
+        'requests': totals.count(),
+        'p95_ms': totals.quantile(0.95),
+        'error_rate': 1 - events.mean(),
+    }).fillna({'requests': 0})
@@ -0,0 +1,109 @@
+"""
+세션 간 마이크로 배치
+- 여러 세션/스레드의 단건 요청(임베딩 1개, 후보 1개 점수)을 짧은 시간(max_wait_ms) 동안 모아서
+  한 번의 배치 API 호출로 보내고, 결과를 요청별 Future로 돌려줌
+- 크기 상한(max_batch_size)에 닿으면 기다리지 않고 바로 전송
+- key가 다른 요청(예: 모델/차원이 다른 임베딩)은 같은 배치에 섞지 않음
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Args:
+        process_batch: (items, key) → items와 같은 길이의 결과 리스트
+            (항목별 실패는 결과 자리에 Exception 인스턴스)
+        max_batch_size: 배치 1개의 최대 요청 수
+        max_wait_ms: 첫 요청 후 추가 요청을 기다리는 최대 시간
+        workers: 동시에 보낼 수 있는 배치 수
+        name: 스레드 이름 접두사
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=20, workers=4, name="micro-batch"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.submitted = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+        self._queues = {}   # key → [(item, future, 등록 시각), ...]
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item, key=None) -> Future:
+        """요청 1건 등록 → 결과는 future.result()"""
+        future = Future()
+        with self._cond:
+            self._queues.setdefault(key, []).append((item, future, time.monotonic()))
+            self.submitted += 1
+            self._cond.notify()
+        return future
+
+    def _take_ready(self):
+        """보낼 배치 목록과 다음 확인까지 기다릴 시간 (잠금 안에서 호출)"""
+        now = time.monotonic()
+        ready = []
+        next_wait = None
+        for key in list(self._queues):
+            entries = self._queues[key]
+            age = now - entries[0][2]
+            if len(entries) >= self.max_batch_size or age >= self.max_wait:
+                ready.append((key, entries[:self.max_batch_size]))
+                rest = entries[self.max_batch_size:]
+                if rest:
+                    self._queues[key] = rest
+                else:
+                    del self._queues[key]
+            else:
+                wait = self.max_wait - age
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+        return ready, next_wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queues:
+                    self._cond.wait()
+                ready, next_wait = self._take_ready()
+                if not ready:
+                    self._cond.wait(next_wait)
+                    continue
+                self.batches += len(ready)
+                self.largest_batch = max(self.largest_batch, *(len(batch) for _, batch in ready))
+
+            for key, batch in ready:
+                self._executor.submit(self._dispatch, key, batch)
+
+    def _dispatch(self, key, batch):
+        items = [item for item, _, _ in batch]
+        try:
+            results = self.process_batch(items, key)
+            if len(results) != len(items):
+                raise ValueError(f"배치 결과 수 불일치 ({len(results)} != {len(items)})")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'submitted': self.submitted,
+                'batches': self.batches,
+                'avg_batch': round(self.submitted / self.batches, 2) if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'queued': sum(len(entries) for entries in self._queues.values()),
+            }
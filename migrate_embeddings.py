@@ -0,0 +1,232 @@
+"""
+임베딩 모델 교체 마이그레이션 (재시작 가능)
+
+사용법:
+    1) python migrate_embeddings.py prepare  --model models/gemini-embedding-001 --dim 768
+    2) python migrate_embeddings.py backfill --model models/gemini-embedding-001 --dim 768 --max-rpm 60
+       (중단되면 같은 명령으로 다시 실행 → 체크포인트부터 이어서 진행)
+    3) python migrate_embeddings.py status
+    4) python migrate_embeddings.py switch   --model models/gemini-embedding-001 --dim 768
+
+- 새 벡터는 그림자 컬럼(embedding_next)에만 기록 → 백필 중에도 검색은 기존 벡터 사용
+- switch는 테이블을 잠근 상태에서 백필 완료 확인 → 컬럼 교체 + embedding_config 갱신을 한 트랜잭션으로 실행
+  (앱은 embedding_config를 1분 캐시 → 전환 이후 벡터가 기록된 행(새로 저장 / 수정 후 재임베딩)은
+   캐시 만료 후 다시 큐에 넣어 새 모델로 재임베딩)
+- 필요한 SQL: sql/005_embedding_migration.sql, sql/010_embedding_switch_lock.sql
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import timedelta
+
+from supabase import create_client
+
+from embedding_queue import content_hash, test_case_embedding_text, spec_doc_embedding_text
+from llm_gateway import LLMGateway, GeminiProvider
+
+CHECKPOINT_PATH = "embedding_migration.checkpoint.json"
+MAX_FULL_PASSES = 3
+
+
+def get_config(key: str, default=None):
+    """환경 변수 → .streamlit/secrets.toml 순서로 설정 조회"""
+    if os.environ.get(key):
+        return os.environ[key]
+    try:
+        import streamlit as st
+        return st.secrets.get(key, default)
+    except Exception:
+        return default
+
+
+TABLE_NAME = get_config("TABLE_NAME", "test_cases_v21")
+SPEC_TABLE_NAME = get_config("SPEC_TABLE_NAME", "spec_docs_v21")
+
+# 테이블별 (조회 컬럼, 임베딩 텍스트 함수)
+TABLES = {
+    TABLE_NAME: ("id, name, description, data, content_hash", test_case_embedding_text),
+    SPEC_TABLE_NAME: ("id, title, content, content_hash", spec_doc_embedding_text),
+}
+
+
+# ========================================
+# 체크포인트
+# ========================================
+def load_checkpoint(model: str, dim: int):
+    """같은 모델/차원의 체크포인트만 이어서 사용"""
+    if os.path.exists(CHECKPOINT_PATH):
+        with open(CHECKPOINT_PATH, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("model") == model and checkpoint.get("dim") == dim:
+            return checkpoint
+    return {"model": model, "dim": dim, "tables": {}}
+
+
+def save_checkpoint(checkpoint: dict):
+    """임시 파일에 쓰고 교체 (쓰는 도중 죽어도 이전 체크포인트 유지)"""
+    tmp_path = CHECKPOINT_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+# ========================================
+# 명령
+# ========================================
+def count_pending(supabase, table: str) -> int:
+    """기존 벡터는 있는데 새 벡터가 없는 행 수"""
+    result = supabase.table(table)\
+        .select('id', count='exact')\
+        .is_('embedding_next', 'null')\
+        .not_.is_('embedding', 'null')\
+        .limit(1)\
+        .execute()
+    return result.count or 0
+
+
+def format_eta(seconds: float) -> str:
+    return str(timedelta(seconds=int(seconds)))
+
+
+def backfill_table(supabase, gateway, table: str, columns: str, text_fn, model: str, dim: int,
+                   batch_size: int, max_rpm: int, checkpoint: dict):
+    """
+    한 테이블 백필: id 순서로 batch_size씩 임베딩 → apply_shadow_embeddings
+
+    끝까지 간 뒤 처음부터 한 번 더 훑어서 백필 도중 수정된(embedding_next가 비워진) 행도 처리
+    """
+    state = checkpoint["tables"].setdefault(table, {"last_id": 0, "rows_done": 0, "passes": 0})
+    total_pending = count_pending(supabase, table)
+    print(f"[{table}] 남은 행 {total_pending}개 (체크포인트 id > {state['last_id']}, 누적 {state['rows_done']}개)")
+
+    min_interval = 60.0 / max_rpm if max_rpm else 0.0
+    started_at = time.time()
+    last_call_at = 0.0
+    done_this_run = 0
+
+    while True:
+        rows = supabase.table(table)\
+            .select(columns)\
+            .is_('embedding_next', 'null')\
+            .not_.is_('embedding', 'null')\
+            .gt('id', state["last_id"])\
+            .order('id')\
+            .limit(batch_size)\
+            .execute().data or []
+
+        if not rows:
+            state["passes"] += 1
+            if state["last_id"] == 0 or state["passes"] >= MAX_FULL_PASSES:
+                break
+            # 처음부터 다시 확인
+            state["last_id"] = 0
+            save_checkpoint(checkpoint)
+            continue
+
+        # 요청 수 제한 (분당 max_rpm 배치)
+        wait = min_interval - (time.time() - last_call_at)
+        if wait > 0:
+            time.sleep(wait)
+        last_call_at = time.time()
+
+        texts = [text_fn(row) for row in rows]
+        vectors = gateway.embed(texts, model, dim)
+
+        payload = [
+            {'id': row['id'], 'content_hash': content_hash(text), 'embedding': vector}
+            for row, text, vector in zip(rows, texts, vectors)
+        ]
+        supabase.rpc('apply_shadow_embeddings', {'target_table': table, 'payload': payload}).execute()
+
+        state["last_id"] = rows[-1]['id']
+        state["rows_done"] += len(rows)
+        done_this_run += len(rows)
+        save_checkpoint(checkpoint)
+
+        elapsed = time.time() - started_at
+        rate = done_this_run / elapsed if elapsed > 0 else 0.0
+        remaining = max(total_pending - done_this_run, 0)
+        eta = format_eta(remaining / rate) if rate > 0 else "-"
+        print(f"[{table}] {done_this_run}/{total_pending}개 ({rate:.1f} rows/s, ETA {eta})")
+
+    print(f"[{table}] 백필 완료: 이번 실행 {done_this_run}개")
+
+
+def cmd_prepare(supabase, args):
+    supabase.rpc('prepare_embedding_migration', {'new_dim': args.dim}).execute()
+    print(f"✅ 그림자 컬럼 준비 완료 (vector({args.dim}))")
+
+
+def cmd_backfill(supabase, args):
+    # 요청 간격은 --max-rpm으로 직접 조절 → 게이트웨이는 재시도/타임아웃만 사용
+    gateway = LLMGateway(GeminiProvider(get_config("GOOGLE_API_KEY")), retries=3)
+    checkpoint = load_checkpoint(args.model, args.dim)
+    for table, (columns, text_fn) in TABLES.items():
+        backfill_table(
+            supabase, gateway, table, columns, text_fn, args.model, args.dim,
+            args.batch_size, args.max_rpm, checkpoint
+        )
+    print("✅ 백필 완료. 'status'로 확인 후 'switch'를 실행하세요.")
+
+
+def cmd_status(supabase, args):
+    for table in TABLES:
+        total = supabase.table(table).select('id', count='exact').limit(1).execute().count or 0
+        pending = count_pending(supabase, table)
+        print(f"[{table}] 전체 {total}개 / 백필 남음 {pending}개")
+
+
+def cmd_switch(supabase, args):
+    # 전환 시각은 DB 기준 (트리거가 찍는 embedding_updated_at과 같은 시계)
+    switched_at = supabase.rpc(
+        'switch_embedding_model', {'new_model': args.model, 'new_dim': args.dim}
+    ).execute().data
+    print(f"✅ 전환 완료: {args.model} ({args.dim}차원)")
+
+    # 앱의 embedding_config 캐시(1분)가 끝날 때까지 기다린 뒤,
+    # 그 사이 예전 모델로 벡터가 기록됐을 수 있는 행(새로 저장 + 수정 후 재임베딩)을 재임베딩 큐에 넣음
+    print(f"⏳ 앱 캐시 만료 대기 ({args.settle_seconds}초)...")
+    time.sleep(args.settle_seconds)
+    for table in TABLES:
+        result = supabase.table(table)\
+            .update({'embedding_stale': True}, count='exact', returning='minimal')\
+            .gte('embedding_updated_at', switched_at)\
+            .execute()
+        print(f"[{table}] 전환 이후 기록된 {result.count or 0}개 재임베딩 예약")
+
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 모델 교체 마이그레이션")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("prepare", "backfill", "switch"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("--model", required=True, help="예: models/gemini-embedding-001")
+        sub.add_argument("--dim", type=int, required=True, help="벡터 차원 (HNSW 인덱스는 2000 이하)")
+        if name == "backfill":
+            sub.add_argument("--batch-size", type=int, default=50, help="임베딩 API 1회당 행 수")
+            sub.add_argument("--max-rpm", type=int, default=60, help="분당 최대 임베딩 요청 수")
+        if name == "switch":
+            sub.add_argument("--settle-seconds", type=int, default=65, help="앱 설정 캐시 만료 대기 시간")
+    subparsers.add_parser("status")
+
+    args = parser.parse_args()
+
+    supabase = create_client(get_config("SUPABASE_URL"), get_config("SUPABASE_KEY"))
+
+    commands = {
+        "prepare": cmd_prepare,
+        "backfill": cmd_backfill,
+        "status": cmd_status,
+        "switch": cmd_switch,
+    }
+    commands[args.command](supabase, args)
+
+
+if __name__ == "__main__":
+    main()
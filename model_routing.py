@@ -0,0 +1,99 @@
+"""
+작업별 모델 라우팅
+- 작업(rerank, verify, risk, generation) → 모델 등급(lite/standard/pro) + 최대 출력 토큰 + temperature
+- 대량 호출(재랭킹 점수)은 가장 빠르고 싼 등급, 긴 JSON 생성만 큰 모델
+- secrets의 MODEL_TIERS / MODEL_ROUTES로 일부만 덮어쓰기 가능
+    MODEL_TIERS = { lite = "gemini-2.0-flash-lite" }
+    MODEL_ROUTES = { verify = { tier = "lite", max_output_tokens = 1024 } }
+- 비용 추정(estimate_cost)은 벤치마크 / 지표 표시용
+"""
+
+# 등급 → 모델 이름
+DEFAULT_TIERS = {
+    'lite': 'gemini-2.0-flash-lite',
+    'standard': 'gemini-2.5-flash',
+    'pro': 'gemini-2.5-pro',
+}
+
+# 작업 → 등급 / 최대 출력 토큰 (None: 모델 기본값) / temperature (None: 모델 기본값)
+# - rerank의 max_output_tokens는 후보 1개당 값 (배치 프롬프트는 후보 수만큼 곱해서 사용)
+# - 2.5 모델은 생각(thinking) 토큰도 max_output_tokens에 포함 → 긴 JSON 생성은 기본값 유지
+DEFAULT_ROUTES = {
+    'rerank': {'tier': 'lite', 'max_output_tokens': 6, 'temperature': 0.1},
+    'verify': {'tier': 'standard', 'max_output_tokens': None, 'temperature': None},
+    'risk': {'tier': 'standard', 'max_output_tokens': None, 'temperature': None},
+    'generation': {'tier': 'standard', 'max_output_tokens': None, 'temperature': None},
+}
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력)
+DEFAULT_PRICES = {
+    'gemini-2.0-flash-lite': (0.075, 0.30),
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-2.0-flash-exp': (0.10, 0.40),
+    'gemini-2.5-flash-lite': (0.10, 0.40),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.5-pro': (1.25, 10.00),
+}
+
+
+class ModelRouter:
+    """
+    Args:
+        tiers: 등급 → 모델 이름 (DEFAULT_TIERS에 덮어씀)
+        routes: 작업 → {tier, model, max_output_tokens, temperature} (작업별로 DEFAULT_ROUTES에 덮어씀)
+            model을 주면 등급 대신 그 모델을 그대로 사용
+        prices: 모델 → (입력, 출력) 100만 토큰당 가격
+    """
+
+    def __init__(self, tiers=None, routes=None, prices=None):
+        self.tiers = {**DEFAULT_TIERS, **dict(tiers or {})}
+        self.prices = {**DEFAULT_PRICES, **{k: tuple(v) for k, v in dict(prices or {}).items()}}
+
+        self.routes = {task: dict(route) for task, route in DEFAULT_ROUTES.items()}
+        for task, route in dict(routes or {}).items():
+            self.routes.setdefault(task, {}).update(dict(route))
+
+        for task, route in self.routes.items():
+            if 'model' not in route and route.get('tier') not in self.tiers:
+                raise ValueError(f"알 수 없는 모델 등급: {task} → {route.get('tier')}")
+
+    def route(self, task: str) -> dict:
+        """작업 → {task, tier, model, max_output_tokens, temperature}"""
+        if task not in self.routes:
+            raise ValueError(f"알 수 없는 작업: {task}")
+        route = self.routes[task]
+        return {
+            'task': task,
+            'tier': route.get('tier'),
+            'model': route.get('model') or self.tiers[route['tier']],
+            'max_output_tokens': route.get('max_output_tokens'),
+            'temperature': route.get('temperature'),
+        }
+
+    def model(self, task: str) -> str:
+        return self.route(task)['model']
+
+    def config(self, task: str, items=1) -> dict:
+        """
+        작업 → GenerationConfig 값 (None인 항목 제외)
+
+        items: 배치 프롬프트의 항목 수 (max_output_tokens에 곱하고 여유 10 토큰)
+        """
+        route = self.route(task)
+        config = {}
+        if route['temperature'] is not None:
+            config['temperature'] = route['temperature']
+        if route['max_output_tokens'] is not None:
+            config['max_output_tokens'] = route['max_output_tokens'] * items + (10 if items > 1 else 0)
+        return config
+
+    def estimate_cost(self, model: str, input_tokens: int, output_tokens: int):
+        """예상 비용 (USD, 가격을 모르는 모델이면 None)"""
+        if model not in self.prices:
+            return None
+        input_price, output_price = self.prices[model]
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def table(self) -> list:
+        """라우팅 표 (작업별 route 리스트)"""
+        return [self.route(task) for task in self.routes]
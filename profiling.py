@@ -0,0 +1,187 @@
+"""
+Streamlit 스크립트 실행 프로파일링 (opt-in)
+- 서버 운영자가 켰을 때만 동작: QTBOT_PROFILE=1 환경 변수 또는 secrets의 PROFILE_ENABLED = true
+  (방문자가 URL로 켤 수 없음 → 익명 요청이 서버에 파일을 쓰게 할 수 없음)
+- qtbot.py 전체(세션 초기화, 페이지 라우팅, 사이드바)를 cProfile + tracemalloc 안에서 한 번 더 실행
+  (st.stop / st.rerun 예외로 끝나도 finally에서 결과 저장)
+- 페이지마다 PROFILE_DIR에 저장
+    {시각}_{페이지}.prof : pstats 원본 (snakeviz 등으로 열기)
+    {시각}_{페이지}.json : 상위 N개 함수(누적/자체 시간) + 상위 N개 메모리 할당 위치 → 비교용
+  최근 max_files회 실행 결과만 남기고 오래된 파일은 삭제
+- 비교: python profiling.py compare 이전.json 이후.json
+
+tracemalloc은 프로세스 전체 설정이라, 다른 세션이 이미 추적 중이면 이번 실행은 메모리 없이 시간만 기록
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+PROFILE_ENV = "QTBOT_PROFILE"
+PROFILED_RUN_FLAG = "_PROFILED_RUN"
+
+_tracemalloc_lock = threading.Lock()
+_prune_lock = threading.Lock()
+
+
+def profiling_enabled(setting=False) -> bool:
+    """환경 변수 또는 서버 설정(secrets)으로 프로파일링을 켰는지"""
+    if os.environ.get(PROFILE_ENV, "") not in ("", "0", "false"):
+        return True
+    return bool(setting)
+
+
+def _prune(out_dir: str, max_files: int):
+    """최근 max_files회 실행 결과(.prof + .json)만 남김 (파일 이름이 시각 순)"""
+    with _prune_lock:
+        runs = sorted({
+            os.path.splitext(name)[0] for name in os.listdir(out_dir)
+            if name.endswith((".prof", ".json"))
+        })
+        for base in runs[:max(len(runs) - max_files, 0)]:
+            for ext in (".prof", ".json"):
+                try:
+                    os.remove(os.path.join(out_dir, base + ext))
+                except FileNotFoundError:
+                    pass
+
+
+def _top_functions(profiler, top_n: int) -> dict:
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (calls, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'ncalls': ncalls,
+            'tottime': round(tottime, 4),
+            'cumtime': round(cumtime, 4),
+        })
+    return {
+        'by_cumtime': sorted(rows, key=lambda r: r['cumtime'], reverse=True)[:top_n],
+        'by_tottime': sorted(rows, key=lambda r: r['tottime'], reverse=True)[:top_n],
+    }
+
+
+def _top_allocations(before, after, top_n: int) -> list:
+    """실행 중 늘어난 메모리 상위 N개 위치 (프로파일러 자체 할당 제외)"""
+    exclude = [tracemalloc.Filter(False, path) for path in (__file__, cProfile.__file__, tracemalloc.__file__)]
+    before, after = before.filter_traces(exclude), after.filter_traces(exclude)
+    return [
+        {
+            'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size_diff / 1024, 1),
+            'count': stat.count_diff,
+        }
+        for stat in after.compare_to(before, 'lineno')[:top_n]
+    ]
+
+
+def run_profiled(script_path: str, page: str, out_dir="profiles", top_n=30, max_files=50):
+    """
+    script_path를 cProfile(+ 가능하면 tracemalloc) 안에서 실행하고 결과 저장 (최근 max_files회만 유지)
+
+    스크립트 안에서는 PROFILED_RUN_FLAG가 True → 다시 프로파일링하지 않음
+    스크립트가 올린 예외(st.stop / st.rerun 포함)는 그대로 올림
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    trace_memory = _tracemalloc_lock.acquire(blocking=False)
+    if trace_memory and tracemalloc.is_tracing():
+        # 프로세스 밖(python -X tracemalloc 등)에서 이미 추적 중 → 건드리지 않음
+        _tracemalloc_lock.release()
+        trace_memory = False
+    if trace_memory:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    outcome = "completed"
+    profiler.enable()
+    try:
+        runpy.run_path(script_path, init_globals={PROFILED_RUN_FLAG: True}, run_name="__main__")
+    except BaseException as e:
+        # st.stop() / st.rerun()도 스크립트 종료 → 이름만 기록
+        outcome = type(e).__name__
+        raise
+    finally:
+        profiler.disable()
+        wall_seconds = time.perf_counter() - started
+        after = peak_kb = None
+        if trace_memory:
+            after = tracemalloc.take_snapshot()
+            peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.stop()
+            _tracemalloc_lock.release()
+
+        report = {
+            'page': page,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'wall_seconds': round(wall_seconds, 4),
+            'outcome': outcome,
+            'functions': _top_functions(profiler, top_n),
+            'allocations': _top_allocations(before, after, top_n) if after is not None else None,
+            'peak_memory_kb': peak_kb,
+        }
+
+        base = os.path.join(
+            out_dir,
+            f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{re.sub(r'[^A-Za-z0-9_-]', '_', page)}"
+        )
+        profiler.dump_stats(base + ".prof")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        _prune(out_dir, max_files)
+
+
+# ========================================
+# 비교 (CLI)
+# ========================================
+def compare(before_path: str, after_path: str, top_n=20):
+    """두 .json 결과의 함수별 누적 시간 / 위치별 할당 차이 출력"""
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+
+    print(f"실행 시간: {before['wall_seconds']}초 → {after['wall_seconds']}초 "
+          f"(페이지 {before['page']} → {after['page']})")
+    if before.get('peak_memory_kb') and after.get('peak_memory_kb'):
+        print(f"최대 메모리: {before['peak_memory_kb']}KB → {after['peak_memory_kb']}KB")
+
+    old = {row['function']: row['cumtime'] for row in before['functions']['by_cumtime']}
+    new = {row['function']: row['cumtime'] for row in after['functions']['by_cumtime']}
+    deltas = sorted(
+        ((name, old.get(name, 0.0), new.get(name, 0.0)) for name in set(old) | set(new)),
+        key=lambda item: abs(item[2] - item[1]),
+        reverse=True
+    )
+    print(f"\n{'함수':<60}{'이전(s)':>10}{'이후(s)':>10}{'차이':>10}")
+    for name, old_time, new_time in deltas[:top_n]:
+        print(f"{name[:59]:<60}{old_time:>10.4f}{new_time:>10.4f}{new_time - old_time:>+10.4f}")
+
+    if before.get('allocations') and after.get('allocations'):
+        old = {row['location']: row['size_kb'] for row in before['allocations']}
+        new = {row['location']: row['size_kb'] for row in after['allocations']}
+        deltas = sorted(
+            ((loc, old.get(loc, 0.0), new.get(loc, 0.0)) for loc in set(old) | set(new)),
+            key=lambda item: abs(item[2] - item[1]),
+            reverse=True
+        )
+        print(f"\n{'할당 위치':<60}{'이전(KB)':>10}{'이후(KB)':>10}{'차이':>10}")
+        for loc, old_kb, new_kb in deltas[:top_n]:
+            print(f"{loc[-59:]:<60}{old_kb:>10.1f}{new_kb:>10.1f}{new_kb - old_kb:>+10.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "compare":
+        compare(sys.argv[2], sys.argv[3])
+    else:
+        sys.exit("사용법: python profiling.py compare 이전.json 이후.json")
@@ -20,9 +20,10 @@
 
 import streamlit as st
 import json
+import uuid
 from datetime import datetime
-import google.generativeai as genai
 import os
+import time
 import pandas as pd
 from io import BytesIO, StringIO
 from supabase_helpers import (
@@ -31,14 +32,83 @@ from supabase_helpers import (
     save_spec_doc_to_supabase,
     hybrid_search_test_cases,      # ⭐ 하이브리드 검색
     hybrid_search_spec_docs,       # ⭐ 하이브리드 검색
+    get_test_case_categories,      # 카테고리 필터 선택용
+    case_for_prompt,               # 검색 결과 → 프롬프트용 dict (그룹 행 압축)
+    update_test_case,              # 수정 + 임베딩 재생성 큐 등록
+    update_spec_doc,               # 수정 + 임베딩 재생성 큐 등록
+    edit_test_case_group,          # 표 그룹 변경분만 반영
+    delete_test_case_group,        # group_id 단위 일괄 삭제
+    delete_test_cases,             # id 목록 일괄 삭제
+    get_ingest_queue,              # 저장 작업 큐 (SQLite)
+    enqueue_table_group,           # 표 형식 저장 → 작업 등록
+    table_row_hashes,              # 파일 직접 가져오기: 청크별 행 해시 누적
+    find_duplicate_table_group,    # 파일 직접 가져오기: 같은 그룹이 이미 있는지
+    get_embedding_worker,
+    get_gemini_limiter,            # Gemini 공유 제한기 (RPM/TPM + 동시 요청 한도)
+    get_gemini_breakers,           # Gemini 서킷 브레이커 (임베딩/생성)
+    get_micro_batchers,            # 세션 간 마이크로 배치 (임베딩/재랭킹 점수)
+    get_llm_gateway,               # LLM 게이트웨이 (헤징 상태 표시)
+    get_model_router,              # 작업별 모델 라우팅 (재랭킹/동작 확인/리스크/생성)
+    probe_model_health,            # 모델 상태 확인 (캐시된 짧은 요청)
+    load_metrics_events,           # 계측 로그 (지표 페이지)
+    MODEL_HEALTH_TTL_SECONDS,
+    generate_text,                 # LLM 게이트웨이 경유 생성 (제한기 + 타임아웃 + 브레이커)
+    llm_ready,
     TABLE_NAME,                     # test_cases_v21
     SPEC_TABLE_NAME,                # spec_docs_v21
-    GOOGLE_API_KEY,
     INITIAL_SEARCH_COUNT,
     FINAL_SEARCH_COUNT,
-    RERANK_METHOD
+    RERANK_METHOD,
+    ADAPTIVE_CUTOFF,
+    MMR_ENABLED,
+    MMR_LAMBDA
 )
 
+from table_import import iter_table_chunks, normalize_chunk
+from table_rows import TABLE_COLUMNS, clean_table, table_to_rows, empty_table
+from ingest_jobs import make_idempotency_key
+from resilience import set_deadline, clear_deadline
+from timing import start_trace, clear_trace, finish_trace, record_since
+from metrics import latency_percentiles, fleet_summary, request_costs, cache_hit_ratios, timeseries
+from profiling import PROFILED_RUN_FLAG, profiling_enabled, run_profiled
+
+# 대용량 파일 직접 가져오기: 청크당 행 수
+IMPORT_CHUNK_SIZE = st.secrets.get("IMPORT_CHUNK_SIZE", 200)
+
+# AI 요청 1건(검색 → 재랭킹 → 생성) 전체 마감 시간 (초)
+PAGE_DEADLINE_SECONDS = st.secrets.get("PAGE_DEADLINE_SECONDS", 180)
+
+# 프로파일링 (QTBOT_PROFILE=1 환경 변수 또는 PROFILE_ENABLED = true일 때만, URL로는 켤 수 없음)
+PROFILE_ENABLED = st.secrets.get("PROFILE_ENABLED", False)
+PROFILE_DIR = st.secrets.get("PROFILE_DIR", "profiles")
+PROFILE_TOP_N = st.secrets.get("PROFILE_TOP_N", 30)           # 상위 함수·할당 개수
+PROFILE_MAX_FILES = st.secrets.get("PROFILE_MAX_FILES", 50)   # 남겨 둘 최근 실행 수 (오래된 결과는 삭제)
+
+# 프로파일링이 켜져 있으면 이 스크립트 전체를 프로파일러 안에서 다시 실행하고 바깥 실행은 여기서 끝냄
+# (안쪽 실행에는 _PROFILED_RUN = True가 주어짐 → 다시 감싸지 않음)
+if not globals().get(PROFILED_RUN_FLAG) and profiling_enabled(PROFILE_ENABLED):
+    run_profiled(
+        __file__, page=st.query_params.get("page", "main"),
+        out_dir=PROFILE_DIR, top_n=PROFILE_TOP_N, max_files=PROFILE_MAX_FILES
+    )
+    st.stop()
+
+
+def render_timing_breakdown():
+    """현재 요청의 단계별 소요 시간 (디버그용, 접힌 상태로 표시)"""
+    trace = finish_trace()
+    if trace is None:
+        return
+    with st.expander(f"⏱️ 단계별 소요 시간 (총 {trace.elapsed_ms() / 1000:.1f}초, 디버그)", expanded=False):
+        st.dataframe(pd.DataFrame(trace.summary()), use_container_width=True, hide_index=True)
+        st.caption(f"요청 ID: {trace.request_id} (계측 로그 JSONL에서 같은 ID로 상세 조회)")
+        st.dataframe(
+            pd.DataFrame(trace.events).drop(columns=['ts', 'request_id', 'page'], errors='ignore'),
+            use_container_width=True,
+            hide_index=True
+        )
+
+
 # Excel 지원 확인
 try:
     import openpyxl
@@ -57,6 +127,10 @@ if 'spec_docs' not in st.session_state:
 if 'search_history' not in st.session_state:
     st.session_state.search_history = []
 
+# 저장 요청 멱등성 키 범위 (다른 세션의 같은 내용 저장과 섞이지 않도록)
+if 'save_session_id' not in st.session_state:
+    st.session_state.save_session_id = uuid.uuid4().hex
+
 # 카운트 초기화 시 DB에서 실제 값 가져오기
 if 'tc_count' not in st.session_state or st.session_state.get('force_reload_tc_count', False):
     supabase = get_supabase_client()
@@ -91,6 +165,9 @@ if 'doc_count' not in st.session_state or st.session_state.get('force_reload_doc
     else:
         st.session_state.doc_count = 0
 
+# 임베딩 재생성 워커 시작 (프로세스당 1회, 남아있는 큐 처리)
+get_embedding_worker()
+
 # 편집 모드 세션 스테이트
 if 'editing_test_case_id' not in st.session_state:
     st.session_state.editing_test_case_id = None
@@ -113,6 +190,10 @@ page = query_params.get("page", "main")
 if isinstance(page, list):
     page = page[0]
 
+# 이전 실행의 마감 시간 / 계측 추적이 남지 않도록 초기화 (AI 요청 버튼에서 새로 설정)
+clear_deadline()
+clear_trace()
+
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
 
@@ -307,47 +388,28 @@ if page == "test_cases":
                                 with col1:
                                     if st.button("💾 저장", key=f"save_{unique_key}", use_container_width=True):
                                         try:
-                                            # 기존 그룹 전체 삭제
-                                            for row in rows:
-                                                supabase.table(TABLE_NAME).delete().eq('id', row['id']).execute()
-
-                                            # 새로운 데이터로 다시 저장
-                                            new_table_data = []
-                                            for _, row in edited_df.iterrows():
-                                                # 빈 행 필터링 개선
-                                                if (pd.isna(row['CATEGORY']) or str(row['CATEGORY']).strip() == '') and \
-                                                   (pd.isna(row['DEPTH 1']) or str(row['DEPTH 1']).strip() == ''):
-                                                    continue
-                                            
-                                                new_table_data.append({
-                                                    'NO': str(row['NO']),
-                                                    'CATEGORY': str(row['CATEGORY']),
-                                                    'DEPTH 1': str(row['DEPTH 1']),
-                                                    'DEPTH 2': str(row['DEPTH 2']),
-                                                    'DEPTH 3': str(row['DEPTH 3']),
-                                                    'PRE-CONDITION': str(row['PRE-CONDITION']),
-                                                    'STEP': str(row['STEP']),
-                                                    'EXPECT RESULT': str(row['EXPECT RESULT'])
-                                                })
-
-                                            if new_table_data:
-                                                group_test = {
-                                                    "group_id": group_id,
-                                                    "input_type": input_type,
-                                                    # "category": category,
-                                                    "category": "입력 그룹",
-                                                    "name": f"({len(new_table_data)}개)",
-                                                    "table_data": new_table_data
-                                                }
-
-                                                saved_count = save_test_case_to_supabase(group_test)
-
-                                                if saved_count > 0:
+                                            # 편집된 표 → 행 dict (빈 셀은 '', 빈 행도 위치 유지)
+                                            edited_table_data = table_to_rows(edited_df, drop_incomplete=False)
+
+                                            if any(r['CATEGORY'] or r['DEPTH 1'] for r in edited_table_data):
+                                                # 변경분만 반영 (바뀐 행만 재임베딩, id 유지)
+                                                edit_result = edit_test_case_group(group_id, rows, edited_table_data)
+
+                                                if edit_result is not None:
                                                     st.session_state.editing_test_case_id = None
                                                     # 세션 스테이트 정리
                                                     if edit_session_key in st.session_state:
                                                         del st.session_state[edit_session_key]
-                                                    st.success("✅ 수정되었습니다!")
+
+                                                    # 카운트는 추가/삭제 수로 바로 보정
+                                                    st.session_state.tc_count = st.session_state.get('tc_count', 0) \
+                                                        + edit_result.get('inserted', 0) - edit_result.get('deleted', 0)
+                                                    st.cache_data.clear()
+
+                                                    st.success(
+                                                        f"✅ 수정되었습니다! (수정 {edit_result.get('updated', 0)}개, "
+                                                        f"추가 {edit_result.get('inserted', 0)}개, 삭제 {edit_result.get('deleted', 0)}개)"
+                                                    )
                                                     st.rerun()
                                                 else:
                                                     st.error("❌ 저장 실패!")
@@ -402,22 +464,18 @@ if page == "test_cases":
                                 # 삭제 버튼
                                 with col2:
                                     if st.button("🗑️ 삭제", key=f"delete_{unique_key}", use_container_width=True):
-                                        try:
-                                            # 1. 그룹 내 모든 케이스 삭제
-                                            for row in rows:
-                                                supabase.table(TABLE_NAME).delete().eq('id', row['id']).execute()
+                                        # 1. 그룹 내 모든 케이스 삭제 (단일 요청)
+                                        deleted_count = delete_test_case_group(group_id)
 
+                                        if deleted_count is not None:
                                             # 2. 캐시 클리어
                                             st.cache_data.clear()
 
-                                            # 3. 카운트 업데이트
-                                            result = supabase.table(TABLE_NAME).select('id', count='exact').execute()
-                                            st.session_state.tc_count = result.count  # count 사용
+                                            # 3. 카운트 보정 (재조회 없음)
+                                            st.session_state.tc_count = max(0, st.session_state.get('tc_count', 0) - deleted_count)
                                         
-                                            st.success("✅ 삭제되었습니다!")
+                                            st.success(f"✅ {deleted_count}개 삭제되었습니다!")
                                             st.rerun()
-                                        except Exception as e:
-                                            st.error(f"❌ 삭제 실패: {str(e)}")
                 # 8. 개별 케이스. 그룹 없는 케이스 (줄글 형식 등) (최근 2개)
                 if recent_2_ungrouped:
                     st.markdown("### 📝 최근 개별 케이스 (2개)")
@@ -440,12 +498,13 @@ if page == "test_cases":
                                 with col1:
                                     if st.button("💾 저장", key=f"save_tc_{row['id']}", use_container_width=True):
                                         try:
-                                            supabase.table(TABLE_NAME).update({
+                                            # 내용이 바뀌면 임베딩은 백그라운드에서 재생성
+                                            update_test_case(row, {
                                                 'category': edited_category,
                                                 'name': edited_name,
                                                 'description': edited_desc,
                                                 'link': edited_link
-                                            }).eq('id', row['id']).execute()
+                                            })
                                             
                                             st.session_state.editing_test_case_id = None
                                             st.success("✅ 수정되었습니다!")
@@ -483,25 +542,19 @@ if page == "test_cases":
                                 # 삭제 버튼
                                 with col2:
                                     if st.button("🗑️ 삭제", key=f"delete_tc_{row['id']}", use_container_width=True):
-                                        try:
-                                            # 1. DB에서 삭제
-                                            supabase.table(TABLE_NAME).delete().eq('id', row['id']).execute()
+                                        # 1. DB에서 삭제
+                                        deleted_count = delete_test_cases([row['id']])
 
+                                        if deleted_count is not None:
                                             # 2. 캐시 클리어
                                             st.cache_data.clear()
                                             
-                                            # 3. 카운트 업데이트
-                                            supabase = get_supabase_client()
-                                            if supabase:
-                                                result = supabase.table(TABLE_NAME).select('id', count='exact').execute()
-                                                st.session_state.tc_count = result.count  # count 사용
+                                            # 3. 카운트 보정 (재조회 없음)
+                                            st.session_state.tc_count = max(0, st.session_state.get('tc_count', 0) - deleted_count)
                                             
                                             st.success("✅ 삭제되었습니다!")
                                             st.rerun()
 
-                                        except Exception as e:
-                                            st.error(f"❌ 삭제 실패: {str(e)}")
-
             else:
                 st.info("아직 저장된 테스트 케이스가 없습니다.")
 
@@ -557,12 +610,13 @@ elif page == "spec_docs":
                             with col1:
                                 if st.button("💾 저장", key=f"save_spec_{row['id']}", use_container_width=True):
                                     try:
-                                        supabase.table(SPEC_TABLE_NAME).update({
+                                        # 내용이 바뀌면 임베딩은 백그라운드에서 재생성
+                                        update_spec_doc(row, {
                                             'title': edited_title,
                                             'doc_type': edited_type,
                                             'link': edited_link,
                                             'content': edited_content
-                                        }).eq('id', row['id']).execute()
+                                        })
 
                                         st.session_state.editing_spec_doc_id = None
                                         st.success("✅ 수정되었습니다!")
@@ -648,33 +702,45 @@ elif page == "recommend":
             height=150,
             key="search_input"
         )
+
+        # 카테고리 필터 (벡터 검색 RPC 안에서 적용)
+        search_category = st.selectbox(
+            "카테고리 필터",
+            get_test_case_categories(),
+            key="search_category"
+        )
             
         if st.button("AI 추천 받기", type="primary"):
+            set_deadline(PAGE_DEADLINE_SECONDS)
+            start_trace("recommend")
             if search_query:
                 with st.spinner("AI가 유사한 케이스를 검색중이에요. 1분 ~ 최대 5분 소요될 수 있어요🥹"):
-                        # Gemini 클라이언트 직접 생성
-                        api_key = os.environ.get("GOOGLE_API_KEY")
-                        if not api_key:
-                            st.error("❌ GOOGLE_API_KEY 환경 변수가 설정되지 않았습니다.")
+                        # LLM 게이트웨이 준비 확인 (gemini 공급자는 API 키 필요)
+                        if not llm_ready():
+                            st.error("❌ GOOGLE_API_KEY가 설정되지 않았습니다.")
                             st.stop()
-
-                        genai.configure(api_key=api_key)
                     
                         # 벡터 유사도 검색
+                        # 이전 검색 결과가 남지 않도록 초기화
+                        st.session_state.relevant_cases = []
                         try:
                             # 1. Supabase에서 유사한 테스트 케이스 검색
+                            # 결과가 없으면 같은 임베딩으로 임계값만 낮춰 재조회 (0.3 → 0.2 → 0.0)
                             with st.spinner("🔍 1단계: 벡터 검색 중..."):
                                 relevant_cases = hybrid_search_test_cases(
                                     query_text=search_query,
+                                    category_filter=search_category,
                                     limit=50,
-                                    similarity_threshold=0.3  # 30% 이상 유사도
+                                    similarity_threshold=0.3,  # 30% 이상 유사도
+                                    fallback_thresholds=[0.2, 0.0]
                                 )
 
                                 # 세션 스테이트에 저장
                                 st.session_state.relevant_cases = relevant_cases
                                 
                             if relevant_cases:
-                                st.success(f"✅ 1단계 완료: {len(relevant_cases)}개 발견")
+                                matched_threshold = relevant_cases[0].get('matched_threshold')
+                                st.success(f"✅ 1단계 완료: {len(relevant_cases)}개 발견 (임계값 {matched_threshold})")
 
                                 # 유사도 정보 표시
                                 with st.expander("🔍 검색된 케이스 미리보기", expanded=False):
@@ -684,14 +750,6 @@ elif page == "recommend":
 
                             else:
                                 st.warning("⚠️ 유사한 테스트 케이스를 찾지 못했습니다. 일반 케이스로 진행합니다.")
-                                # 벡터 검색 실패 시에도 하이브리드 검색 사용 (임계값 낮춤)
-                                all_cases = hybrid_search_test_cases(
-                                    query_text=search_query,
-                                    category_filter=None
-                                )
-                                
-                                # 세션 스테이트에 저장
-                                st.session_state.relevant_cases = all_cases
 
                             # 2. 기획 문서도 벡터 검색
                             spec_docs_str = ""
@@ -703,68 +761,26 @@ elif page == "recommend":
                                 for doc in spec_docs:
                                     spec_docs_str += f"\n[문서 제목: {doc['title']}]\n[문서 유형: {doc['doc_type']}]\n[유사도: {doc.get('similarity', 0):.2%}]\n[내용]\n{doc['content'][:500]}...\n\n---\n"
 
-                            # 3. AI 프롬프트용 데이터 준비
-                            test_cases_str = json.dumps(
-                                [
-                                    {
-                                        "id": tc.get("id"),
-                                        "category": tc.get("category"),
-                                        "name": tc.get("name"),
-                                        "description": tc.get("description"),
-                                        "data": tc.get("data"),
-                                        "similarity": tc.get("similarity")
-                                    }
-                                    for tc in relevant_cases
-                                ],
-                                ensure_ascii=False,
-                                indent=2
-                            )
-                            
                         except Exception as e:
+                            # 임계값 완화는 검색 함수 안에서 이미 끝남 → 전체 검색을 다시 돌리지 않고 확보된 결과로 진행
                             st.error(f"❌ 하이브리드 검색 실패: {str(e)}")
-                            st.warning("최소 임계값으로 재시도합니다...")
-
-                            try:
-                                # 임계값 0으로 하이브리드 검색 재시도
-                                relevant_cases = hybrid_search_test_cases(
-                                    query_text=search_query,
-                                    category_filter=None
-                                )
-
-                                if relevant_cases:
-                                    test_cases_str = json.dumps(
-                                        [
-                                            {
-                                                "id": tc.get("id"),
-                                                "category": tc.get("category"),
-                                                "name": tc.get("name"),
-                                                "description": tc.get("description"),
-                                                "data": tc.get("data"),
-                                                "similarity": tc.get("similarity")
-                                            }
-                                            for tc in relevant_cases
-                                        ],
-                                        ensure_ascii=False,
-                                        indent=2
-                                    )
-                                    st.session_state.relevant_cases = relevant_cases
-                                    st.info(f"✅ {len(relevant_cases)}개의 테스트 케이스를 찾았습니다 (재시도 성공)")
-                                else:
-                                    st.warning("재시도에도 결과를 찾지 못했습니다. 일반 케이스로 진행합니다.")
-                                    relevant_cases = []
-                                    test_cases_str = "[]"
-                                    st.session_state.relevant_cases = []
-            
-                            except Exception as e2:
-                                st.error(f"❌ 재시도 실패: {str(e2)}")
-                                relevant_cases = []
-                                test_cases_str = "[]"
-                                st.session_state.relevant_cases = []
-    
+                            relevant_cases = st.session_state.get('relevant_cases', [])
+                            if relevant_cases:
+                                st.info(f"✅ 이미 찾은 {len(relevant_cases)}개의 테스트 케이스로 진행합니다")
+                            else:
+                                st.warning("검색 결과 없이 일반 케이스로 진행합니다.")
                             spec_docs_str = ""
 
-                            # 세션 스테이트에 저장
-                            st.session_state.relevant_cases = relevant_cases
+                        # 3. AI 프롬프트용 데이터 준비
+                        prompt_started = time.perf_counter()
+                        test_cases_str = json.dumps(
+                            [
+                                case_for_prompt(tc, ["id", "category", "name", "description", "data", "similarity"])
+                                for tc in relevant_cases
+                            ],
+                            ensure_ascii=False,
+                            indent=2
+                        )
                         
                         # 4. AI 프롬프트 (기존과 동일)
                         prompt = f"""[역할 부여]
@@ -835,15 +851,13 @@ elif page == "recommend":
 2. new_test_cases는 반드시 표 양식에 맞춰 작성
 3. 벡터 검색으로 찾은 유사 케이스를 충분히 활용할 것
 """
+                        record_since("prompt", prompt_started, chars=len(prompt), cases=len(relevant_cases))
 
                         # 5. AI 응답 처리
                         try:
-                            # Gemini 직접 호출
-                            api_key = os.environ.get("GOOGLE_API_KEY")
-                            genai.configure(api_key=api_key)
-                            model = genai.GenerativeModel('gemini-2.5-flash')
-                            response = model.generate_content(prompt)
-                            response_text = response.text
+                            # LLM 게이트웨이 호출 (제한기 + 타임아웃 + 브레이커)
+                            response_text = generate_text(prompt, hedge=True)
+                            parse_started = time.perf_counter()
                                         
                             # JSON 파싱
                             if "```json" in response_text:
@@ -873,6 +887,8 @@ elif page == "recommend":
                                     st.error("❌ AI 응답을 처리할 수 없습니다. 다시 시도해주세요.")
                                     st.stop()
 
+                            record_since("parse_json", parse_started, chars=len(response_text))
+
                             st.session_state.search_history.append({
                                 "query": search_query,
                                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -884,6 +900,7 @@ elif page == "recommend":
 
                         except Exception as e:
                             st.error(f"❌ AI 분석 중 오류가 발생했습니다: {str(e)}")
+                render_timing_breakdown()
             else:
                 st.warning("검색어를 입력해주세요.")
                     
@@ -967,10 +984,10 @@ elif page == "recommend":
                     if st.button("💾 학습시키기", type="primary", use_container_width=True):
                         # AI가 생성한 테스트 케이스를 그룹으로 저장
                         group_id = f"ai_generated_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                        table_data = []
+                        ai_rows = []
                         
                         for tc in ai_response.get("new_test_cases", []):
-                            table_data.append({
+                            ai_rows.append({
                                 'NO': str(tc.get("no", "")),
                                 'CATEGORY': tc.get("category", ""),
                                 'DEPTH 1': tc.get("depth1", ""),
@@ -980,42 +997,26 @@ elif page == "recommend":
                                 'STEP': tc.get("step", ""),
                                 'EXPECT RESULT': tc.get("expect_result", "")
                             })
+
+                        # 표 저장과 같은 정규화 (CATEGORY, DEPTH 1 없는 빈 행 제외)
+                        table_data = table_to_rows(pd.DataFrame(ai_rows)) if ai_rows else []
                         
                         if table_data:
-                            group_test = {
-                                "group_id": group_id,
-                                "input_type": "ai_generated_group",
-                                "category": "AI 생성",
-                                "name": f" ({len(table_data)}개)",
-                                "table_data": table_data,
-                            }
-
-                            with st.spinner("저장 중..."):
-                                saved_count = save_test_case_to_supabase(group_test)
-
-                            if saved_count > 0:
-                                # 1. 캐시 클리어
-                                st.cache_data.clear()
-
-                                # 2. DB 반영 대기
-                                import time
-                                time.sleep(0.5)
-
-                                # 3. 저장 직후 카운트 업데이트
-                                supabase = get_supabase_client()
-                                if supabase:
-                                    try:
-                                        result = supabase.table(TABLE_NAME).select('id', count='exact').execute()
-                                        new_count = result.count  # count 사용
-
-                                        # 플래그 설정
-                                        st.session_state.force_reload_tc_count = True
-                                        st.session_state.tc_count = new_count
-
-                                    except Exception as e:
-                                        st.error(f"카운트 업데이트 실패: {str(e)}")
+                            # 저장 작업 큐에 등록 (임베딩 + 저장은 백그라운드)
+                            saved = enqueue_table_group(
+                                table_data, group_id, "AI 생성", kind="ai_generated_group",
+                                nonce=st.session_state.save_session_id
+                            )
 
-                                st.success(f"✅ {saved_count}개 저장 완료!")
+                            if saved['duplicate_group']:
+                                st.info(
+                                    f"ℹ️ 같은 내용의 그룹이 이미 저장되어 있어 새로 저장하지 않았습니다. "
+                                    f"(그룹 {saved['duplicate_group']})"
+                                )
+                            elif saved['reused']:
+                                st.info(f"ℹ️ 같은 저장 요청이 이미 등록되어 있습니다. (작업 {saved['job_id']})")
+                            else:
+                                st.success(f"✅ {len(table_data)}개 저장 작업이 등록되었습니다! (작업 {saved['job_id']})")
                                 del st.session_state.last_ai_response
                                 st.rerun()
 
@@ -1065,8 +1066,21 @@ elif page == "recommend":
                                 with st.expander(f"✓ {i}. [{test_case.get('category', '미분류')}] {test_case.get('name', '제목 없음')}", expanded=False):
                                     st.markdown(f"**왜 필요한가?** {rec.get('reason', '')}")
 
+                                    # 그룹이면 그룹 전체 행을 표로 표시
+                                    if test_case.get('group_rows'):
+                                        st.markdown(f"**테스트 케이스 표 (그룹 {len(test_case['group_rows'])}개 행):**")
+                                        df_tc = pd.DataFrame([{
+                                            'NO': (row.get('data') or {}).get('no', ''),
+                                            'CATEGORY': (row.get('data') or {}).get('category', ''),
+                                            'DEPTH 1': (row.get('data') or {}).get('depth1', ''),
+                                            'DEPTH 2': (row.get('data') or {}).get('depth2', ''),
+                                            'DEPTH 3': (row.get('data') or {}).get('depth3', ''),
+                                            'STEP': (row.get('data') or {}).get('step', ''),
+                                            'EXPECT RESULT': (row.get('data') or {}).get('expect_result', '')
+                                        } for row in test_case['group_rows']])
+                                        st.dataframe(df_tc, use_container_width=True, hide_index=True)
                                     # table_data가 있으면 표시
-                                    if test_case.get('table_data'):
+                                    elif test_case.get('table_data'):
                                         st.markdown("**테스트 케이스 표:**")
                                         df_tc = pd.DataFrame([{
                                             'NO': item.get('NO', ''),
@@ -1148,7 +1162,16 @@ elif page == "risk":
         key="risk_input"
     )
 
+    # 카테고리 필터 (벡터 검색 RPC 안에서 적용)
+    risk_category = st.selectbox(
+        "카테고리 필터",
+        get_test_case_categories(),
+        key="risk_category"
+    )
+
     if st.button("⚠️ 리스크 검토 시작", type="primary"):
+        set_deadline(PAGE_DEADLINE_SECONDS)
+        start_trace("risk")
         if not feature_description:
             st.warning("⚠️ 기능 설명을 입력해주세요!")
         else:
@@ -1156,6 +1179,7 @@ elif page == "risk":
                 # 1. 관련 테스트 케이스 검색
                 relevant_cases = hybrid_search_test_cases(
                     query_text=feature_description,
+                    category_filter=risk_category,
                     limit=30,
                     similarity_threshold=0.3
                 )
@@ -1167,8 +1191,9 @@ elif page == "risk":
                 )
 
                 # 3. AI 프롬프트 생성
+                prompt_started = time.perf_counter()
                 test_cases_str = json.dumps(
-                    [{"id": tc.get("id"), "name": tc.get("name"), "description": tc.get("description")}
+                    [case_for_prompt(tc, ["id", "name", "description"], row_fields=["depth1", "depth2", "step"])
                      for tc in relevant_cases],
                     ensure_ascii=False
                 )
@@ -1208,14 +1233,12 @@ elif page == "risk":
 }}
 ```
 """
+                record_since("prompt", prompt_started, chars=len(prompt), cases=len(relevant_cases))
 
                 # 4. AI 호출
                 try:
-                    genai.configure(api_key=GOOGLE_API_KEY)
-                    # model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                    model = genai.GenerativeModel('gemini-2.5-flash')
-                    response = model.generate_content(prompt)
-                    response_text = response.text
+                    response_text = generate_text(prompt, task="risk", hedge=True)
+                    parse_started = time.perf_counter()
 
                     # JSON 파싱
                     if "```json" in response_text:
@@ -1241,6 +1264,7 @@ elif page == "risk":
                             st.stop()
 
                     risk_result = json.loads(json_str)
+                    record_since("parse_json", parse_started, chars=len(response_text))
 
                     # 5. 결과 표시
                     st.success("✅ 리스크 분석 완료!")
@@ -1276,6 +1300,7 @@ elif page == "risk":
 
                 except Exception as e:
                     st.error(f"❌ 분석 실패: {str(e)}")
+            render_timing_breakdown()
 
 
 # 의도된 동작 확인 페이지
@@ -1295,6 +1320,8 @@ elif page == "verify":
     )
 
     if st.button("✅ 동작 확인", type="primary"):
+        set_deadline(PAGE_DEADLINE_SECONDS)
+        start_trace("verify")
         if not behavior_description:
             st.warning("⚠️ 확인하고 싶은 동작을 입력해주세요!")
         else:
@@ -1316,9 +1343,9 @@ elif page == "verify":
                     st.info(f"📊 검색 결과: 테스트 케이스 {len(relevant_cases)}개, 기획 문서 {len(spec_docs)}개")
                     
                     # 3. AI 프롬프트 (추론 금지!)
+                    prompt_started = time.perf_counter()
                     test_cases_str = json.dumps(
-                        [{"name": tc.get("name"), "description": tc.get("description"), 
-                          "data": tc.get("data")} for tc in relevant_cases],
+                        [case_for_prompt(tc, ["name", "description", "data"]) for tc in relevant_cases],
                         ensure_ascii=False
                     )
 
@@ -1356,14 +1383,12 @@ elif page == "verify":
 }}
 ```
 """
+                    record_since("prompt", prompt_started, chars=len(prompt), cases=len(relevant_cases))
 
                     # 4. AI 호출
                     try:
-                        genai.configure(api_key=GOOGLE_API_KEY)
-                        # model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                        model = genai.GenerativeModel('gemini-2.5-flash')
-                        response = model.generate_content(prompt)
-                        response_text = response.text
+                        response_text = generate_text(prompt, task="verify", hedge=True)
+                        parse_started = time.perf_counter()
 
                         # JSON 파싱
                         if "```json" in response_text:
@@ -1388,6 +1413,7 @@ elif page == "verify":
                                 st.stop()
 
                         verify_result = json.loads(json_str)
+                        record_since("parse_json", parse_started, chars=len(response_text))
 
                         # 5. 결과 표시
                         found = verify_result.get("found_in_data", False)
@@ -1413,6 +1439,7 @@ elif page == "verify":
 
                     except Exception as e:
                         st.error(f"❌ 확인 실패: {str(e)}")
+            render_timing_breakdown()
 
 # 키워드 검색 페이지
 elif page == "keyword":
@@ -1497,6 +1524,91 @@ elif page == "keyword":
                                     if doc.get('link'):
                                         st.write(f"**링크**: {doc.get('link')}")
 
+# 지표 대시보드 페이지
+elif page == "metrics":
+    st.header("📈 지표 대시보드")
+    st.markdown('<a href="/" target="_self">🏠 홈으로 돌아가기</a>', unsafe_allow_html=True)
+    st.markdown("---")
+
+    # 조회 구간 → (시간, 차트 구간)
+    windows = {
+        "최근 1시간": (1, "1min"),
+        "최근 6시간": (6, "10min"),
+        "최근 24시간": (24, "30min"),
+        "최근 7일": (24 * 7, "3h"),
+    }
+    window_label = st.selectbox("조회 구간", list(windows.keys()), index=2)
+    hours, freq = windows[window_label]
+
+    events = load_metrics_events(hours)
+    if events is None:
+        st.warning("⚠️ TIMING_LOG_PATH가 비어 있어 계측 로그가 기록되지 않습니다.")
+    elif events.empty:
+        st.info("💡 이 구간에 기록된 요청이 없습니다. 추천/리스크/동작 확인을 실행하면 쌓입니다.")
+    else:
+        # 1. 요약
+        summary = fleet_summary(events)
+        cols = st.columns(6)
+        cols[0].metric("요청 수", summary['requests'])
+        cols[1].metric("p50", f"{(summary['p50_ms'] or 0) / 1000:.1f}초")
+        cols[2].metric("p95", f"{(summary['p95_ms'] or 0) / 1000:.1f}초")
+        cols[3].metric("요청당 Gemini 호출", summary['gemini_calls_per_query'] or 0)
+        cols[4].metric("요청당 토큰", f"{summary['tokens_per_query'] or 0:,.0f}")
+        cols[5].metric("요청당 Supabase 왕복", summary['supabase_calls_per_query'] or 0)
+        st.caption(f"이벤트 에러율 {summary['error_rate']:.1%} · 배치 호출은 요청 수로 나눠서 계산")
+
+        # 2. 시간 구간별 추이
+        series = timeseries(events, freq)
+        st.markdown("### ⏱️ 시간대별 추이")
+        chart_cols = st.columns(3)
+        with chart_cols[0]:
+            st.caption("요청 수")
+            st.bar_chart(series['requests'])
+        with chart_cols[1]:
+            st.caption("요청 p95 (ms)")
+            st.line_chart(series['p95_ms'])
+        with chart_cols[2]:
+            st.caption("에러율")
+            st.line_chart(series['error_rate'])
+
+        # 3. 단계별 / 페이지별 지연 시간
+        st.markdown("### 🧩 단계별 지연 시간")
+        st.dataframe(latency_percentiles(events), use_container_width=True, hide_index=True)
+
+        st.markdown("### 📄 페이지별 지연 시간")
+        st.dataframe(
+            latency_percentiles(events[events['stage'] != 'total'], by=('page', 'stage')),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # 4. 요청별 비용
+        st.markdown("### 💸 요청별 호출 수")
+        costs = request_costs(events)
+        if not costs.empty:
+            st.dataframe(
+                costs.groupby('page')[['total_ms', 'gemini_calls', 'tokens', 'supabase_calls', 'errors']].mean().round(1),
+                use_container_width=True
+            )
+            with st.expander("최근 요청 목록", expanded=False):
+                st.dataframe(costs.head(100), use_container_width=True, hide_index=True)
+
+        # 5. 캐시 적중률
+        caches = cache_hit_ratios(events)
+        if not caches.empty:
+            st.markdown("### 🗃️ 캐시 적중률")
+            st.dataframe(caches, use_container_width=True, hide_index=True)
+
+    # 6. 모델 상태 (캐시된 짧은 요청, 사용 가능한 모델 목록 대신)
+    st.markdown("---")
+    st.markdown("### 🩺 모델 상태")
+    if st.button("🔄 다시 확인"):
+        probe_model_health.clear()
+    with st.spinner("모델 상태 확인 중..."):
+        health = probe_model_health()
+    st.dataframe(pd.DataFrame(health), use_container_width=True, hide_index=True)
+    st.caption(f"결과는 {MODEL_HEALTH_TTL_SECONDS}초 동안 캐시됩니다. (다시 확인을 누르면 바로 재확인)")
+
 # 메인 페이지
 else:
     # 사이드바
@@ -1515,8 +1627,74 @@ else:
             **검색 방식**: {RERANK_METHOD.upper()}  
             **1차 검색**: {INITIAL_SEARCH_COUNT}개
             **최종 선택**: {FINAL_SEARCH_COUNT}개
+            **적응형 후보 수**: {"ON" if ADAPTIVE_CUTOFF else "OFF"}
+            **MMR 다양성 선택**: {f"ON (λ={MMR_LAMBDA})" if MMR_ENABLED else "OFF"}
             """)
 
+            # 작업별 모델 (secrets의 MODEL_ROUTES로 변경)
+            st.caption("모델 라우팅: " + " · ".join(
+                f"{route['task']}={route['model']}" for route in get_model_router().table()
+            ))
+
+            # Gemini 제한기 상태 (대기열이 길면 할당량 한계에 가까움)
+            limiter_stats = get_gemini_limiter().stats()
+            st.caption(
+                f"Gemini 동시 요청 {limiter_stats['in_flight']}/{limiter_stats['concurrency_limit']} · "
+                f"대기 {limiter_stats['waiting']}건 · 누적 대기 {limiter_stats['total_wait_seconds']}초 · "
+                f"429 {limiter_stats['throttled']}회"
+            )
+            # 마이크로 배치 효과 (평균 배치 크기가 클수록 API 호출이 줄어듦)
+            for kind, batcher in get_micro_batchers().items():
+                batch_stats = batcher.stats()
+                st.caption(
+                    f"{kind} 배치 {batch_stats['batches']}회 · 요청 {batch_stats['submitted']}건 · "
+                    f"평균 {batch_stats['avg_batch']}건/배치"
+                )
+            # 헤징 상태 (헤지 요청 수 / 헤지가 먼저 끝난 수)
+            hedger = get_llm_gateway().hedger
+            if hedger is not None:
+                hedge_stats = hedger.stats()
+                st.caption(
+                    f"헤지 {hedge_stats['hedged']}/{hedge_stats['calls']}건 · "
+                    f"헤지 승 {hedge_stats['hedge_wins']}건 · 예산 초과 {hedge_stats['budget_denied']}건"
+                )
+            # 서킷 브레이커 상태 (차단 중이면 재랭킹은 벡터 순위로 대체)
+            for breaker in get_gemini_breakers().values():
+                breaker_stats = breaker.stats()
+                if breaker_stats['state'] != "closed":
+                    st.caption(f"⚠️ {breaker_stats['name']} 일시 차단 중 (연속 실패 {breaker_stats['failures']}회)")
+
+        # 저장 작업 진행률 (백그라운드 저장, 3초마다 자동 새로고침)
+        @st.fragment(run_every=3)
+        def render_ingest_jobs():
+            jobs = get_ingest_queue().list_jobs(limit=5)
+            if not jobs:
+                st.caption("진행 중인 저장 작업이 없습니다.")
+                return
+
+            if 'seen_done_jobs' not in st.session_state:
+                st.session_state.seen_done_jobs = set()
+
+            status_icons = {'pending': '⏳', 'running': '🔄', 'done': '✅', 'failed': '⚠️'}
+            for job in jobs:
+                total = max(job['total_rows'], 1)
+                processed = job['rows_done'] + job['rows_failed']
+                st.progress(
+                    min(processed / total, 1.0),
+                    text=f"{status_icons.get(job['status'], '')} {job['kind']} "
+                         f"{job['rows_done']}/{job['total_rows']}개"
+                         + (f" (빈 행 제외 {job['rows_skipped']}개)" if job.get('rows_skipped') else "")
+                         + (f" (실패 {job['rows_failed']}개)" if job['rows_failed'] else "")
+                )
+
+                # 완료된 작업이 있으면 다음 실행 때 카운트 재조회
+                if job['status'] in ('done', 'failed') and job['id'] not in st.session_state.seen_done_jobs:
+                    st.session_state.seen_done_jobs.add(job['id'])
+                    st.session_state.force_reload_tc_count = True
+
+        with st.expander("📦 저장 작업", expanded=False):
+            render_ingest_jobs()
+
         st.markdown("---")
         
         # 탭으로 구분
@@ -1613,72 +1791,29 @@ else:
                         # 그룹 ID 생성
                         group_id = f"table_group_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-                        # 표 데이터 준비
-                        table_data = []
-                        for index, row in edited_df.iterrows():
-                            if pd.isna(row['CATEGORY']) or row['CATEGORY'] == '' or pd.isna(row['DEPTH 1']) or row['DEPTH 1'] == '':
-                                continue
-            
-                            table_data.append({
-                                'NO': str(row['NO']) if row['NO'] and str(row['NO']).strip() else '',
-                                'CATEGORY': str(row['CATEGORY']),
-                                'DEPTH 1': str(row['DEPTH 1']),
-                                'DEPTH 2': str(row.get('DEPTH 2', '')),
-                                'DEPTH 3': str(row.get('DEPTH 3', '')),
-                                'PRE-CONDITION': str(row.get('PRE-CONDITION', '')),
-                                'STEP': str(row.get('STEP', '')),
-                                'EXPECT RESULT': str(row.get('EXPECT RESULT', ''))
-                            })
+                        # 표 데이터 준비 (CATEGORY, DEPTH 1 없는 행 제외)
+                        table_data = table_to_rows(edited_df)
         
                         if table_data:
-                            # Supabase에 저장 (개별 케이스로 쪼갬!)
-                            group_test = {
-                                "group_id": group_id,
-                                "input_type": "table_group",
-                                "category": "입력 그룹",
-                                "name": f"({len(table_data)}개)",
-                                "table_data": table_data
-                            }
-            
-                            with st.spinner(f"{len(table_data)}개 케이스 저장 중..."):
-                                saved_count = save_test_case_to_supabase(group_test)
-            
-                            if saved_count > 0:
-                                # 1. 캐시 클리어
-                                st.cache_data.clear()
-
-                                # 2. DB 반영 대기 (선택사항)
-                                import time
-                                time.sleep(0.5)
-                                
-                                # 3. 저장 직후 카운트 업데이트
-                                supabase = get_supabase_client()
-                                if supabase:
-                                    try:
-                                        result = supabase.table(TABLE_NAME).select('id', count='exact').execute()
-                                        new_count = result.count  # count 사용
-
-                                        # 플래그 설정 (rerun 후 초기화 트리거)
-                                        st.session_state.force_reload_tc_count = True
-                                        st.session_state.tc_count = new_count
-                                    except Exception as e:
-                                        st.error(f"카운트 업데이트 실패: {str(e)}")
+                            # 저장 작업 큐에 등록 (임베딩 + 저장은 백그라운드, 개별 케이스로 쪼갬!)
+                            # 표를 고칠 때마다 editor_key가 바뀜 → 새로 입력한 표는 같은 내용이라도 새 저장 요청
+                            saved = enqueue_table_group(
+                                table_data, group_id, "입력 그룹",
+                                nonce=f"{st.session_state.save_session_id}:{st.session_state.editor_key}"
+                            )
 
+                            if saved['duplicate_group']:
+                                st.info(
+                                    f"ℹ️ 같은 내용의 그룹이 이미 저장되어 있어 새로 저장하지 않았습니다. "
+                                    f"(그룹 {saved['duplicate_group']})"
+                                )
+                            elif saved['reused']:
+                                st.info(f"ℹ️ 같은 저장 요청이 이미 등록되어 있습니다. (작업 {saved['job_id']})")
+                            else:
                                 # 세션 초기화 (데이터프레임 리셋)
-                                st.session_state.edit_df = pd.DataFrame({
-                                    'NO': [''],
-                                    'CATEGORY': [''],
-                                    'DEPTH 1': [''],
-                                    'DEPTH 2': [''],
-                                    'DEPTH 3': [''],
-                                    'PRE-CONDITION': [''],
-                                    'STEP': [''],
-                                    'EXPECT RESULT': ['']
-                                })
-                                st.success(f"✅ {saved_count}개의 테스트 케이스가 Supabase에 저장되었습니다!")
+                                st.session_state.edit_df = empty_table()
+                                st.success(f"✅ {len(table_data)}개 케이스 저장 작업이 등록되었습니다! (작업 {saved['job_id']})")
                                 st.rerun()
-                            else:
-                                st.error("❌ 저장 실패!")
                         else:
                             st.warning("유효한 테스트 케이스가 없습니다. CATEGORY와 DEPTH 1은 필수 항목입니다.")
                 
@@ -1745,10 +1880,13 @@ else:
                             "description": st.session_state.tab1_tc_free_content,
                             "input_type": "free_form"
                         }
+                        dedup_report = {}
                         with st.spinner("저장 중..."):
-                            saved_count = save_test_case_to_supabase(free_form_test)
+                            saved_count = save_test_case_to_supabase(free_form_test, report=dedup_report)
 
-                        if saved_count > 0:
+                        if saved_count == 0 and (dedup_report.get('skip') or dedup_report.get('merge')):
+                            st.info("ℹ️ 이미 같은(또는 거의 같은) 내용의 테스트 케이스가 있어 새로 저장하지 않았습니다.")
+                        elif saved_count > 0:
                             # 1. 캐시 클리어
                             st.cache_data.clear()
 
@@ -1783,24 +1921,96 @@ else:
                 # ========== 방법 3: CSV/Excel 파일 업로드 ==========
                 st.markdown("**방법 3: CSV/Excel 파일 업로드**")
                 uploaded_file = st.file_uploader("CSV 또는 Excel 파일 선택", type=['csv', 'xlsx'], key="upload_tc")
+
+                # 대용량 파일: 표 편집기에 올리지 않고 청크 단위로 바로 저장
+                direct_import = st.checkbox(
+                    "⚡ 직접 가져오기 (대용량 파일, 표 편집 없이 바로 저장)",
+                    key="upload_tc_direct"
+                )
                 
-                if uploaded_file is not None:
+                if uploaded_file is not None and direct_import:
+                    if st.button("📥 파일 바로 저장", type="primary", key="upload_tc_direct_save"):
+                        group_id = f"file_import_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                        ingest_queue = get_ingest_queue()
+                        # 같은 업로드를 다시 누르면 이전 작업 재사용 (파일을 새로 올리면 file_id가 바뀜 → 새 작업)
+                        idempotency_key = make_idempotency_key(
+                            "file_import", st.session_state.save_session_id,
+                            getattr(uploaded_file, 'file_id', ''), uploaded_file.getvalue()
+                        )
+                        existing_job = ingest_queue.find_job(idempotency_key)
+                        if existing_job:
+                            st.info(f"ℹ️ 같은 파일의 저장 작업이 이미 등록되어 있습니다. (작업 {existing_job['id']})")
+                        else:
+                            # 키는 모든 행을 등록한 뒤 submit에서 기록 → 중간 실패한 작업이 키를 차지하지 않음
+                            job_id = ingest_queue.create_job("file_import", group_id=group_id, category="입력 그룹")
+                            progress_bar = st.progress(0.0, text="읽는 중...")
+                            read_count = 0
+                            queued_count = 0
+                            import_error = None
+                            # 그룹 단위 중복 판정용: 전체 행 해시 + 후보 조회용 첫 청크
+                            row_hashes = []
+                            probe_rows = []
+
+                            try:
+                                # 파일은 청크로 읽어서 작업에 행만 추가 → 임베딩 + 저장은 백그라운드
+                                for chunk, progress in iter_table_chunks(uploaded_file, IMPORT_CHUNK_SIZE):
+                                    read_count += len(chunk)
+                                    table_rows = normalize_chunk(chunk).to_dict('records')
+                                    ingest_queue.add_rows(job_id, table_rows)
+                                    queued_count += len(table_rows)
+                                    row_hashes.extend(table_row_hashes(table_rows, "입력 그룹"))
+                                    probe_rows = probe_rows or table_rows
+                                    progress_bar.progress(
+                                        progress if progress is not None else 0.0,
+                                        text=f"{read_count}개 행 읽음 / {queued_count}개 등록"
+                                    )
+                            except Exception as e:
+                                import_error = str(e)
+
+                            # 같은 파일을 다시 올린 경우 (세션 / 업로드와 무관하게 행 구성으로 판정)
+                            existing_group = None
+                            if import_error is None and queued_count:
+                                existing_group = find_duplicate_table_group(
+                                    probe_rows, "입력 그룹", hashes=row_hashes
+                                )
+
+                            progress_bar.empty()
+                            if import_error is not None:
+                                # 일부만 읽힌 작업은 제출하지 않음 (행 삭제 + 실패 처리 → 같은 파일로 다시 시도 가능)
+                                ingest_queue.discard(job_id, import_error)
+                                st.error(f"❌ 가져오기 실패: {import_error} (저장된 행 없음, 파일을 확인 후 다시 시도하세요)")
+                            elif queued_count == 0:
+                                ingest_queue.discard(job_id, "저장할 행 없음")
+                                st.warning("유효한 테스트 케이스가 없습니다. CATEGORY와 DEPTH 1은 필수 항목입니다.")
+                            elif existing_group:
+                                ingest_queue.discard(job_id, f"같은 그룹이 이미 있음 ({existing_group})")
+                                st.info(
+                                    f"ℹ️ 같은 내용의 그룹이 이미 저장되어 있어 새로 저장하지 않았습니다. "
+                                    f"(그룹 {existing_group})"
+                                )
+                            else:
+                                submitted_id = ingest_queue.submit(job_id, idempotency_key=idempotency_key)
+                                if submitted_id != job_id:
+                                    st.info(f"ℹ️ 같은 파일의 저장 작업이 이미 등록되어 있습니다. (작업 {submitted_id})")
+                                else:
+                                    st.success(
+                                        f"✅ {read_count}개 행 중 {queued_count}개 저장 작업 등록! (작업 {job_id}, "
+                                        f"CATEGORY, DEPTH 1 없는 행 제외)"
+                                    )
+
+                elif uploaded_file is not None:
                     try:
                         if uploaded_file.name.endswith('.csv'):
                             df = pd.read_csv(uploaded_file)
                         else:
                             df = pd.read_excel(uploaded_file)
                         
-                        required_columns = ['NO', 'CATEGORY', 'DEPTH 1', 'DEPTH 2', 'DEPTH 3', 'PRE-CONDITION', 'STEP', 'EXPECT RESULT']
-                        
-                        if not all(col in df.columns for col in required_columns):
+                        if not all(col in df.columns for col in TABLE_COLUMNS):
                             st.warning("컬럼명이 일치하지 않습니다. 데이터를 확인해주세요.")
                             st.dataframe(df.head())
                         else:
-                            # st.session_state.edit_df = df[required_columns].fillna('')
-                            
-                            # 모든 컬럼을 문자열로 변환 후 빈 값 처리
-                            st.session_state.edit_df = df[required_columns].astype(str).replace('nan', '').replace('None', '')
+                            # 모든 컬럼을 문자열로 변환 후 빈 값 처리 (편집할 수 있도록 빈 행도 유지)
+                            st.session_state.edit_df = clean_table(df, drop_incomplete=False)
                             st.success(f"✅ {len(df)}개 행이 로드되었습니다!")
                             st.info("👆 방법 1 로 올라가 '💾 표 형식 저장' 버튼을 눌러주세요!")
                             
@@ -1869,18 +2079,14 @@ else:
         with tab1:
             st.markdown("---")
             with st.expander("🔧 개발자 도구", expanded=False):
-                if st.button("🔍 사용 가능한 Gemini 모델 확인"):
-                    try:
-                        api_key = os.environ.get("GOOGLE_API_KEY")
-                        genai.configure(api_key=api_key)
-                
-                        models = genai.list_models()
-                        st.write("### 사용 가능한 모델 목록:")
-                        for model in models:
-                            if 'generateContent' in model.supported_generation_methods:
-                                st.write(f"✅ {model.name}")
-                    except Exception as e:
-                        st.error(f"오류: {str(e)}")
+                # 모델 상태(지연 시간 포함)는 지표 페이지에서 캐시된 결과로 확인
+                st.markdown(
+                    '<a href="?page=metrics" target="_blank" style="text-decoration: none;">'
+                    '<button style="width: 100%; padding: 10px; background-color: #f0f2f6; border: 1px solid #d0d0d0; border-radius: 5px; cursor: pointer;">'
+                    '📈 지표 대시보드 / 모델 상태 (새 탭) →'
+                    '</button></a>',
+                    unsafe_allow_html=True
+                )
         
         # ============================================
         # 📚 탭 2: 기획 문서 추가
@@ -1977,7 +2183,12 @@ else:
                             # 초기화 플래그 설정 후 rerun
                             st.session_state.tab2_spec_reset_flag = True
             
-                            st.success(f"✅ 기획 문서가 Supabase에 저장되었습니다!")
+                            save_messages = {
+                                "inserted": "✅ 기획 문서가 Supabase에 저장되었습니다!",
+                                "updated": "✅ 기존 기획 문서를 새 내용으로 갱신했습니다!",
+                                "unchanged": "✅ 내용이 같은 기획 문서가 이미 저장되어 있습니다."
+                            }
+                            st.success(save_messages.get(success, save_messages["inserted"]))
                             st.rerun()
 
                         else:
@@ -0,0 +1,170 @@
+"""
+Gemini 호출 공유 제한기 (프로세스 전체에서 1개)
+- 토큰 버킷 2개: 분당 요청 수(RPM), 분당 토큰 수(TPM)
+- AIMD 동시 요청 한도: 성공하면 조금씩 늘리고(+1/한도), 429/RESOURCE_EXHAUSTED면 절반으로 줄임
+- 429 직후에는 잠깐 모든 요청을 멈춤(쿨다운) → 에러 폭주 없이 할당량 근처에서 처리
+- 대기 중 요청 수 / 누적 대기 시간 / 429 횟수는 stats()로 조회
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+THROTTLE_ERROR_NAMES = ('ResourceExhausted', 'TooManyRequests')
+THROTTLE_MESSAGES = ('429', 'RESOURCE_EXHAUSTED', 'Resource has been exhausted', 'quota')
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """할당량 초과(429) 에러인지 확인"""
+    if type(error).__name__ in THROTTLE_ERROR_NAMES:
+        return True
+    message = str(error)
+    return any(text in message for text in THROTTLE_MESSAGES)
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (한글이 많아 글자 3개당 1토큰 정도로 계산)"""
+    return max(1, len(text or "") // 3)
+
+
+class TokenBucket:
+    """
+    분당 rate_per_minute개가 채워지는 버킷 (burst_seconds 분량까지 몰아서 사용 가능)
+
+    잠금은 호출 측(GeminiLimiter)이 담당
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds=10):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """amount만큼 꺼내려면 기다려야 하는 시간 (초)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class GeminiLimiter:
+    """
+    RPM/TPM 토큰 버킷 + AIMD 동시 요청 한도
+
+    Args:
+        rpm: 분당 최대 요청 수
+        tpm: 분당 최대 토큰 수
+        max_concurrency: 동시 요청 한도 상한 (시작값)
+        min_concurrency: 429가 계속돼도 유지할 최소 한도
+        decrease_factor: 429 시 한도에 곱할 값
+        cooldown_seconds: 429 직후 모든 요청을 멈추는 시간
+    """
+
+    def __init__(self, rpm=300, tpm=1_000_000, max_concurrency=8, min_concurrency=1,
+                 decrease_factor=0.5, cooldown_seconds=2.0):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+
+        self.waiting = 0
+        self.total_requests = 0
+        self.total_waited = 0
+        self.total_wait_seconds = 0.0
+        self.throttled = 0
+
+        self._cond = threading.Condition()
+
+    # ========================================
+    # 획득 / 반환
+    # ========================================
+    def acquire(self, tokens=1):
+        """요청 1개 + 토큰 tokens개를 쓸 수 있을 때까지 대기"""
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = max(
+                        self.cooldown_until - now,
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(tokens)
+                    )
+                    if wait <= 0 and self.in_flight < int(self.concurrency_limit):
+                        break
+                    waited = True
+                    # 동시 요청 한도로 막힌 경우는 release()의 notify로 깨어남
+                    self._cond.wait(wait if wait > 0 else 1.0)
+
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                self.in_flight += 1
+                self.total_requests += 1
+                if waited:
+                    self.total_waited += 1
+                    self.total_wait_seconds += time.monotonic() - started
+            finally:
+                self.waiting -= 1
+
+    def release(self, throttled=False, succeeded=True):
+        """호출 종료 (429면 한도 감소 + 쿨다운, 성공이면 한도 증가, 그 외 실패는 유지)"""
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.concurrency_limit = max(
+                    float(self.min_concurrency), self.concurrency_limit * self.decrease_factor
+                )
+                self.cooldown_until = time.monotonic() + self.cooldown_seconds
+            elif succeeded:
+                self.concurrency_limit = min(
+                    float(self.max_concurrency), self.concurrency_limit + 1.0 / self.concurrency_limit
+                )
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens=1):
+        """with limiter.slot(tokens): API 호출"""
+        self.acquire(tokens)
+        throttled, succeeded = False, False
+        try:
+            yield
+            succeeded = True
+        except Exception as e:
+            throttled = is_throttle_error(e)
+            raise
+        finally:
+            self.release(throttled=throttled, succeeded=succeeded)
+
+    # ========================================
+    # 조회
+    # ========================================
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'concurrency_limit': int(self.concurrency_limit),
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'total_requests': self.total_requests,
+                'total_waited': self.total_waited,
+                'total_wait_seconds': round(self.total_wait_seconds, 2),
+                'throttled': self.throttled,
+            }
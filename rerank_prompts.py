@@ -0,0 +1,72 @@
+"""
+LLM 재랭킹 프롬프트 (관련성 0~10점)
+- 후보 → 평가용 텍스트, (질문, 후보) 목록 → 배치 프롬프트, 응답 → 점수 리스트
+- 마이크로 배치 / 모델 라우팅 벤치마크 공용 (streamlit 없이 사용 가능)
+"""
+
+import re
+
+
+def relevance_doc_text(candidate: dict) -> str:
+    """후보 → 관련성 평가용 텍스트 (최대 500자 정도)"""
+    description = candidate.get('description', '')
+    name = candidate.get('name', '')
+    category = candidate.get('category', '')
+
+    # 데이터에서 추가 정보 추출
+    data = candidate.get('data', {})
+    if isinstance(data, dict):
+        content = data.get('content', '')
+        step = data.get('step', '')
+        pre_condition = data.get('pre_condition', '')
+    else:
+        content = ''
+        step = ''
+        pre_condition = ''
+
+    return f"""
+카테고리: {category}
+제목: {name}
+설명: {description[:200]}
+사전조건: {pre_condition[:100]}
+테스트 단계: {step[:100]}
+추가내용: {content[:100]}
+    """.strip()
+
+
+def build_relevance_prompt(items: list) -> str:
+    """
+    (질문, 후보 텍스트) 목록 → 한 번에 점수를 매기는 프롬프트
+
+    마이크로 배치로 다른 세션의 요청과 섞일 수 있으므로 항목마다 질문을 같이 넣음
+    """
+    blocks = "\n\n".join(
+        f"[항목 {idx}]\n질문: {query}\n테스트 케이스:\n{doc_text}"
+        for idx, (query, doc_text) in enumerate(items, 1)
+    )
+    return f"""
+당신은 테스트 케이스 관련성 평가 전문가입니다.
+
+아래 {len(items)}개 항목 각각에 대해, 테스트 케이스가 그 항목의 질문과 얼마나 관련이 있는지 0~10점으로 평가하세요.
+항목마다 질문이 다를 수 있으니 각 항목은 자기 질문으로만 평가하세요.
+
+평가 기준:
+- 10점: 질문에 직접적으로 답변할 수 있는 완벽한 케이스
+- 7~9점: 질문과 매우 관련 있는 케이스
+- 4~6점: 질문과 부분적으로 관련 있는 케이스
+- 1~3점: 질문과 약간 관련 있는 케이스
+- 0점: 전혀 관련 없는 케이스
+
+{blocks}
+
+**반드시 항목 순서대로 점수만 담은 JSON 배열로 출력하세요.** (예: [8, 3, 10])
+"""
+
+
+def parse_relevance_scores(text: str, count: int) -> list:
+    """응답 → 0~10 점수 리스트 (개수가 다르면 ValueError → 호출 측이 벡터 유사도로 대체)"""
+    match = re.search(r'\[[\d\s.,]*\]', text)
+    numbers = re.findall(r'\d+\.?\d*', match.group(0) if match else text)
+    if len(numbers) != count:
+        raise ValueError(f"관련성 점수 {count}개 중 {len(numbers)}개만 응답")
+    return [max(0.0, min(10.0, float(n))) for n in numbers]
@@ -0,0 +1,211 @@
+"""
+요청 마감 시간(deadline) / 재시도 / 서킷 브레이커
+- deadline: 페이지 요청 시작 시 설정 → 검색, 재랭킹, 생성까지 같은 마감 시간을 공유
+  (contextvars 사용 → 세션(스크립트 실행)마다 독립, 백그라운드 워커는 마감 없음)
+- retry_call: 지수 백오프 + 지터, 마감 시간을 넘겨서 기다리지 않음
+- CircuitBreaker: 연속 실패가 쌓이면 일정 시간 즉시 실패 → 호출 측이 대체 경로(벡터 순위 등)로 전환
+"""
+
+import contextvars
+import random
+import threading
+import time
+
+
+# 일시적 장애로 보고 재시도할 에러 (google.api_core / httpx 예외 이름, 메시지)
+TRANSIENT_ERROR_NAMES = (
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'InternalServerError',
+    'DeadlineExceeded', 'GatewayTimeout', 'TimeoutError', 'ReadTimeout', 'ConnectTimeout',
+    'ConnectError', 'RemoteProtocolError',
+)
+TRANSIENT_MESSAGES = ('429', '500', '502', '503', '504', 'timed out', 'timeout', 'RESOURCE_EXHAUSTED', 'UNAVAILABLE')
+
+
+def is_transient_error(error: Exception) -> bool:
+    """재시도하면 성공할 수 있는 에러인지 (타임아웃, 429, 5xx, 연결 끊김)"""
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    message = str(error)
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+
+class DeadlineExceeded(Exception):
+    """요청 마감 시간 초과"""
+
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 호출하지 않음"""
+
+
+# ========================================
+# 마감 시간
+# ========================================
+class Deadline:
+    """지금부터 seconds초 뒤가 마감인 요청 예산"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """호출 1건의 타임아웃 = min(기본값, 남은 시간)"""
+        return min(default, self.remaining())
+
+
+_current_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+def set_deadline(seconds: float) -> Deadline:
+    """현재 요청(스크립트 실행)의 마감 시간 설정"""
+    deadline = Deadline(seconds)
+    _current_deadline.set(deadline)
+    return deadline
+
+
+def clear_deadline():
+    _current_deadline.set(None)
+
+
+def current_deadline():
+    """현재 요청의 마감 시간 (없으면 None)"""
+    return _current_deadline.get()
+
+
+def remaining_time(default=None):
+    """남은 시간 (마감이 없으면 default)"""
+    deadline = current_deadline()
+    return deadline.remaining() if deadline else default
+
+
+def check_deadline(stage=""):
+    """마감 시간이 지났으면 DeadlineExceeded"""
+    deadline = current_deadline()
+    if deadline and deadline.expired():
+        raise DeadlineExceeded(f"요청 시간 {deadline.seconds}초 초과 {stage}".strip())
+
+
+# ========================================
+# 재시도
+# ========================================
+def retry_call(fn, retries=2, base_delay=0.5, max_delay=8.0, retry_on=None):
+    """
+    fn() 호출, 실패 시 지터를 넣은 지수 백오프로 재시도
+
+    Args:
+        retries: 최대 재시도 횟수
+        retry_on: 예외 → 재시도 여부 (None이면 모든 예외 재시도)
+
+    마감 시간이 설정돼 있으면 남은 시간보다 오래 기다리지 않고 마지막 에러를 올림
+    """
+    for attempt in range(retries + 1):
+        check_deadline()
+        try:
+            return fn()
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except Exception as e:
+            if attempt == retries or (retry_on and not retry_on(e)):
+                raise
+            # full jitter: 0 ~ min(max_delay, base * 2^attempt)
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                raise
+            time.sleep(delay)
+
+
+# ========================================
+# 서킷 브레이커
+# ========================================
+class CircuitBreaker:
+    """
+    closed → (연속 실패 failure_threshold회) → open → (reset_seconds 후) → half_open
+    half_open에서 시험 호출 1건 성공 → closed, 실패 → 다시 open
+
+    Args:
+        name: 이름 (상태 표시용)
+        failure_threshold: open으로 바꿀 연속 실패 수
+        reset_seconds: open 유지 시간
+    """
+
+    def __init__(self, name: str, failure_threshold=5, reset_seconds=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.total_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """지금 호출해도 되는지 (half_open에서는 1건만 허용)"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    return False
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open":
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def is_open(self) -> bool:
+        """호출해도 바로 실패할 상태인지 (상태는 바꾸지 않음)"""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self.opened_at < self.reset_seconds
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.total_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def call(self, fn, is_failure=is_transient_error):
+        """
+        브레이커를 통과해서 fn() 호출 (open이면 CircuitOpenError)
+
+        is_failure(e)가 False인 에러(잘못된 요청 등)는 서비스가 응답한 것으로 보고 실패로 세지 않음
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} 일시 차단 중 (연속 실패 {self.failures}회)")
+        try:
+            result = fn()
+        except DeadlineExceeded:
+            # 요청 예산이 끝난 것 → 서비스 상태와 무관
+            with self._lock:
+                self._trial_in_flight = False
+            raise
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'name': self.name, 'state': self.state, 'failures': self.failures,
+                    'total_opened': self.total_opened}
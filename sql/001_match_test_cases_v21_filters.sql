@@ -0,0 +1,59 @@
+-- =====================================================================
+-- match_test_cases_v21: 필터 푸시다운 버전
+-- - category / data.input_type / data.group_id / created_at 범위 필터를 RPC 안에서 적용
+-- - match_count는 필터링 "후" 개수 기준
+-- - 필터 파라미터는 모두 default null → 기존 호출(3개 파라미터)과 호환
+-- Supabase SQL Editor에서 실행
+-- =====================================================================
+
+-- 시그니처가 바뀌므로 기존 함수 삭제 (오버로드 충돌 방지)
+drop function if exists match_test_cases_v21(vector, int, float);
+
+create or replace function match_test_cases_v21(
+    query_embedding vector(768),
+    match_count int default 30,
+    similarity_threshold float default 0.3,
+    filter_category text default null,
+    filter_input_type text default null,
+    filter_group_id text default null,
+    filter_created_from timestamptz default null,
+    filter_created_to timestamptz default null
+)
+returns table (
+    id bigint,
+    category text,
+    name text,
+    link text,
+    description text,
+    data jsonb,
+    created_at timestamptz,
+    similarity float
+)
+language sql stable
+as $$
+    select
+        t.id,
+        t.category,
+        t.name,
+        t.link,
+        t.description,
+        t.data,
+        t.created_at,
+        1 - (t.embedding <=> query_embedding) as similarity
+    from test_cases_v21 t
+    where t.embedding is not null
+      and 1 - (t.embedding <=> query_embedding) >= similarity_threshold
+      and (filter_category is null or t.category = filter_category)
+      and (filter_input_type is null or t.data->>'input_type' = filter_input_type)
+      and (filter_group_id is null or t.data->>'group_id' = filter_group_id)
+      and (filter_created_from is null or t.created_at >= filter_created_from)
+      and (filter_created_to is null or t.created_at < filter_created_to)
+    order by t.embedding <=> query_embedding
+    limit match_count;
+$$;
+
+-- 필터 컬럼 인덱스
+create index if not exists test_cases_v21_category_idx on test_cases_v21 (category);
+create index if not exists test_cases_v21_input_type_idx on test_cases_v21 ((data->>'input_type'));
+create index if not exists test_cases_v21_group_id_idx on test_cases_v21 ((data->>'group_id'));
+create index if not exists test_cases_v21_created_at_idx on test_cases_v21 (created_at);
@@ -0,0 +1,53 @@
+-- =====================================================================
+-- match_test_cases_v21: 후보 임베딩 반환 옵션 (MMR 다양성 선택용)
+-- - include_embedding = true 일 때만 embedding 컬럼을 채움 (기본은 null → 응답 크기 그대로)
+-- - 001_match_test_cases_v21_filters.sql 이후 실행
+-- =====================================================================
+
+drop function if exists match_test_cases_v21(vector, int, float, text, text, text, timestamptz, timestamptz);
+
+create or replace function match_test_cases_v21(
+    query_embedding vector(768),
+    match_count int default 30,
+    similarity_threshold float default 0.3,
+    filter_category text default null,
+    filter_input_type text default null,
+    filter_group_id text default null,
+    filter_created_from timestamptz default null,
+    filter_created_to timestamptz default null,
+    include_embedding boolean default false
+)
+returns table (
+    id bigint,
+    category text,
+    name text,
+    link text,
+    description text,
+    data jsonb,
+    created_at timestamptz,
+    similarity float,
+    embedding vector(768)
+)
+language sql stable
+as $$
+    select
+        t.id,
+        t.category,
+        t.name,
+        t.link,
+        t.description,
+        t.data,
+        t.created_at,
+        1 - (t.embedding <=> query_embedding) as similarity,
+        case when include_embedding then t.embedding end as embedding
+    from test_cases_v21 t
+    where t.embedding is not null
+      and 1 - (t.embedding <=> query_embedding) >= similarity_threshold
+      and (filter_category is null or t.category = filter_category)
+      and (filter_input_type is null or t.data->>'input_type' = filter_input_type)
+      and (filter_group_id is null or t.data->>'group_id' = filter_group_id)
+      and (filter_created_from is null or t.created_at >= filter_created_from)
+      and (filter_created_to is null or t.created_at < filter_created_to)
+    order by t.embedding <=> query_embedding
+    limit match_count;
+$$;
@@ -0,0 +1,41 @@
+-- =====================================================================
+-- 임베딩 재생성 큐 (embedding_queue.py)
+-- - content_hash: 임베딩 대상 텍스트의 sha256
+-- - embedding_stale: true면 워커가 다시 임베딩해야 하는 행
+-- - apply_embeddings: 워커가 계산한 벡터를 한 번에 반영
+--   (임베딩 도중 다시 수정되어 content_hash가 달라진 행은 건너뜀)
+-- =====================================================================
+
+alter table test_cases_v21 add column if not exists content_hash text;
+alter table test_cases_v21 add column if not exists embedding_stale boolean not null default false;
+alter table spec_docs_v21 add column if not exists content_hash text;
+alter table spec_docs_v21 add column if not exists embedding_stale boolean not null default false;
+
+create index if not exists test_cases_v21_embedding_stale_idx on test_cases_v21 (id) where embedding_stale;
+create index if not exists spec_docs_v21_embedding_stale_idx on spec_docs_v21 (id) where embedding_stale;
+
+create or replace function apply_embeddings(target_table text, payload jsonb)
+returns int
+language plpgsql
+as $$
+declare
+    updated_count int;
+begin
+    if target_table not in ('test_cases_v21', 'spec_docs_v21') then
+        raise exception 'unsupported table: %', target_table;
+    end if;
+
+    execute format(
+        'update %I t
+            set embedding = (p->>''embedding'')::vector,
+                embedding_stale = false
+           from jsonb_array_elements($1) p
+          where t.id = (p->>''id'')::bigint
+            and t.content_hash = p->>''content_hash''',
+        target_table
+    ) using payload;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
@@ -0,0 +1,54 @@
+-- =====================================================================
+-- 표 그룹 수정 (변경분만 반영, 단일 트랜잭션)
+-- - p_updates: [{id, name, description, data, content_hash?, embedding?, embedding_stale?}]
+-- - p_inserts: [{category, name, link, description, data, content_hash, embedding?, embedding_stale?}]
+-- - p_delete_ids: 삭제할 id 배열
+-- 함수 전체가 하나의 트랜잭션 → 중간 실패 시 전부 롤백
+-- =====================================================================
+
+create or replace function apply_test_case_group_edit(
+    p_updates jsonb default '[]'::jsonb,
+    p_inserts jsonb default '[]'::jsonb,
+    p_delete_ids bigint[] default '{}'
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    updated_count int;
+    inserted_count int;
+    deleted_count int;
+begin
+    update test_cases_v21 t
+       set name = u->>'name',
+           description = u->>'description',
+           data = u->'data',
+           content_hash = coalesce(u->>'content_hash', t.content_hash),
+           embedding = case when u ? 'embedding' then (u->>'embedding')::vector else t.embedding end,
+           embedding_stale = coalesce((u->>'embedding_stale')::boolean, t.embedding_stale)
+      from jsonb_array_elements(p_updates) u
+     where t.id = (u->>'id')::bigint;
+    get diagnostics updated_count = row_count;
+
+    insert into test_cases_v21 (category, name, link, description, data, content_hash, embedding, embedding_stale)
+    select i->>'category',
+           i->>'name',
+           coalesce(i->>'link', ''),
+           i->>'description',
+           i->'data',
+           i->>'content_hash',
+           (i->>'embedding')::vector,
+           coalesce((i->>'embedding_stale')::boolean, false)
+      from jsonb_array_elements(p_inserts) i;
+    get diagnostics inserted_count = row_count;
+
+    delete from test_cases_v21 where id = any(p_delete_ids);
+    get diagnostics deleted_count = row_count;
+
+    return jsonb_build_object(
+        'updated', updated_count,
+        'inserted', inserted_count,
+        'deleted', deleted_count
+    );
+end;
+$$;
@@ -0,0 +1,197 @@
+-- =====================================================================
+-- 임베딩 모델 교체 마이그레이션 (migrate_embeddings.py)
+-- 1. prepare_embedding_migration(dim): 그림자 컬럼 embedding_next + 내용 변경 시 초기화 트리거
+-- 2. apply_shadow_embeddings: 백필 결과를 embedding_next에 일괄 반영
+-- 3. switch_embedding_model: 백필 완료 확인 후 컬럼 교체 + embedding_config 갱신 (단일 트랜잭션)
+-- match RPC는 차원 없는 vector 파라미터로 재정의 → 차원이 바뀌어도 그대로 사용
+-- =====================================================================
+
+-- 앱이 사용하는 임베딩 모델 (supabase_helpers.get_active_embedding_model)
+create table if not exists embedding_config (
+    id int primary key default 1 check (id = 1),
+    model text not null,
+    dim int not null,
+    updated_at timestamptz not null default now()
+);
+insert into embedding_config (model, dim) values ('models/text-embedding-004', 768)
+on conflict (id) do nothing;
+
+
+-- 내용(content_hash)이 바뀐 행은 그림자 벡터를 다시 만들어야 함
+create or replace function clear_embedding_next()
+returns trigger
+language plpgsql
+as $$
+begin
+    if old.content_hash is not null and new.content_hash is distinct from old.content_hash then
+        new.embedding_next := null;
+    end if;
+    return new;
+end;
+$$;
+
+
+create or replace function prepare_embedding_migration(new_dim int)
+returns void
+language plpgsql
+as $$
+declare
+    tbl text;
+begin
+    foreach tbl in array array['test_cases_v21', 'spec_docs_v21'] loop
+        execute format('alter table %I add column if not exists embedding_next vector(%s)', tbl, new_dim);
+        execute format('drop trigger if exists %I on %I', tbl || '_clear_embedding_next', tbl);
+        execute format(
+            'create trigger %I before update of content_hash on %I '
+            'for each row execute function clear_embedding_next()',
+            tbl || '_clear_embedding_next', tbl
+        );
+    end loop;
+end;
+$$;
+
+
+create or replace function apply_shadow_embeddings(target_table text, payload jsonb)
+returns int
+language plpgsql
+as $$
+declare
+    updated_count int;
+begin
+    if target_table not in ('test_cases_v21', 'spec_docs_v21') then
+        raise exception 'unsupported table: %', target_table;
+    end if;
+
+    -- content_hash가 없는 예전 행은 이번에 계산한 해시를 같이 기록
+    execute format(
+        'update %I t
+            set embedding_next = (p->>''embedding'')::vector,
+                content_hash = coalesce(t.content_hash, p->>''content_hash'')
+           from jsonb_array_elements($1) p
+          where t.id = (p->>''id'')::bigint
+            and (t.content_hash is null or t.content_hash = p->>''content_hash'')',
+        target_table
+    ) using payload;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
+
+
+create or replace function switch_embedding_model(new_model text, new_dim int)
+returns void
+language plpgsql
+as $$
+declare
+    tbl text;
+    missing boolean;
+begin
+    foreach tbl in array array['test_cases_v21', 'spec_docs_v21'] loop
+        execute format(
+            'select exists (select 1 from %I where embedding is not null and embedding_next is null)', tbl
+        ) into missing;
+        if missing then
+            raise exception 'backfill incomplete: %', tbl;
+        end if;
+    end loop;
+
+    lock table test_cases_v21, spec_docs_v21 in access exclusive mode;
+
+    foreach tbl in array array['test_cases_v21', 'spec_docs_v21'] loop
+        execute format('drop trigger if exists %I on %I', tbl || '_clear_embedding_next', tbl);
+        execute format('alter table %I drop column if exists embedding_prev', tbl);
+        execute format('alter table %I rename column embedding to embedding_prev', tbl);
+        execute format('alter table %I rename column embedding_next to embedding', tbl);
+        execute format(
+            'create index if not exists %I on %I using hnsw (embedding vector_cosine_ops)',
+            tbl || '_embedding_' || new_dim || '_idx', tbl
+        );
+    end loop;
+
+    update embedding_config set model = new_model, dim = new_dim, updated_at = now() where id = 1;
+end;
+$$;
+
+
+-- ---------------------------------------------------------------------
+-- match RPC: 차원 없는 vector로 재정의
+-- ---------------------------------------------------------------------
+drop function if exists match_test_cases_v21(vector, int, float, text, text, text, timestamptz, timestamptz, boolean);
+
+create or replace function match_test_cases_v21(
+    query_embedding vector,
+    match_count int default 30,
+    similarity_threshold float default 0.3,
+    filter_category text default null,
+    filter_input_type text default null,
+    filter_group_id text default null,
+    filter_created_from timestamptz default null,
+    filter_created_to timestamptz default null,
+    include_embedding boolean default false
+)
+returns table (
+    id bigint,
+    category text,
+    name text,
+    link text,
+    description text,
+    data jsonb,
+    created_at timestamptz,
+    similarity float,
+    embedding vector
+)
+language sql stable
+as $$
+    select
+        t.id,
+        t.category,
+        t.name,
+        t.link,
+        t.description,
+        t.data,
+        t.created_at,
+        1 - (t.embedding <=> query_embedding) as similarity,
+        case when include_embedding then t.embedding end as embedding
+    from test_cases_v21 t
+    where t.embedding is not null
+      and 1 - (t.embedding <=> query_embedding) >= similarity_threshold
+      and (filter_category is null or t.category = filter_category)
+      and (filter_input_type is null or t.data->>'input_type' = filter_input_type)
+      and (filter_group_id is null or t.data->>'group_id' = filter_group_id)
+      and (filter_created_from is null or t.created_at >= filter_created_from)
+      and (filter_created_to is null or t.created_at < filter_created_to)
+    order by t.embedding <=> query_embedding
+    limit match_count;
+$$;
+
+drop function if exists match_spec_docs_v21(vector, int, float);
+
+create or replace function match_spec_docs_v21(
+    query_embedding vector,
+    match_count int default 20,
+    similarity_threshold float default 0.3
+)
+returns table (
+    id bigint,
+    title text,
+    doc_type text,
+    link text,
+    content text,
+    similarity float
+)
+language sql stable
+as $$
+    select
+        d.id,
+        d.title,
+        d.doc_type,
+        d.link,
+        d.content,
+        1 - (d.embedding <=> query_embedding) as similarity
+    from spec_docs_v21 d
+    where d.embedding is not null
+      and 1 - (d.embedding <=> query_embedding) >= similarity_threshold
+    order by d.embedding <=> query_embedding
+    limit match_count;
+$$;
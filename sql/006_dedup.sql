@@ -0,0 +1,51 @@
+-- =====================================================================
+-- 저장 시 중복 / 유사 중복 판정 (dedup.py)
+-- - content_hash 인덱스: 정확 중복 조회 (in 조건)
+-- - nearest_test_cases: 들어온 벡터마다 가장 가까운 기존 행 1개 (HNSW 인덱스 사용)
+--   p_embeddings: [[0.1, ...], ...]  → (idx, id, similarity), p_threshold 미만은 제외
+-- - merge_test_case_duplicates: 유사 중복으로 합쳐진 출처를 기존 행 data에 기록
+--   p_merges: [{id, source}]  → data.merged_from 배열에 source 추가, merged_count 증가
+-- =====================================================================
+
+create index if not exists test_cases_v21_content_hash_idx on test_cases_v21 (content_hash);
+
+create or replace function nearest_test_cases(p_embeddings jsonb, p_threshold float default 0.9)
+returns table (idx int, id bigint, similarity float)
+language sql
+stable
+as $$
+    select (e.ord - 1)::int as idx, n.id, n.similarity
+      from jsonb_array_elements(p_embeddings) with ordinality as e(vec, ord)
+     cross join lateral (
+         select t.id, 1 - (t.embedding <=> (e.vec::text)::vector) as similarity
+           from test_cases_v21 t
+          where t.embedding is not null
+          order by t.embedding <=> (e.vec::text)::vector
+          limit 1
+     ) n
+     where n.similarity >= p_threshold;
+$$;
+
+create or replace function merge_test_case_duplicates(p_merges jsonb)
+returns int
+language plpgsql
+as $$
+declare
+    merged_count int;
+begin
+    update test_cases_v21 t
+       set data = t.data
+                  || jsonb_build_object(
+                         'merged_from', coalesce(t.data->'merged_from', '[]'::jsonb) || m.sources,
+                         'merged_count', coalesce((t.data->>'merged_count')::int, 0) + jsonb_array_length(m.sources)
+                     )
+      from (
+          select (x->>'id')::bigint as id, jsonb_agg(x->'source') as sources
+            from jsonb_array_elements(p_merges) x
+           group by 1
+      ) m
+     where t.id = m.id;
+    get diagnostics merged_count = row_count;
+    return merged_count;
+end;
+$$;
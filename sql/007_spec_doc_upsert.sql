@@ -0,0 +1,15 @@
+-- =====================================================================
+-- 기획 문서 upsert (save_spec_doc_to_supabase)
+-- - link 기준으로 기존 문서를 찾고, link가 없으면 (title, doc_type) 기준
+-- - 같은 문서 재저장 시 새 행을 만들지 않고 기존 행을 갱신
+-- =====================================================================
+
+create index if not exists spec_docs_v21_link_idx on spec_docs_v21 (link) where link <> '';
+create index if not exists spec_docs_v21_title_doc_type_idx on spec_docs_v21 (title, doc_type);
+
+-- (선택) 이미 쌓인 이전 버전 정리: 같은 link의 행 중 가장 최근(id 최대) 행만 남김
+-- delete from spec_docs_v21 s
+--  using spec_docs_v21 newer
+--  where s.link <> ''
+--    and s.link = newer.link
+--    and s.id < newer.id;
@@ -0,0 +1,113 @@
+-- =====================================================================
+-- 임베딩 재생성 큐: 실패 행 재시도 간격 (embedding_queue.py)
+-- - embed_attempts: 연속 실패 횟수 (성공하거나 내용이 바뀌면 0으로 초기화)
+-- - embed_last_error: 마지막 실패 메시지
+-- - embed_next_attempt_at: 이 시각 이후에만 다시 시도 (null = 바로 시도)
+-- - 워커는 embed_next_attempt_at 순서로 가져옴 → 계속 실패하는 행이 뒤 행을 막지 않음
+-- - record_embedding_failures: 실패 행의 시도 횟수 증가 + 지수 백오프
+-- 003_embedding_queue.sql 이후 실행
+-- =====================================================================
+
+alter table test_cases_v21 add column if not exists embed_attempts int not null default 0;
+alter table test_cases_v21 add column if not exists embed_last_error text;
+alter table test_cases_v21 add column if not exists embed_next_attempt_at timestamptz;
+alter table spec_docs_v21 add column if not exists embed_attempts int not null default 0;
+alter table spec_docs_v21 add column if not exists embed_last_error text;
+alter table spec_docs_v21 add column if not exists embed_next_attempt_at timestamptz;
+
+create index if not exists test_cases_v21_embedding_retry_idx
+    on test_cases_v21 (embed_next_attempt_at nulls first, id) where embedding_stale;
+create index if not exists spec_docs_v21_embedding_retry_idx
+    on spec_docs_v21 (embed_next_attempt_at nulls first, id) where embedding_stale;
+
+
+-- 성공 시 재시도 상태 초기화
+create or replace function apply_embeddings(target_table text, payload jsonb)
+returns int
+language plpgsql
+as $$
+declare
+    updated_count int;
+begin
+    if target_table not in ('test_cases_v21', 'spec_docs_v21') then
+        raise exception 'unsupported table: %', target_table;
+    end if;
+
+    execute format(
+        'update %I t
+            set embedding = (p->>''embedding'')::vector,
+                embedding_stale = false,
+                embed_attempts = 0,
+                embed_last_error = null,
+                embed_next_attempt_at = null
+           from jsonb_array_elements($1) p
+          where t.id = (p->>''id'')::bigint
+            and t.content_hash = p->>''content_hash''',
+        target_table
+    ) using payload;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
+
+
+-- 다음 시도 = now() + least(p_max_seconds, p_base_seconds * 2^(시도 횟수 - 1))
+create or replace function record_embedding_failures(
+    target_table text,
+    p_ids bigint[],
+    p_error text,
+    p_base_seconds int default 60,
+    p_max_seconds int default 21600
+)
+returns int
+language plpgsql
+as $$
+declare
+    updated_count int;
+begin
+    if target_table not in ('test_cases_v21', 'spec_docs_v21') then
+        raise exception 'unsupported table: %', target_table;
+    end if;
+
+    execute format(
+        'update %I
+            set embed_attempts = embed_attempts + 1,
+                embed_last_error = left($2, 1000),
+                embed_next_attempt_at = now() + make_interval(
+                    secs => least($4::float, $3::float * power(2, least(embed_attempts, 20)))
+                )
+          where id = any($1)',
+        target_table
+    ) using p_ids, p_error, p_base_seconds, p_max_seconds;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
+
+
+-- 내용(content_hash)이 바뀌면 다시 큐 맨 앞에서 시도
+create or replace function reset_embedding_attempts()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.content_hash is distinct from old.content_hash then
+        new.embed_attempts := 0;
+        new.embed_last_error := null;
+        new.embed_next_attempt_at := null;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists test_cases_v21_reset_embedding_attempts on test_cases_v21;
+create trigger test_cases_v21_reset_embedding_attempts
+    before update of content_hash on test_cases_v21
+    for each row execute function reset_embedding_attempts();
+
+drop trigger if exists spec_docs_v21_reset_embedding_attempts on spec_docs_v21;
+create trigger spec_docs_v21_reset_embedding_attempts
+    before update of content_hash on spec_docs_v21
+    for each row execute function reset_embedding_attempts();
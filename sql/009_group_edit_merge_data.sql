@@ -0,0 +1,52 @@
+-- =====================================================================
+-- 표 그룹 수정: data는 보낸 키만 덮어쓰기 (004_group_edit.sql 대체)
+-- - p_updates[].data에는 표 컬럼 8개(no, category, depth1, ...)만 들어옴
+-- - 기존 data의 다른 키(group_id, input_type, merged_from, merged_count 등)는 그대로 유지
+-- =====================================================================
+
+create or replace function apply_test_case_group_edit(
+    p_updates jsonb default '[]'::jsonb,
+    p_inserts jsonb default '[]'::jsonb,
+    p_delete_ids bigint[] default '{}'
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    updated_count int;
+    inserted_count int;
+    deleted_count int;
+begin
+    update test_cases_v21 t
+       set name = u->>'name',
+           description = u->>'description',
+           data = t.data || coalesce(u->'data', '{}'::jsonb),
+           content_hash = coalesce(u->>'content_hash', t.content_hash),
+           embedding = case when u ? 'embedding' then (u->>'embedding')::vector else t.embedding end,
+           embedding_stale = coalesce((u->>'embedding_stale')::boolean, t.embedding_stale)
+      from jsonb_array_elements(p_updates) u
+     where t.id = (u->>'id')::bigint;
+    get diagnostics updated_count = row_count;
+
+    insert into test_cases_v21 (category, name, link, description, data, content_hash, embedding, embedding_stale)
+    select i->>'category',
+           i->>'name',
+           coalesce(i->>'link', ''),
+           i->>'description',
+           i->'data',
+           i->>'content_hash',
+           (i->>'embedding')::vector,
+           coalesce((i->>'embedding_stale')::boolean, false)
+      from jsonb_array_elements(p_inserts) i;
+    get diagnostics inserted_count = row_count;
+
+    delete from test_cases_v21 where id = any(p_delete_ids);
+    get diagnostics deleted_count = row_count;
+
+    return jsonb_build_object(
+        'updated', updated_count,
+        'inserted', inserted_count,
+        'deleted', deleted_count
+    );
+end;
+$$;
@@ -0,0 +1,80 @@
+-- =====================================================================
+-- 임베딩 모델 교체: 확인 + 전환을 한 번에 (005_embedding_migration.sql 보완)
+-- - switch_embedding_model: 테이블 잠금 → 백필 완료 확인 → 컬럼 교체 순서
+--   (확인과 교체 사이에 insert / 수정이 끼어들 수 없음), 전환 시각 반환
+-- - embedding_updated_at: 벡터가 기록된 시각 (insert / embedding 변경 시 트리거가 기록)
+--   → migrate_embeddings.py switch가 전환 이후 예전 모델로 기록됐을 수 있는 행을 다시 큐에 넣을 때 사용
+--     (새로 저장된 행 + 수정 후 재임베딩된 행 모두 포함)
+-- 005_embedding_migration.sql 이후 실행
+-- =====================================================================
+
+alter table test_cases_v21 add column if not exists embedding_updated_at timestamptz;
+alter table spec_docs_v21 add column if not exists embedding_updated_at timestamptz;
+
+create index if not exists test_cases_v21_embedding_updated_at_idx on test_cases_v21 (embedding_updated_at);
+create index if not exists spec_docs_v21_embedding_updated_at_idx on spec_docs_v21 (embedding_updated_at);
+
+
+create or replace function stamp_embedding_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' or new.embedding is distinct from old.embedding then
+        new.embedding_updated_at := now();
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists test_cases_v21_stamp_embedding_updated_at on test_cases_v21;
+create trigger test_cases_v21_stamp_embedding_updated_at
+    before insert or update of embedding on test_cases_v21
+    for each row execute function stamp_embedding_updated_at();
+
+drop trigger if exists spec_docs_v21_stamp_embedding_updated_at on spec_docs_v21;
+create trigger spec_docs_v21_stamp_embedding_updated_at
+    before insert or update of embedding on spec_docs_v21
+    for each row execute function stamp_embedding_updated_at();
+
+
+-- 반환 타입이 바뀌므로 기존 함수 삭제
+drop function if exists switch_embedding_model(text, int);
+
+create or replace function switch_embedding_model(new_model text, new_dim int)
+returns timestamptz
+language plpgsql
+as $$
+declare
+    tbl text;
+    missing boolean;
+begin
+    -- 먼저 잠그고 확인 → 확인 후 전환 전까지 백필되지 않은 행이 새로 생길 수 없음
+    lock table test_cases_v21, spec_docs_v21 in access exclusive mode;
+
+    foreach tbl in array array['test_cases_v21', 'spec_docs_v21'] loop
+        execute format(
+            'select exists (select 1 from %I where embedding is not null and embedding_next is null)', tbl
+        ) into missing;
+        if missing then
+            raise exception 'backfill incomplete: %', tbl;
+        end if;
+    end loop;
+
+    foreach tbl in array array['test_cases_v21', 'spec_docs_v21'] loop
+        execute format('drop trigger if exists %I on %I', tbl || '_clear_embedding_next', tbl);
+        execute format('alter table %I drop column if exists embedding_prev', tbl);
+        execute format('alter table %I rename column embedding to embedding_prev', tbl);
+        execute format('alter table %I rename column embedding_next to embedding', tbl);
+        execute format(
+            'create index if not exists %I on %I using hnsw (embedding vector_cosine_ops)',
+            tbl || '_embedding_' || new_dim || '_idx', tbl
+        );
+    end loop;
+
+    update embedding_config set model = new_model, dim = new_dim, updated_at = now() where id = 1;
+
+    -- 이 시각 이후 embedding_updated_at이 찍힌 행 = 전환 후 기록된 벡터
+    return now();
+end;
+$$;
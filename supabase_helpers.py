@@ -5,12 +5,45 @@ Supabase 헬퍼 함수 모음 (v2.1 - 하이브리드 검색)
 """
 
 import streamlit as st
-from supabase import create_client, Client
-import google.generativeai as genai
+from supabase import create_client, Client, ClientOptions
 import json
 from datetime import datetime
 import uuid
 import numpy as np
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from ingest_jobs import IngestJobQueue, make_idempotency_key
+from table_rows import table_to_records
+from rate_limit import GeminiLimiter
+from llm_gateway import LLMGateway, GeminiProvider, StubProvider
+from micro_batch import MicroBatcher
+from hedging import Hedger
+from model_routing import ModelRouter
+from rerank_prompts import relevance_doc_text, build_relevance_prompt, parse_relevance_scores
+from timing import stage, cached_call, mark_cache_miss, configure as configure_timing
+from metrics import load_events
+from resilience import (
+    CircuitBreaker,
+    DeadlineExceeded,
+    check_deadline,
+    remaining_time,
+    retry_call,
+    is_transient_error
+)
+from dedup import (
+    KEEP, SKIP, MERGE,
+    row_hash,
+    duplicate_group,
+    exact_duplicates,
+    batch_near_duplicates,
+    existing_near_duplicate,
+    summarize
+)
+from embedding_queue import (
+    EmbeddingWorker,
+    content_hash,
+    test_case_embedding_text,
+    spec_doc_embedding_text
+)
 
 # ========================================
 # 환경 변수 로드
@@ -21,13 +54,98 @@ GOOGLE_API_KEY = st.secrets.get("GOOGLE_API_KEY")
 TABLE_NAME = st.secrets.get("TABLE_NAME", "test_cases_v21")
 SPEC_TABLE_NAME = st.secrets.get("SPEC_TABLE_NAME", "spec_docs_v21")
 
+# 임베딩 모델 (DB의 embedding_config가 있으면 그 값을 우선 사용 → 모델 교체 시 자동 전환)
+EMBEDDING_MODEL = st.secrets.get("EMBEDDING_MODEL", "models/text-embedding-004")
+EMBEDDING_DIM = st.secrets.get("EMBEDDING_DIM", 768)
+
 # 하이브리드 검색 설정
 INITIAL_SEARCH_COUNT = st.secrets.get("INITIAL_SEARCH_COUNT", 30)
 FINAL_SEARCH_COUNT = st.secrets.get("FINAL_SEARCH_COUNT", 10)
 RERANK_METHOD = st.secrets.get("RERANK_METHOD", "gemini")
 
-# Gemini 설정
-genai.configure(api_key=GOOGLE_API_KEY)
+# 적응형 후보 수 설정 (유사도 분포 기반으로 재랭킹 후보 수 조절)
+ADAPTIVE_CUTOFF = st.secrets.get("ADAPTIVE_CUTOFF", True)
+ADAPTIVE_RELATIVE_GAP = st.secrets.get("ADAPTIVE_RELATIVE_GAP", 0.15)      # 1위 대비 15% 이내만 유지
+ADAPTIVE_KNEE_MIN_STRENGTH = st.secrets.get("ADAPTIVE_KNEE_MIN_STRENGTH", 0.1)  # 무릎점 인정 최소 강도
+ADAPTIVE_FLAT_SPREAD = st.secrets.get("ADAPTIVE_FLAT_SPREAD", 0.05)        # 1위~꼴찌 차이가 이하면 "평탄"
+ADAPTIVE_MIN_CANDIDATES = st.secrets.get("ADAPTIVE_MIN_CANDIDATES", 5)
+ADAPTIVE_MAX_CANDIDATES = st.secrets.get("ADAPTIVE_MAX_CANDIDATES", 100)
+
+# 그룹 단위 검색 설정 (같은 group_id 행을 하나로 묶어서 재랭킹)
+GROUP_COLLAPSE = st.secrets.get("GROUP_COLLAPSE", True)
+GROUP_SCORE_METHOD = st.secrets.get("GROUP_SCORE_METHOD", "max")  # max: 최고 유사도, mean: 평균 유사도
+GROUP_PROMPT_MAX_ROWS = st.secrets.get("GROUP_PROMPT_MAX_ROWS", 20)      # 그룹 1개당 프롬프트에 넣을 최대 행 수
+GROUP_PROMPT_MAX_CHARS = st.secrets.get("GROUP_PROMPT_MAX_CHARS", 4000)  # 그룹 1개당 프롬프트 최대 글자 수
+
+# MMR 다양성 선택 설정 (재랭킹 전에 중복/유사 후보 제거)
+MMR_ENABLED = st.secrets.get("MMR_ENABLED", True)
+MMR_LAMBDA = st.secrets.get("MMR_LAMBDA", 0.7)                      # 1.0: 관련성만, 0.0: 다양성만
+MMR_POOL_SIZE = st.secrets.get("MMR_POOL_SIZE", 20)                 # 재랭킹으로 넘길 최대 후보 수
+MMR_DUPLICATE_THRESHOLD = st.secrets.get("MMR_DUPLICATE_THRESHOLD", 0.97)  # 이 이상 비슷하면 중복으로 제외
+
+# 임베딩 재생성 큐 설정
+EMBEDDING_BATCH_SIZE = st.secrets.get("EMBEDDING_BATCH_SIZE", 50)
+EMBEDDING_QUEUE_POLL_SECONDS = st.secrets.get("EMBEDDING_QUEUE_POLL_SECONDS", 60)
+EMBEDDING_MAX_ATTEMPTS = st.secrets.get("EMBEDDING_MAX_ATTEMPTS", 8)              # 이만큼 실패한 행은 내용 수정 전까지 건너뜀
+EMBEDDING_RETRY_BASE_SECONDS = st.secrets.get("EMBEDDING_RETRY_BASE_SECONDS", 60)  # 실패 행 재시도 간격 (실패마다 2배)
+EMBEDDING_RETRY_MAX_SECONDS = st.secrets.get("EMBEDDING_RETRY_MAX_SECONDS", 21600)  # 재시도 간격 상한 (6시간)
+
+# 저장 작업 큐 설정 (대량 저장을 백그라운드로)
+INGEST_JOB_DB = st.secrets.get("INGEST_JOB_DB", "ingest_jobs.sqlite3")
+INGEST_WORKERS = st.secrets.get("INGEST_WORKERS", 2)
+IDEMPOTENCY_TTL_MINUTES = st.secrets.get("IDEMPOTENCY_TTL_MINUTES", 10)  # 같은 저장 요청(더블 클릭, rerun) 시 이전 작업 재사용 기간
+
+# 저장 시 중복 제거 설정 (정확 중복: content_hash, 유사 중복: 코사인 유사도)
+# (표 그룹은 그룹 전체가 기존 그룹과 같을 때만 통째로 skip, 유사도 판정은 줄글/파일 업로드 단건에만 적용)
+DEDUP_ENABLED = st.secrets.get("DEDUP_ENABLED", True)
+DEDUP_SKIP_THRESHOLD = st.secrets.get("DEDUP_SKIP_THRESHOLD", 0.98)    # 이 이상이면 저장하지 않음
+DEDUP_MERGE_THRESHOLD = st.secrets.get("DEDUP_MERGE_THRESHOLD", 0.95)  # 이 이상이면 기존 행에 출처만 기록
+
+# LLM 공급자 설정 (gemini: 실제 API, stub: 네트워크 없이 결정적 응답 → 오프라인 부하 테스트)
+LLM_PROVIDER = st.secrets.get("LLM_PROVIDER", "gemini")
+LLM_STUB_LATENCY_SECONDS = st.secrets.get("LLM_STUB_LATENCY_SECONDS", 0.0)
+
+# 작업별 모델 라우팅 (rerank / verify / risk / generation → 등급, 최대 출력 토큰, temperature)
+MODEL_TIERS = st.secrets.get("MODEL_TIERS", {})      # 예: { lite = "gemini-2.0-flash-lite" }
+MODEL_ROUTES = st.secrets.get("MODEL_ROUTES", {})    # 예: { verify = { tier = "lite", max_output_tokens = 1024 } }
+MODEL_PRICES = st.secrets.get("MODEL_PRICES", {})    # 예: { "gemini-2.5-flash" = [0.30, 2.50] } (100만 토큰당 USD)
+
+# Gemini 공유 제한기 설정 (프로세스 전체 호출 합산)
+GEMINI_RPM = st.secrets.get("GEMINI_RPM", 300)                     # 분당 최대 요청 수
+GEMINI_TPM = st.secrets.get("GEMINI_TPM", 1_000_000)               # 분당 최대 토큰 수
+GEMINI_MAX_CONCURRENCY = st.secrets.get("GEMINI_MAX_CONCURRENCY", 8)
+
+# 타임아웃 / 재시도 / 서킷 브레이커 설정
+GEMINI_TIMEOUT_SECONDS = st.secrets.get("GEMINI_TIMEOUT_SECONDS", 60)       # 호출 1건 최대 시간
+GEMINI_RETRIES = st.secrets.get("GEMINI_RETRIES", 2)                        # 429/5xx/타임아웃 재시도 횟수
+SUPABASE_TIMEOUT_SECONDS = st.secrets.get("SUPABASE_TIMEOUT_SECONDS", 15)
+SUPABASE_RETRIES = st.secrets.get("SUPABASE_RETRIES", 2)                    # 검색 RPC 재시도 횟수
+BREAKER_FAILURE_THRESHOLD = st.secrets.get("BREAKER_FAILURE_THRESHOLD", 5)  # 연속 실패 n회면 차단
+BREAKER_RESET_SECONDS = st.secrets.get("BREAKER_RESET_SECONDS", 30)         # 차단 유지 시간
+RERANK_RESERVE_SECONDS = st.secrets.get("RERANK_RESERVE_SECONDS", 30)       # 재랭킹 후 생성용으로 남길 시간
+
+# 생성 요청 헤징 설정 (추천/리스크/동작 확인 페이지의 꼬리 지연 대응)
+HEDGE_ENABLED = st.secrets.get("HEDGE_ENABLED", False)
+HEDGE_PERCENTILE = st.secrets.get("HEDGE_PERCENTILE", 95)                  # 최근 지연의 이 백분위를 넘으면 중복 요청
+HEDGE_MIN_DELAY_SECONDS = st.secrets.get("HEDGE_MIN_DELAY_SECONDS", 5)     # 헤지까지 최소 대기 시간
+HEDGE_MAX_RATIO = st.secrets.get("HEDGE_MAX_RATIO", 0.1)                   # 추가 요청 비율 상한 (10%)
+
+# 마이크로 배치 설정 (세션 간 단건 임베딩 / 재랭킹 점수 요청을 모아서 1회 호출)
+MICRO_BATCH_ENABLED = st.secrets.get("MICRO_BATCH_ENABLED", True)
+MICRO_BATCH_WAIT_MS = st.secrets.get("MICRO_BATCH_WAIT_MS", 20)              # 첫 요청 후 모으는 최대 시간
+MICRO_BATCH_EMBED_SIZE = st.secrets.get("MICRO_BATCH_EMBED_SIZE", 32)        # 임베딩 배치 최대 텍스트 수
+MICRO_BATCH_RERANK_SIZE = st.secrets.get("MICRO_BATCH_RERANK_SIZE", 10)      # 재랭킹 프롬프트 1개당 최대 후보 수
+
+# 단계별 지연 시간 기록 (JSONL, 빈 문자열이면 파일 기록 안 함)
+TIMING_LOG_PATH = st.secrets.get("TIMING_LOG_PATH", "latency_events.jsonl")
+TIMING_LOG_MAX_MB = st.secrets.get("TIMING_LOG_MAX_MB", 50)          # 넘으면 .1로 넘기고 새 파일 (최근 2개 유지)
+configure_timing(TIMING_LOG_PATH or None, max_bytes=TIMING_LOG_MAX_MB * 1024 * 1024)
+
+# 모델 상태 확인 (지표 페이지, 결과 캐시 시간)
+MODEL_HEALTH_TTL_SECONDS = st.secrets.get("MODEL_HEALTH_TTL_SECONDS", 300)
+
+# 그룹 행을 프롬프트에 넣을 때 사용하는 필드
+GROUP_ROW_FIELDS = ['no', 'category', 'depth1', 'depth2', 'depth3', 'pre_condition', 'step', 'expect_result']
 
 
 # ========================================
@@ -36,33 +154,737 @@ genai.configure(api_key=GOOGLE_API_KEY)
 def get_supabase_client() -> Client:
     """Supabase 클라이언트 반환"""
     try:
-        return create_client(SUPABASE_URL, SUPABASE_KEY)
+        return create_client(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT_SECONDS)
+        )
     except Exception as e:
         st.error(f"❌ Supabase 연결 실패: {str(e)}")
         return None
 
 
+# ========================================
+# LLM 게이트웨이 (모든 임베딩/생성 호출)
+# ========================================
+@st.cache_resource
+def get_llm_gateway():
+    """
+    프로세스당 1개의 LLM 게이트웨이 (모든 세션/백그라운드 워커 공유)
+
+    - 제한기: RPM/TPM 토큰 버킷 + AIMD 동시 요청 한도
+    - 서킷 브레이커: 임베딩/생성 분리 → 생성 장애가 검색까지 막지 않음
+    - 타임아웃 = min(GEMINI_TIMEOUT_SECONDS, 요청 남은 시간), 429/5xx/타임아웃은 지터 백오프로 재시도
+    - HEDGE_ENABLED면 hedge=True 생성 호출에 헤징 (추가 요청은 HEDGE_MAX_RATIO 이내)
+    """
+    if LLM_PROVIDER == "stub":
+        provider = StubProvider(latency_seconds=LLM_STUB_LATENCY_SECONDS)
+    else:
+        provider = GeminiProvider(GOOGLE_API_KEY)
+
+    return LLMGateway(
+        provider,
+        limiter=GeminiLimiter(
+            rpm=GEMINI_RPM,
+            tpm=GEMINI_TPM,
+            max_concurrency=GEMINI_MAX_CONCURRENCY
+        ),
+        breakers={
+            'embed': CircuitBreaker("Gemini 임베딩", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS),
+            'generate': CircuitBreaker("Gemini 생성", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS),
+        },
+        retries=GEMINI_RETRIES,
+        timeout=GEMINI_TIMEOUT_SECONDS,
+        hedger=Hedger(
+            percentile=HEDGE_PERCENTILE,
+            min_delay_seconds=HEDGE_MIN_DELAY_SECONDS,
+            max_ratio=HEDGE_MAX_RATIO
+        ) if HEDGE_ENABLED else None
+    )
+
+
+def get_gemini_limiter():
+    """공유 제한기 (상태 표시용)"""
+    return get_llm_gateway().limiter
+
+
+def get_gemini_breakers():
+    """서킷 브레이커 {'embed', 'generate'} (상태 표시용)"""
+    return get_llm_gateway().breakers
+
+
+def llm_ready():
+    """LLM 호출 준비 여부 (gemini인데 API 키가 없으면 False)"""
+    return get_llm_gateway().provider.ready()
+
+
+@st.cache_resource
+def get_model_router():
+    """작업별 모델 라우팅 표 (secrets의 MODEL_TIERS / MODEL_ROUTES / MODEL_PRICES 반영)"""
+    return ModelRouter(tiers=MODEL_TIERS, routes=MODEL_ROUTES, prices=MODEL_PRICES)
+
+
+def generate_text(prompt: str, task="generation", hedge=False, **config):
+    """
+    프롬프트 → 응답 텍스트 (게이트웨이 경유)
+
+    task: 라우팅 작업 (generation / risk / verify) → 모델, 최대 출력 토큰, temperature
+    hedge: 대화형 페이지에서 True → 느린 호출에 중복 요청 (HEDGE_ENABLED일 때만)
+    config: 라우팅 값 대신 쓸 temperature, max_output_tokens 등
+    """
+    router = get_model_router()
+    model = router.model(task)
+    with stage("generate", task=task, model=model, prompt_chars=len(prompt)) as event:
+        response_text = get_llm_gateway().generate(
+            prompt, model, hedge=hedge, **{**router.config(task), **config}
+        )
+        event['response_chars'] = len(response_text or "")
+    return response_text
+
+
+def llm_rerank_available():
+    """LLM 재랭킹을 해도 되는지 (브레이커 차단 중이거나 생성에 쓸 시간이 부족하면 False)"""
+    if get_gemini_breakers()['generate'].is_open():
+        return False
+    remaining = remaining_time()
+    return remaining is None or remaining > RERANK_RESERVE_SECONDS
+
+
+@st.cache_data(ttl=MODEL_HEALTH_TTL_SECONDS, show_spinner=False)
+def probe_model_health():
+    """
+    라우팅 표의 생성 모델 + 현재 임베딩 모델에 짧은 요청 1건씩 → 상태/지연 시간
+
+    Returns:
+        [{model, kind, tasks, ok, latency_ms, error, checked_at}, ...]
+        (MODEL_HEALTH_TTL_SECONDS 동안 캐시 → 지표 페이지를 열 때마다 호출하지 않음)
+    """
+    gateway = get_llm_gateway()
+    tasks_by_model = {}
+    for route in get_model_router().table():
+        tasks_by_model.setdefault(route['model'], []).append(route['task'])
+
+    embedding_model, embedding_dim = get_active_embedding_model()
+    probes = [
+        (model, "generate", ", ".join(tasks),
+         lambda model=model: gateway.generate("ping (OK 한 단어로만 답하세요)", model, temperature=0))
+        for model, tasks in tasks_by_model.items()
+    ]
+    probes.append((embedding_model, "embed", "embedding",
+                   lambda: gateway.embed(["ping"], embedding_model, embedding_dim)))
+
+    results = []
+    for model, kind, tasks, probe in probes:
+        started = datetime.now()
+        try:
+            probe()
+            ok, error = True, ""
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {str(e)[:200]}"
+        results.append({
+            'model': model,
+            'kind': kind,
+            'tasks': tasks,
+            'ok': ok,
+            'latency_ms': round((datetime.now() - started).total_seconds() * 1000, 1),
+            'error': error,
+            'checked_at': started.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return results
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_metrics_events(hours: float):
+    """지표 페이지용 계측 이벤트 (최근 hours시간, 30초 캐시)"""
+    if not TIMING_LOG_PATH:
+        return None
+    return load_events(TIMING_LOG_PATH, since_seconds=hours * 3600)
+
+
+# ========================================
+# 마이크로 배치 (세션 간 단건 요청 묶기)
+# ========================================
+@st.cache_resource
+def get_micro_batchers():
+    """
+    프로세스당 1개의 배치기 {'embed', 'rerank'} (모든 세션 공유)
+
+    - embed: 단건 임베딩 → key (모델, 차원)이 같은 텍스트를 모아 1회 embed 호출
+    - rerank: (질문, 후보) 점수 요청 → 모델이 같은 요청을 모아 프롬프트 1개로 점수
+    - MICRO_BATCH_ENABLED가 False면 크기 1, 대기 0 (요청마다 바로 호출)
+    """
+    gateway = get_llm_gateway()
+    router = get_model_router()
+    wait_ms = MICRO_BATCH_WAIT_MS if MICRO_BATCH_ENABLED else 0
+
+    return {
+        'embed': MicroBatcher(
+            lambda texts, key: gateway.embed(texts, key[0], key[1]),
+            max_batch_size=MICRO_BATCH_EMBED_SIZE if MICRO_BATCH_ENABLED else 1,
+            max_wait_ms=wait_ms,
+            workers=GEMINI_MAX_CONCURRENCY,
+            name="embed-batch"
+        ),
+        'rerank': MicroBatcher(
+            lambda items, model: score_relevance_batch(items, model, gateway, router),
+            max_batch_size=MICRO_BATCH_RERANK_SIZE if MICRO_BATCH_ENABLED else 1,
+            max_wait_ms=wait_ms,
+            workers=GEMINI_MAX_CONCURRENCY,
+            name="rerank-batch"
+        ),
+    }
+
+
+def batch_result(future, reserve_seconds=0):
+    """배치 결과 대기 (요청 마감 시간 - reserve_seconds까지만, 마감이 없으면 게이트웨이 타임아웃에 맡김)"""
+    timeout = remaining_time()
+    if timeout is not None:
+        timeout = max(0.0, timeout - reserve_seconds)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise DeadlineExceeded("배치 응답 대기 시간 초과")
+
+
 # ========================================
 # 임베딩 생성
 # ========================================
+def get_active_embedding_model():
+    """
+    현재 사용 중인 임베딩 (모델, 차원)
+
+    migrate_embeddings.py switch 가 embedding_config를 바꾸면 1분 안에 반영됨
+    (그 전에 벡터 차원 불일치 오류가 나면 refresh_active_embedding_model로 바로 다시 조회)
+    embedding_config 테이블이 없으면 secrets 설정 사용
+    """
+    return cached_call("embedding_config", _load_active_embedding_model)
+
+
+def refresh_active_embedding_model(error=None):
+    """
+    임베딩 모델 캐시 비우기
+
+    error를 넘기면 벡터 차원 불일치 오류(모델 교체 직후 이전 모델로 만든 벡터)일 때만 비움
+
+    Returns:
+        캐시를 비웠으면 True
+    """
+    if error is not None and "dimension" not in str(error).lower():
+        return False
+    _load_active_embedding_model.clear()
+    return True
+
+
+@st.cache_data(ttl=60)
+def _load_active_embedding_model():
+    mark_cache_miss()
+    try:
+        result = get_supabase_client()\
+            .table('embedding_config')\
+            .select('model, dim')\
+            .limit(1)\
+            .execute()
+        if result.data:
+            return result.data[0]['model'], result.data[0]['dim']
+    except Exception:
+        pass
+    return EMBEDDING_MODEL, EMBEDDING_DIM
+
+
 def generate_embedding(text: str):
-    """텍스트를 768차원 벡터로 변환 (Gemini text-embedding-004)"""
+    """텍스트를 벡터로 변환 (기본: Gemini text-embedding-004, 768차원)"""
     try:
-        result = genai.embed_content(
-            model="models/text-embedding-004",
-            content=text,
-            task_type="retrieval_document"
-        )
-        return result['embedding']
+        model, dim = get_active_embedding_model()
+        # 다른 세션의 단건 임베딩과 묶어서 1회 호출 (최대 MICRO_BATCH_WAIT_MS 대기)
+        with stage("embedding", model=model, chars=len(text or "")):
+            return batch_result(get_micro_batchers()['embed'].submit(text, (model, dim)))
     except Exception as e:
         st.error(f"❌ 임베딩 생성 실패: {str(e)}")
         return None
 
 
+def embed_texts(texts: list):
+    """
+    여러 텍스트를 한 번의 API 호출로 임베딩 (백그라운드 워커용)
+
+    실패 시 예외를 그대로 올림 (UI 메시지 없음)
+    """
+    model, dim = get_active_embedding_model()
+    return get_llm_gateway().embed(texts, model, dim)
+
+
+# ========================================
+# 임베딩 재생성 큐
+# ========================================
+@st.cache_resource
+def get_embedding_worker():
+    """프로세스당 1개의 임베딩 재생성 워커 (최초 호출 시 시작 → 남아있는 큐부터 처리)"""
+    return EmbeddingWorker(
+        get_client=get_supabase_client,
+        embed_batch=embed_texts,
+        tables={
+            TABLE_NAME: test_case_embedding_text,
+            SPEC_TABLE_NAME: spec_doc_embedding_text
+        },
+        batch_size=EMBEDDING_BATCH_SIZE,
+        poll_interval=EMBEDDING_QUEUE_POLL_SECONDS,
+        max_attempts=EMBEDDING_MAX_ATTEMPTS,
+        retry_base_seconds=EMBEDDING_RETRY_BASE_SECONDS,
+        retry_max_seconds=EMBEDDING_RETRY_MAX_SECONDS
+    ).start()
+
+
+def update_test_case(row: dict, fields: dict):
+    """
+    테스트 케이스 수정 (임베딩은 백그라운드에서 재생성)
+
+    임베딩 대상 텍스트가 바뀐 경우에만 content_hash 갱신 + 큐에 등록
+
+    Args:
+        row: 수정 전 행 (id, name, description, data, content_hash)
+        fields: 변경할 컬럼 dict
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return False
+
+    update_data = dict(fields)
+    new_hash = content_hash(test_case_embedding_text({**row, **fields}))
+    if new_hash != row.get('content_hash'):
+        update_data['content_hash'] = new_hash
+        update_data['embedding_stale'] = True
+
+    supabase.table(TABLE_NAME).update(update_data).eq('id', row['id']).execute()
+
+    if update_data.get('embedding_stale'):
+        get_embedding_worker().notify()
+    return True
+
+
+def update_spec_doc(row: dict, fields: dict):
+    """
+    기획 문서 수정 (임베딩은 백그라운드에서 재생성)
+
+    Args:
+        row: 수정 전 행 (id, title, content, content_hash)
+        fields: 변경할 컬럼 dict
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return False
+
+    update_data = dict(fields)
+    new_hash = content_hash(spec_doc_embedding_text({**row, **fields}))
+    if new_hash != row.get('content_hash'):
+        update_data['content_hash'] = new_hash
+        update_data['embedding_stale'] = True
+
+    supabase.table(SPEC_TABLE_NAME).update(update_data).eq('id', row['id']).execute()
+
+    if update_data.get('embedding_stale'):
+        get_embedding_worker().notify()
+    return True
+
+
 # ========================================
 # ⭐ 하이브리드 검색 (핵심 기능)
 # ========================================
-def hybrid_search_test_cases(query_text: str, category_filter=None, limit=None, similarity_threshold=0.3):
+def build_match_filters(category_filter=None, input_type_filter=None, group_id_filter=None,
+                        date_from=None, date_to=None):
+    """
+    벡터 검색 RPC에 넘길 필터 파라미터 생성 (필터 푸시다운)
+
+    값이 없는 필터는 아예 넣지 않음 → 필터 없는 검색은 기존 RPC 시그니처 그대로 호출됨
+
+    Args:
+        category_filter: 카테고리 ("전체"는 필터 없음)
+        input_type_filter: data.input_type (table_group, free_form, ...)
+        group_id_filter: data.group_id
+        date_from / date_to: 등록일 범위 (date, datetime 또는 ISO 문자열, date_to는 미포함)
+    """
+    filters = {}
+
+    if category_filter and category_filter != "전체":
+        filters['filter_category'] = category_filter
+    if input_type_filter and input_type_filter != "전체":
+        filters['filter_input_type'] = input_type_filter
+    if group_id_filter:
+        filters['filter_group_id'] = group_id_filter
+    if date_from:
+        filters['filter_created_from'] = date_from.isoformat() if hasattr(date_from, 'isoformat') else str(date_from)
+    if date_to:
+        filters['filter_created_to'] = date_to.isoformat() if hasattr(date_to, 'isoformat') else str(date_to)
+
+    return filters
+
+
+def match_with_relaxation(supabase, rpc_name: str, query_embedding, match_count: int,
+                          thresholds, min_candidates: int = 1, extra_params=None):
+    """
+    임계값 완화 사다리 (예: 0.3 → 0.2 → 0.0)
+
+    같은 쿼리 임베딩으로 RPC만 임계값을 낮춰가며 재호출하고,
+    후보가 min_candidates개 이상 모이면 즉시 중단 (임베딩/재랭킹은 재실행하지 않음)
+
+    Returns:
+        (후보 리스트, 후보를 만든 임계값) - 모두 실패하면 ([], None)
+    """
+    candidates = []
+    used_threshold = None
+    last_error = None
+
+    for threshold in thresholds:
+        check_deadline("(벡터 검색)")
+        try:
+            with stage(f"rpc.{rpc_name}", threshold=threshold, match_count=match_count) as event:
+                result = retry_call(
+                    lambda: supabase.rpc(
+                        rpc_name,
+                        {
+                            'query_embedding': query_embedding,
+                            'match_count': match_count,
+                            'similarity_threshold': threshold,
+                            **(extra_params or {})
+                        }
+                    ).execute(),
+                    retries=SUPABASE_RETRIES,
+                    retry_on=is_transient_error
+                )
+                event['rows'] = len(result.data or [])
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # 모델 교체 직후 차원 불일치 → 임계값을 낮춰도 같은 오류 (캐시만 비우고 중단)
+            if refresh_active_embedding_model(e):
+                raise
+            # 이 단계 실패 → 다음 임계값으로 계속
+            last_error = e
+            continue
+
+        if result.data and len(result.data) >= len(candidates):
+            candidates = result.data
+            used_threshold = threshold
+
+        if len(candidates) >= min_candidates:
+            break
+
+    if not candidates and last_error is not None:
+        raise last_error
+
+    return candidates, used_threshold
+
+
+def build_threshold_ladder(similarity_threshold, fallback_thresholds=None):
+    """기본 임계값 + 그보다 낮은 완화 임계값들 (중복 제거, 내림차순)"""
+    ladder = [similarity_threshold]
+    for threshold in (fallback_thresholds or []):
+        if threshold < ladder[-1]:
+            ladder.append(threshold)
+    return ladder
+
+
+def adaptive_cutoff(candidates: list, min_keep=None, relative_gap=None, score_key='similarity'):
+    """
+    유사도 분포로 재랭킹할 후보 수 결정
+
+    1. 상대 간격: 1위 유사도 대비 relative_gap 이내인 후보만 유지
+    2. 무릎점(knee): 정규화한 유사도 곡선이 첫~끝 직선에서 가장 멀리 떨어진 지점에서 자름
+       (뚜렷한 낙차가 있을 때만 적용)
+
+    Args:
+        candidates: 유사도 내림차순 후보 리스트
+        min_keep: 최소 유지 개수 (기본: ADAPTIVE_MIN_CANDIDATES)
+        relative_gap: 상대 간격 (기본: ADAPTIVE_RELATIVE_GAP)
+
+    Returns:
+        (유지할 후보 수, 분포가 평탄한지 여부)
+    """
+    min_keep = ADAPTIVE_MIN_CANDIDATES if min_keep is None else min_keep
+    relative_gap = ADAPTIVE_RELATIVE_GAP if relative_gap is None else relative_gap
+
+    n = len(candidates)
+    if n <= min_keep:
+        return n, False
+
+    sims = np.sort(np.array([c.get(score_key) or 0.0 for c in candidates], dtype=float))[::-1]
+    top, spread = sims[0], sims[0] - sims[-1]
+
+    if spread <= ADAPTIVE_FLAT_SPREAD:
+        # 평탄한 분포 → 꼬리도 모두 비슷하게 관련 있음
+        return n, True
+
+    # 1. 상대 간격
+    cut = int(np.count_nonzero(sims >= top - abs(top) * relative_gap))
+
+    # 2. 무릎점: (0,1)~(1,0) 직선과 정규화 곡선의 거리
+    x = np.linspace(0.0, 1.0, n)
+    y = (sims - sims[-1]) / spread
+    distance = (1.0 - x) - y
+    knee = int(np.argmax(distance))
+    if distance[knee] >= ADAPTIVE_KNEE_MIN_STRENGTH:
+        cut = min(cut, knee + 1)
+
+    return max(min_keep, min(cut, n)), False
+
+
+def apply_adaptive_cutoff(supabase, rpc_name: str, query_embedding, candidates: list, match_count: int,
+                          threshold, extra_params=None):
+    """
+    adaptive_cutoff 적용: 꼬리가 무관하면 후보를 줄이고, 평탄하면 RPC로 더 가져옴
+
+    확장은 같은 임베딩/임계값으로 RPC만 한 번 더 호출 (최대 ADAPTIVE_MAX_CANDIDATES개)
+    """
+    pool_size, is_flat = adaptive_cutoff(candidates)
+
+    if is_flat and len(candidates) >= match_count and match_count < ADAPTIVE_MAX_CANDIDATES:
+        expanded_count = min(match_count * 2, ADAPTIVE_MAX_CANDIDATES)
+        expanded, _ = match_with_relaxation(
+            supabase, rpc_name, query_embedding, expanded_count, [threshold],
+            extra_params=extra_params
+        )
+        if len(expanded) > len(candidates):
+            for candidate in expanded:
+                candidate['matched_threshold'] = threshold
+            candidates = expanded
+            pool_size, _ = adaptive_cutoff(candidates)
+
+    return candidates[:pool_size]
+
+
+def collapse_groups(candidates: list, method=None):
+    """
+    같은 data.group_id 행을 그룹 대표 1개로 묶음
+
+    - 대표: 그룹 내 유사도가 가장 높은 행 (group_id, group_hit_count, group_hit_ids 추가)
+    - 그룹 점수: method에 따라 최고(max) 또는 평균(mean) 유사도 → similarity에 반영
+    - group_id 없는 행은 그대로 유지
+
+    Returns:
+        그룹 점수 내림차순 리스트
+    """
+    method = method or GROUP_SCORE_METHOD
+
+    members_by_key = {}
+    for candidate in candidates:
+        data = candidate.get('data') or {}
+        group_id = data.get('group_id') if isinstance(data, dict) else None
+        key = group_id or f"row_{candidate.get('id')}"
+        members_by_key.setdefault(key, (group_id, []))[1].append(candidate)
+
+    collapsed = []
+    for group_id, members in members_by_key.values():
+        best = max(members, key=lambda m: m.get('similarity') or 0)
+        if not group_id:
+            collapsed.append(best)
+            continue
+
+        sims = [m.get('similarity') or 0 for m in members]
+        score = float(np.mean(sims)) if method == "mean" else max(sims)
+
+        representative = dict(best)
+        representative['group_id'] = group_id
+        representative['group_hit_count'] = len(members)
+        representative['group_hit_ids'] = [m.get('id') for m in members]
+        representative['similarity'] = score
+        collapsed.append(representative)
+
+    collapsed.sort(key=lambda c: c.get('similarity') or 0, reverse=True)
+    return collapsed
+
+
+def hydrate_groups(supabase, cases: list):
+    """
+    선택된 그룹 대표들의 전체 행을 한 번의 요청으로 가져와 group_rows에 채움
+    """
+    group_ids = [c['group_id'] for c in cases if c.get('group_id')]
+    if not group_ids:
+        return cases
+
+    with stage("rpc.group_rows", groups=len(group_ids)) as event:
+        result = supabase.table(TABLE_NAME)\
+            .select('id, category, name, link, description, data')\
+            .in_('data->>group_id', group_ids)\
+            .order('id')\
+            .execute()
+        event['rows'] = len(result.data or [])
+
+    rows_by_group = {}
+    for row in result.data or []:
+        rows_by_group.setdefault((row.get('data') or {}).get('group_id'), []).append(row)
+
+    for case in cases:
+        if case.get('group_id'):
+            case['group_rows'] = rows_by_group.get(case['group_id'], [])
+
+    return cases
+
+
+def select_group_rows(row_ids: list, sizes: list, hit_ids=None, max_rows=None, max_chars=None):
+    """
+    프롬프트에 넣을 그룹 행 위치 선택 (큰 그룹이 프롬프트를 채우지 않도록)
+
+    검색에 걸린 행을 먼저, 그 다음 가까운 이웃 행(id 순서상 앞뒤)부터 채움
+    (걸린 행이 없으면 그룹 앞쪽부터)
+
+    Args:
+        row_ids: 그룹 행 id (id 오름차순)
+        sizes: 행별 프롬프트 글자 수
+        hit_ids: 검색에 걸린 행 id
+        max_rows: 최대 행 수 (기본: GROUP_PROMPT_MAX_ROWS)
+        max_chars: 선택한 행 글자 수 합의 상한 (기본: GROUP_PROMPT_MAX_CHARS, 최소 1행은 유지)
+
+    Returns:
+        선택된 행 위치 리스트 (오름차순)
+    """
+    max_rows = max_rows or GROUP_PROMPT_MAX_ROWS
+    max_chars = max_chars or GROUP_PROMPT_MAX_CHARS
+
+    hit_ids = set(hit_ids or [])
+    hits = [pos for pos, row_id in enumerate(row_ids) if row_id in hit_ids] or [0]
+    # 걸린 행과의 거리 → 같은 거리면 앞쪽 행 먼저
+    order = sorted(range(len(row_ids)), key=lambda pos: (min(abs(pos - hit) for hit in hits), pos))
+
+    selected, used_chars = [], 0
+    for pos in order[:max_rows]:
+        if selected and used_chars + sizes[pos] > max_chars:
+            break
+        selected.append(pos)
+        used_chars += sizes[pos]
+    return sorted(selected)
+
+
+def group_rows_for_prompt(case: dict, row_fields=None):
+    """
+    그룹 행을 프롬프트용으로 압축 (빈 필드 제외, 공통 메타데이터 중복 제거)
+
+    큰 그룹은 걸린 행 + 인접 행만 GROUP_PROMPT_MAX_ROWS / GROUP_PROMPT_MAX_CHARS까지 포함
+
+    Returns:
+        (압축된 행 리스트, 빠진 행 수)
+    """
+    row_fields = row_fields or GROUP_ROW_FIELDS
+    group_rows = case.get('group_rows', [])
+    compact_rows = []
+    for row in group_rows:
+        data = row.get('data') or {}
+        compact_rows.append({
+            field: data.get(field) for field in row_fields if data.get(field)
+        })
+
+    selected = select_group_rows(
+        [row.get('id') for row in group_rows],
+        [len(json.dumps(row, ensure_ascii=False)) for row in compact_rows],
+        hit_ids=case.get('group_hit_ids') or [case.get('id')]
+    )
+    return [compact_rows[pos] for pos in selected], len(compact_rows) - len(selected)
+
+
+def case_for_prompt(case: dict, fields: list, row_fields=None):
+    """
+    검색 결과 1건을 프롬프트용 dict로 변환
+
+    그룹 대표는 대표 행의 data 대신 그룹 전체 행(group_rows)을 압축해서 한 번만 넣음
+    (행이 많으면 일부만 넣고 group_rows_note로 생략 표시)
+    """
+    prompt_case = {field: case.get(field) for field in fields}
+    if case.get('group_rows'):
+        prompt_case.pop('data', None)
+        rows, omitted = group_rows_for_prompt(case, row_fields)
+        prompt_case['group_rows'] = rows
+        if omitted:
+            prompt_case['group_rows_note'] = (
+                f"전체 {len(rows) + omitted}개 행 중 검색된 행과 인접한 {len(rows)}개만 포함 ({omitted}개 생략)"
+            )
+    return prompt_case
+
+
+def parse_embedding(value):
+    """RPC가 반환한 벡터 값 파싱 (pgvector는 "[0.1,0.2,...]" 문자열로 옴)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def mmr_select(candidates: list, query_embedding, k=None, lambda_mult=None, duplicate_threshold=None):
+    """
+    MMR(Maximal Marginal Relevance) 다양성 선택
+
+    점수 = λ * 질문과의 유사도 - (1 - λ) * 이미 고른 후보와의 최대 유사도
+    이미 고른 후보와 duplicate_threshold 이상 비슷한 후보는 중복으로 보고 제외
+
+    Args:
+        candidates: 'embedding'이 포함된 후보 리스트 (embedding 없는 후보는 뒤에 그대로 붙음)
+        query_embedding: 질문 임베딩
+        k: 최대 선택 개수 (기본: MMR_POOL_SIZE)
+        lambda_mult: λ (기본: MMR_LAMBDA)
+        duplicate_threshold: 중복 판정 유사도 (기본: MMR_DUPLICATE_THRESHOLD)
+    """
+    k = k or MMR_POOL_SIZE
+    lambda_mult = MMR_LAMBDA if lambda_mult is None else lambda_mult
+    duplicate_threshold = MMR_DUPLICATE_THRESHOLD if duplicate_threshold is None else duplicate_threshold
+
+    with_vectors = [c for c in candidates if c.get('embedding') is not None]
+    without_vectors = [c for c in candidates if c.get('embedding') is None]
+    if len(with_vectors) <= 1:
+        return (with_vectors + without_vectors)[:k]
+
+    # 정규화 → 내적 = 코사인 유사도
+    matrix = np.vstack([parse_embedding(c['embedding']) for c in with_vectors])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    query_vec = np.asarray(query_embedding, dtype=np.float32)
+    query_vec /= np.linalg.norm(query_vec) + 1e-12
+
+    relevance = matrix @ query_vec
+    max_sim_to_selected = np.full(len(with_vectors), -np.inf, dtype=np.float32)
+    available = np.ones(len(with_vectors), dtype=bool)
+
+    selected = []
+    while len(selected) < k and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_sim_to_selected
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+
+        # 고른 후보와의 유사도 갱신 + 중복 제외
+        max_sim_to_selected = np.maximum(max_sim_to_selected, matrix @ matrix[chosen])
+        available &= max_sim_to_selected < duplicate_threshold
+
+    picked = [with_vectors[i] for i in selected]
+    return (picked + without_vectors)[:k]
+
+
+def get_test_case_categories():
+    """카테고리 선택 UI용 카테고리 목록 ("전체" 포함, 저장/삭제 시 st.cache_data.clear()로 갱신)"""
+    return cached_call("categories", _load_test_case_categories)
+
+
+@st.cache_data(ttl=300)
+def _load_test_case_categories():
+    mark_cache_miss()
+    supabase = get_supabase_client()
+    if not supabase:
+        return ["전체"]
+
+    try:
+        result = supabase.table(TABLE_NAME).select('category').execute()
+        categories = sorted({row.get('category') for row in result.data if row.get('category')})
+        return ["전체"] + categories
+    except Exception as e:
+        st.error(f"❌ 카테고리 조회 실패: {str(e)}")
+        return ["전체"]
+
+
+def hybrid_search_test_cases(query_text: str, category_filter=None, limit=None, similarity_threshold=0.3,
+                             input_type_filter=None, group_id_filter=None, date_from=None, date_to=None,
+                             fallback_thresholds=None, min_candidates=None, adaptive=None,
+                             collapse=None, mmr=None, mmr_lambda=None):
     """
     하이브리드 검색: 벡터 검색 → LLM 재랭킹
     
@@ -71,9 +893,24 @@ def hybrid_search_test_cases(query_text: str, category_filter=None, limit=None,
         category_filter: 카테고리 필터 (옵션)
         limit: 검색 개수 제한 (옵션)
         similarity_threshold: 유사도 임계값 (기본: 0.3)
+        input_type_filter: 입력 타입 필터 (옵션)
+        group_id_filter: 그룹 ID 필터 (옵션)
+        date_from / date_to: 등록일 범위 필터 (옵션)
+        fallback_thresholds: 결과 부족 시 순서대로 낮춰볼 임계값 (예: [0.2, 0.0])
+        min_candidates: 완화를 멈출 최소 후보 수 (기본: 최종 반환 개수)
+        adaptive: 유사도 분포 기반 후보 수 조절 여부 (기본: ADAPTIVE_CUTOFF)
+        collapse: 같은 group_id 행을 묶어서 재랭킹할지 여부 (기본: GROUP_COLLAPSE)
+        mmr: 재랭킹 전 MMR 다양성 선택 여부 (기본: MMR_ENABLED)
+        mmr_lambda: MMR λ (기본: MMR_LAMBDA)
+
+    ⭐ 필터는 RPC(match_test_cases_v21) 안에서 적용됨 → 개수 제한은 필터링 후 기준
+    ⭐ 임계값 완화는 한 번의 호출 안에서 쿼리 임베딩을 재사용
+    ⭐ 재랭킹 후보 수는 유사도 분포(상대 간격/무릎점)에 맞춰 줄이거나 늘림
+    ⭐ 그룹은 대표 1개로 재랭킹 후, 선택된 그룹의 전체 행을 group_rows로 한 번에 조회
+    ⭐ MMR로 거의 같은 후보(재저장 그룹, 중복 import)를 재랭킹 전에 제외
     
     Returns:
-        재랭킹된 테스트 케이스 리스트
+        재랭킹된 테스트 케이스 리스트 (각 케이스에 matched_threshold 포함)
     """
     supabase = get_supabase_client()
     if not supabase:
@@ -87,40 +924,90 @@ def hybrid_search_test_cases(query_text: str, category_filter=None, limit=None,
         else:
             initial_count = INITIAL_SEARCH_COUNT
             final_count = FINAL_SEARCH_COUNT
+
+        filters = build_match_filters(
+            category_filter=category_filter,
+            input_type_filter=input_type_filter,
+            group_id_filter=group_id_filter,
+            date_from=date_from,
+            date_to=date_to
+        )
             
         # 1단계: 벡터 검색 (넓게 가져오기)
-        st.info(f"🔍 1단계: 벡터 검색 중... (최대 {INITIAL_SEARCH_COUNT}개)")
+        st.info(f"🔍 1단계: 벡터 검색 중... (최대 {initial_count}개)")
+        if filters:
+            st.info(f"🔖 필터 적용: {', '.join(f'{k[7:]}={v}' for k, v in filters.items())}")
         
         query_embedding = generate_embedding(query_text)
         if not query_embedding:
             return []
+
+        # MMR에 필요한 후보 임베딩은 RPC가 같이 반환 (include_embedding)
+        use_mmr = MMR_ENABLED if mmr is None else mmr
+        rpc_params = {**filters, 'include_embedding': True} if use_mmr else filters
         
-        result = supabase.rpc(
+        thresholds = build_threshold_ladder(similarity_threshold, fallback_thresholds)
+        candidates, used_threshold = match_with_relaxation(
+            supabase,
             'match_test_cases_v21',
-            {
-                'query_embedding': query_embedding,
-                'match_count': initial_count,  # limit 적용
-                'similarity_threshold': similarity_threshold  # 파라미터 적용
-            }
-        ).execute()
+            query_embedding,
+            initial_count,  # limit 적용 (필터링 후 개수)
+            thresholds,
+            min_candidates=min_candidates or final_count,
+            extra_params=rpc_params
+        )
         
-        if not result.data:
+        if not candidates:
             st.warning("⚠️ 벡터 검색 결과가 없습니다.")
             return []
+
+        for candidate in candidates:
+            candidate['matched_threshold'] = used_threshold
         
-        candidates = result.data
-        st.success(f"✅ 1단계 완료: {len(candidates)}개 발견")
-        
-        # 카테고리 필터링
-        if category_filter and category_filter != "전체":
-            candidates = [c for c in candidates if c.get('category') == category_filter]
-            st.info(f"🔖 카테고리 필터 적용: {len(candidates)}개 남음")
+        if used_threshold != similarity_threshold:
+            st.info(f"🪜 임계값 완화: {similarity_threshold} → {used_threshold}")
+        st.success(f"✅ 1단계 완료: {len(candidates)}개 발견 (임계값 {used_threshold})")
+
+        # 적응형 후보 수: 무관한 꼬리는 재랭킹 전에 제외
+        if ADAPTIVE_CUTOFF if adaptive is None else adaptive:
+            fetched_count = len(candidates)
+            candidates = apply_adaptive_cutoff(
+                supabase, 'match_test_cases_v21', query_embedding, candidates,
+                initial_count, used_threshold, extra_params=rpc_params
+            )
+            if len(candidates) != fetched_count:
+                st.info(f"📉 적응형 후보 수: {fetched_count}개 → {len(candidates)}개 재랭킹")
+
+        # 그룹 단위로 묶기
+        use_collapse = GROUP_COLLAPSE if collapse is None else collapse
+        if use_collapse:
+            row_count = len(candidates)
+            candidates = collapse_groups(candidates)
+            if len(candidates) != row_count:
+                st.info(f"🗂️ 그룹 묶기: {row_count}개 행 → {len(candidates)}개 후보")
+
+        # MMR 다양성 선택
+        if use_mmr:
+            pool_count = len(candidates)
+            candidates = mmr_select(
+                candidates, query_embedding,
+                k=max(MMR_POOL_SIZE, final_count),
+                lambda_mult=mmr_lambda
+            )
+            if len(candidates) != pool_count:
+                st.info(f"🧬 MMR 다양성 선택: {pool_count}개 → {len(candidates)}개")
+
+        # 임베딩은 프롬프트/세션에 들고 다니지 않음
+        for candidate in candidates:
+            candidate.pop('embedding', None)
         
         # 2단계: LLM 재랭킹
-        # st.info(f"🤖 2단계: {RERANK_METHOD.upper()} 재랭킹 중... (상위 {FINAL_SEARCH_COUNT}개 선택)")
         st.info(f"🤖 2단계: {RERANK_METHOD.upper()} 재랭킹 중... (상위 {final_count}개 선택)")
-        # reranked = rerank_candidates(query_text, candidates, FINAL_SEARCH_COUNT)
         reranked = rerank_candidates(query_text, candidates, final_count)
+
+        # 선택된 그룹의 전체 행 조회 (1회)
+        if use_collapse:
+            reranked = hydrate_groups(supabase, reranked)
         
         st.success(f"✅ 2단계 완료: 최종 {len(reranked)}개 반환")
         
@@ -131,7 +1018,8 @@ def hybrid_search_test_cases(query_text: str, category_filter=None, limit=None,
         return []
 
 
-def hybrid_search_spec_docs(query_text: str, limit=None, similarity_threshold=0.3):
+def hybrid_search_spec_docs(query_text: str, limit=None, similarity_threshold=0.3,
+                            fallback_thresholds=None, min_candidates=None, adaptive=None):
     """
     기획 문서 하이브리드 검색
 
@@ -139,6 +1027,9 @@ def hybrid_search_spec_docs(query_text: str, limit=None, similarity_threshold=0.
         query_text: 사용자 질문
         limit: 검색 개수 제한 (옵션)
         similarity_threshold: 유사도 임계값 (기본: 0.3)
+        fallback_thresholds: 결과 부족 시 순서대로 낮춰볼 임계값 (옵션)
+        min_candidates: 완화를 멈출 최소 후보 수 (기본: 최종 반환 개수)
+        adaptive: 유사도 분포 기반 후보 수 조절 여부 (기본: ADAPTIVE_CUTOFF)
     """
     supabase = get_supabase_client()
     if not supabase:
@@ -158,21 +1049,31 @@ def hybrid_search_spec_docs(query_text: str, limit=None, similarity_threshold=0.
         if not query_embedding:
             return []
         
-        result = supabase.rpc(
+        thresholds = build_threshold_ladder(similarity_threshold, fallback_thresholds)
+        candidates, used_threshold = match_with_relaxation(
+            supabase,
             'match_spec_docs_v21',
-            {
-                'query_embedding': query_embedding,
-                'match_count': initial_count,  # limit 적용
-                'similarity_threshold': similarity_threshold  # 파라미터 적용
-            }
-        ).execute()
+            query_embedding,
+            initial_count,  # limit 적용
+            thresholds,
+            min_candidates=min_candidates or final_count
+        )
         
-        if not result.data:
+        if not candidates:
             return []
+
+        for candidate in candidates:
+            candidate['matched_threshold'] = used_threshold
+
+        # 적응형 후보 수
+        if ADAPTIVE_CUTOFF if adaptive is None else adaptive:
+            candidates = apply_adaptive_cutoff(
+                supabase, 'match_spec_docs_v21', query_embedding, candidates,
+                initial_count, used_threshold
+            )
         
         # 2단계: 재랭킹
-        # reranked = rerank_candidates(query_text, result.data, 5)  # 상위 5개
-        reranked = rerank_candidates(query_text, result.data, final_count)
+        reranked = rerank_candidates(query_text, candidates, final_count)
         
         return reranked
         
@@ -189,120 +1090,82 @@ def rerank_candidates(query: str, candidates: list, top_k: int):
     후보군을 재랭킹하여 상위 k개 반환
     """
     method = RERANK_METHOD
-    
-    if method == "gemini":
-        return rerank_with_gemini(query, candidates, top_k)
-    elif method == "cosine":
-        return rerank_with_cosine(query, candidates, top_k)
-    elif method == "hybrid":
-        return rerank_hybrid(query, candidates, top_k)
-    else:
-        # 기본: 벡터 검색 결과 그대로
-        return candidates[:top_k]
 
+    # Gemini 장애(브레이커 차단) 또는 시간 부족 → 벡터 유사도 순위로 바로 반환
+    if method in ("gemini", "hybrid") and not llm_rerank_available():
+        method = "similarity"
 
-def rerank_with_gemini(query: str, candidates: list, top_k: int):
-    """
-    Gemini AI를 사용한 관련성 스코어링
-    
-    각 후보에 대해 0~10점 관련성 점수를 매김
-    """
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
-    
-    scored_candidates = []
-    
-    progress_bar = st.progress(0)
-    total = len(candidates)
-    
-    for idx, candidate in enumerate(candidates):
-        try:
-            # 후보 문서 정보 추출
-            description = candidate.get('description', '')
-            name = candidate.get('name', '')
-            category = candidate.get('category', '')
-            
-            # 데이터에서 추가 정보 추출
-            data = candidate.get('data', {})
-            if isinstance(data, dict):
-                content = data.get('content', '')
-                step = data.get('step', '')
-                pre_condition = data.get('pre_condition', '')
-            else:
-                content = ''
-                step = ''
-                pre_condition = ''
-            
-            # 텍스트 조합 (최대 500자)
-            doc_text = f"""
-카테고리: {category}
-제목: {name}
-설명: {description[:200]}
-사전조건: {pre_condition[:100]}
-테스트 단계: {step[:100]}
-추가내용: {content[:100]}
-            """.strip()
-            
-            # Gemini에게 관련성 평가 요청
-            prompt = f"""
-당신은 테스트 케이스 관련성 평가 전문가입니다.
+    with stage(f"rerank.{method}", candidates=len(candidates), top_k=top_k):
+        if method == "similarity":
+            return rerank_by_similarity(candidates, top_k)
+        elif method == "gemini":
+            return rerank_with_gemini(query, candidates, top_k)
+        elif method == "cosine":
+            return rerank_with_cosine(query, candidates, top_k)
+        elif method == "hybrid":
+            return rerank_hybrid(query, candidates, top_k)
+        else:
+            # 기본: 벡터 검색 결과 그대로
+            return candidates[:top_k]
 
-[사용자 질문]
-{query}
 
-[테스트 케이스]
-{doc_text}
+def rerank_by_similarity(candidates: list, top_k: int):
+    """벡터 유사도 순위 (LLM 재랭킹 대체 경로)"""
+    return sorted(candidates, key=lambda c: c.get('similarity', 0), reverse=True)[:top_k]
 
-위 테스트 케이스가 사용자 질문과 얼마나 관련이 있는지 0~10점으로 평가하세요.
 
-평가 기준:
-- 10점: 질문에 직접적으로 답변할 수 있는 완벽한 케이스
-- 7~9점: 질문과 매우 관련 있는 케이스
-- 4~6점: 질문과 부분적으로 관련 있는 케이스
-- 1~3점: 질문과 약간 관련 있는 케이스
-- 0점: 전혀 관련 없는 케이스
+def score_relevance_batch(items: list, model: str, gateway=None, router=None) -> list:
+    """(질문, 후보 텍스트) 목록을 프롬프트 1개로 점수 (마이크로 배치 처리 함수, 출력 토큰은 rerank 라우팅 기준)"""
+    gateway = gateway or get_llm_gateway()
+    router = router or get_model_router()
+    response_text = gateway.generate(
+        build_relevance_prompt(items), model,
+        **router.config('rerank', items=len(items))
+    )
+    return parse_relevance_scores(response_text, len(items))
 
-**반드시 숫자만 출력하세요.** (예: 8)
-"""
-            
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.1,
-                    max_output_tokens=10
-                )
-            )
-            
-            # 점수 추출
-            score_text = response.text.strip()
-            try:
-                score = float(score_text)
-            except:
-                # 숫자 추출 시도
-                import re
-                numbers = re.findall(r'\d+\.?\d*', score_text)
-                score = float(numbers[0]) if numbers else 5.0
-            
-            # 점수 범위 제한
-            score = max(0, min(10, score))
-            
-            scored_candidates.append({
-                'data': candidate,
-                'score': score,
-                'vector_similarity': candidate.get('similarity', 0)
-            })
-            
-            # 진행률 업데이트
-            progress_bar.progress((idx + 1) / total)
-            
-        except Exception as e:
-            # 에러 발생 시 기본 점수
-            scored_candidates.append({
-                'data': candidate,
-                'score': 5.0,
-                'vector_similarity': candidate.get('similarity', 0)
-            })
-    
+
+def score_candidates(query: str, candidates: list, doc_text=relevance_doc_text):
+    """
+    후보별 0~10 관련성 점수 (실패한 후보는 None)
+
+    모든 후보를 한꺼번에 배치기에 등록 → 다른 세션 요청과 함께 프롬프트 몇 개로 처리
+    생성용 시간(RERANK_RESERVE_SECONDS)이 남지 않으면 기다리지 않고 None
+    """
+    batcher = get_micro_batchers()['rerank']
+    model = get_model_router().model('rerank')
+    futures = [batcher.submit((query, doc_text(candidate)), model) for candidate in candidates]
+
+    progress_bar = st.progress(0)
+    scores = []
+    for idx, future in enumerate(futures):
+        try:
+            scores.append(batch_result(future, RERANK_RESERVE_SECONDS))
+        except Exception:
+            scores.append(None)
+        progress_bar.progress((idx + 1) / len(futures))
     progress_bar.empty()
+    return scores
+
+
+def rerank_with_gemini(query: str, candidates: list, top_k: int):
+    """
+    Gemini AI를 사용한 관련성 스코어링
+    
+    각 후보에 대해 0~10점 관련성 점수를 매김
+    """
+    scored_candidates = []
+
+    for candidate, score in zip(candidates, score_candidates(query, candidates)):
+        if score is None:
+            # 배치 실패 / 브레이커 차단 / 시간 부족 → 벡터 유사도를 0~10 점수로 사용 (고정 5.0이면 순위가 뒤섞임)
+            score = candidate.get('similarity', 0) * 10
+
+        scored_candidates.append({
+            'data': candidate,
+            'score': score,
+            'vector_similarity': candidate.get('similarity', 0)
+        })
     
     # 점수 기준 정렬
     scored_candidates.sort(key=lambda x: x['score'], reverse=True)
@@ -323,21 +1186,23 @@ def rerank_with_cosine(query: str, candidates: list, top_k: int):
         return candidates[:top_k]
     
     query_vec = np.array(query_embedding)
+
+    # 후보의 임베딩은 Supabase에서 반환 안 됨 → description 임베딩을 한꺼번에 배치기에 등록
+    model, dim = get_active_embedding_model()
+    batcher = get_micro_batchers()['embed']
+    futures = [
+        batcher.submit(candidate.get('description', ''), (model, dim)) if candidate.get('description') else None
+        for candidate in candidates
+    ]
+
     scored_candidates = []
     
-    for candidate in candidates:
+    for candidate, future in zip(candidates, futures):
+        if future is None:
+            continue
+
         try:
-            # 후보의 임베딩 가져오기 (Supabase에서 반환 안 됨)
-            # 대신 description으로 임베딩 재생성
-            description = candidate.get('description', '')
-            if not description:
-                continue
-            
-            candidate_embedding = generate_embedding(description)
-            if not candidate_embedding:
-                continue
-            
-            candidate_vec = np.array(candidate_embedding)
+            candidate_vec = np.array(batch_result(future))
             
             # 코사인 유사도 계산
             cosine_sim = np.dot(query_vec, candidate_vec) / (
@@ -367,59 +1232,35 @@ def rerank_hybrid(query: str, candidates: list, top_k: int):
     
     최종 점수 = (Gemini 점수 * 0.7) + (벡터 유사도 * 10 * 0.3)
     """
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
-    
     scored_candidates = []
-    progress_bar = st.progress(0)
-    total = len(candidates)
-    
-    for idx, candidate in enumerate(candidates):
-        try:
-            # Gemini 점수 계산 (간소화된 버전)
-            description = candidate.get('description', '')[:300]
-            name = candidate.get('name', '')
-            
-            prompt = f"""
-질문: {query}
-테스트: {name} - {description}
 
-관련성 점수 (0~10): """
-            
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.1,
-                    max_output_tokens=5
-                )
-            )
-            
-            import re
-            numbers = re.findall(r'\d+\.?\d*', response.text.strip())
-            gemini_score = float(numbers[0]) if numbers else 5.0
-            gemini_score = max(0, min(10, gemini_score))
-            
-            # 벡터 유사도 (0~1 → 0~10 스케일)
-            vector_score = candidate.get('similarity', 0.5) * 10
-            
-            # 혼합 점수
-            final_score = (gemini_score * 0.7) + (vector_score * 0.3)
-            
-            scored_candidates.append({
-                'data': candidate,
-                'score': final_score,
-                'gemini_score': gemini_score,
-                'vector_score': vector_score
-            })
-            
-            progress_bar.progress((idx + 1) / total)
-            
-        except Exception as e:
+    # Gemini 점수 (간소화된 후보 텍스트)
+    gemini_scores = score_candidates(
+        query, candidates,
+        doc_text=lambda c: f"{c.get('name', '')} - {c.get('description', '')[:300]}"
+    )
+
+    for candidate, gemini_score in zip(candidates, gemini_scores):
+        if gemini_score is None:
+            # 에러 발생 시 벡터 유사도만으로 점수 계산
             scored_candidates.append({
                 'data': candidate,
-                'score': 5.0
+                'score': candidate.get('similarity', 0) * 10
             })
-    
-    progress_bar.empty()
+            continue
+
+        # 벡터 유사도 (0~1 → 0~10 스케일)
+        vector_score = candidate.get('similarity', 0.5) * 10
+        
+        # 혼합 점수
+        final_score = (gemini_score * 0.7) + (vector_score * 0.3)
+        
+        scored_candidates.append({
+            'data': candidate,
+            'score': final_score,
+            'gemini_score': gemini_score,
+            'vector_score': vector_score
+        })
     
     # 점수 기준 정렬
     scored_candidates.sort(key=lambda x: x['score'], reverse=True)
@@ -430,14 +1271,442 @@ def rerank_hybrid(query: str, candidates: list, top_k: int):
 # ========================================
 # 테스트 케이스 저장 (2.0과 동일)
 # ========================================
-def save_test_case_to_supabase(test_case_data):
+def embed_records(records_with_text: list):
+    """
+    (레코드, 임베딩 텍스트) 목록을 배치로 임베딩해서 레코드에 채움
+
+    임베딩 API 실패 시 embedding_stale = true 로 표시 → 백그라운드 큐가 재시도
+
+    Returns:
+        큐에 넘긴 행이 있으면 True
+    """
+    queued = False
+    for start in range(0, len(records_with_text), EMBEDDING_BATCH_SIZE):
+        batch = records_with_text[start:start + EMBEDDING_BATCH_SIZE]
+        try:
+            vectors = embed_texts([text for _, text in batch])
+            for (record, _), vector in zip(batch, vectors):
+                record['embedding'] = vector
+                record['embedding_stale'] = False
+        except Exception:
+            for record, _ in batch:
+                record['embedding_stale'] = True
+            queued = True
+    return queued
+
+
+def lookup_by_content_hash(supabase, content_hashes: list, columns: str):
+    """content_hash(인덱스)로 기존 행 조회 → 정확 중복 후보 (조회 실패 시 빈 리스트)"""
+    unique_hashes = list(set(content_hashes))
+    rows = []
+    try:
+        for start in range(0, len(unique_hashes), 100):
+            result = supabase.table(TABLE_NAME)\
+                .select(columns)\
+                .in_('content_hash', unique_hashes[start:start + 100])\
+                .execute()
+            rows.extend(result.data or [])
+    except Exception:
+        return []  # 조회 실패 시 정확 중복 검사 없이 진행
+    return rows
+
+
+def find_duplicate_group(supabase, records: list, hashes=None):
+    """
+    저장하려는 표 그룹과 행 구성이 완전히 같은 기존 그룹 찾기 (행 단위로는 판정하지 않음)
+
+    1) 행들의 content_hash로 후보 그룹 조회 (인덱스)
+    2) 후보 그룹 전체 행을 가져와 행 해시(모든 컬럼) 묶음 비교
+
+    Args:
+        records: 저장하려는 그룹 레코드 (같은 그룹은 모든 행을 포함하므로 hashes를 넘기면 앞쪽 일부만으로 충분)
+        hashes: 그룹 전체 행 해시 (기본: records의 행 해시)
+
+    Returns:
+        같은 기존 group_id (없거나 조회 실패 시 None)
+    """
+    if not DEDUP_ENABLED or not records:
+        return None
+
+    matches = lookup_by_content_hash(
+        supabase, [content_hash(test_case_embedding_text(record)) for record in records], 'data'
+    )
+    group_ids = list({
+        (row.get('data') or {}).get('group_id') for row in matches
+    } - {None})[:20]
+    if not group_ids:
+        return None
+
+    try:
+        result = supabase.table(TABLE_NAME)\
+            .select('category, name, link, description, data')\
+            .in_('data->>group_id', group_ids)\
+            .execute()
+    except Exception:
+        return None
+
+    existing_groups = {}
+    for row in result.data or []:
+        existing_groups.setdefault(row['data'].get('group_id'), []).append(row_hash(row))
+    if hashes is None:
+        hashes = [row_hash(record) for record in records]
+    return duplicate_group(hashes, existing_groups)
+
+
+def find_duplicates(supabase, records_with_text: list):
+    """
+    단건 저장(줄글, 파일 업로드 행) 전 중복 / 유사 중복 판정 + 배치 임베딩
+
+    1) 행 해시(모든 컬럼) 정확 중복 → skip (임베딩 호출 전에 제외)
+    2) 남은 행 배치 임베딩
+    3) 같은 배치 안 유사 중복 → skip, 기존 행 최근접 유사도 → skip / merge
+
+    Returns:
+        (행별 판정 리스트, 임베딩 큐 사용 여부)
+    """
+    if not DEDUP_ENABLED:
+        return [{'action': KEEP} for _ in records_with_text], embed_records(records_with_text)
+
+    # content_hash가 같은 기존 행 중 모든 컬럼이 같은 행만 정확 중복
+    matches = lookup_by_content_hash(
+        supabase,
+        [record['content_hash'] for record, _ in records_with_text],
+        'id, category, name, link, description, data'
+    )
+    existing = {row_hash(row): row['id'] for row in matches}
+
+    decisions = exact_duplicates([row_hash(record) for record, _ in records_with_text], existing)
+    remaining = [i for i, d in enumerate(decisions) if d['action'] == KEEP]
+    queued = embed_records([records_with_text[i] for i in remaining])
+
+    # 같은 배치 안 유사 중복 (행렬 연산 1회)
+    vectors = [records_with_text[i][0].get('embedding') for i in remaining]
+    for i, d in zip(remaining, batch_near_duplicates(vectors, DEDUP_SKIP_THRESHOLD)):
+        decisions[i] = d
+
+    # 기존 행과 유사 중복 (벡터마다 최근접 1개, RPC 1회)
+    candidates = [
+        i for i in remaining
+        if decisions[i]['action'] == KEEP and records_with_text[i][0].get('embedding') is not None
+    ]
+    if candidates:
+        try:
+            result = supabase.rpc('nearest_test_cases', {
+                'p_embeddings': [records_with_text[i][0]['embedding'] for i in candidates],
+                'p_threshold': DEDUP_MERGE_THRESHOLD
+            }).execute()
+            for row in result.data or []:
+                decisions[candidates[row['idx']]] = existing_near_duplicate(
+                    row['similarity'], row['id'], DEDUP_SKIP_THRESHOLD, DEDUP_MERGE_THRESHOLD
+                )
+        except Exception:
+            pass  # sql/006_dedup.sql 미적용 등 → 유사 중복 검사 없이 저장
+
+    return decisions, queued
+
+
+def insert_test_case_records(supabase, records_with_text: list, dedup=True):
+    """
+    (레코드, 임베딩 텍스트) 목록을 배치 임베딩 후 한 번의 insert로 저장
+    모든 테스트 케이스 저장 경로가 공용으로 사용
+
+    dedup=True (단건 저장): 행마다 중복 판정
+    - skip: 저장하지 않음
+    - merge: 저장하지 않고 기존 행 data.merged_from에 출처(group_id 또는 제목) 기록
+    - keep: insert
+    dedup=False (표 그룹 행): 모든 행 저장 (그룹 단위 중복은 호출 측에서 find_duplicate_group으로 판정)
+
+    Returns:
+        {'keep': n, 'skip': n, 'merge': n}
+    """
+    for record, embedding_text in records_with_text:
+        record['content_hash'] = content_hash(embedding_text)
+
+    if dedup:
+        decisions, queued = find_duplicates(supabase, records_with_text)
+    else:
+        decisions, queued = [{'action': KEEP} for _ in records_with_text], embed_records(records_with_text)
+
+    records = [record for (record, _), d in zip(records_with_text, decisions) if d['action'] == KEEP]
+    if records:
+        try:
+            supabase.table(TABLE_NAME).insert(records, returning='minimal').execute()
+        except Exception as e:
+            refresh_active_embedding_model(e)  # 모델 교체 직후면 다음 시도는 새 모델로
+            raise
+
+    merges = [
+        {'id': d['target_id'], 'source': record['data'].get('group_id') or record.get('name', '')}
+        for (record, _), d in zip(records_with_text, decisions) if d['action'] == MERGE
+    ]
+    if merges:
+        supabase.rpc('merge_test_case_duplicates', {'p_merges': merges}).execute()
+
+    if queued:
+        get_embedding_worker().notify()
+    return summarize(decisions)
+
+
+def inserted_ingest_keys(supabase, group_id: str, keys: list) -> set:
+    """그룹에 이미 저장된 저장 작업 행 키 (data.ingest_key)"""
+    if not keys:
+        return set()
+    result = supabase.table(TABLE_NAME)\
+        .select('data')\
+        .eq('data->>group_id', group_id)\
+        .in_('data->>ingest_key', keys)\
+        .execute()
+    return {(row.get('data') or {}).get('ingest_key') for row in result.data or []}
+
+
+def bulk_insert_table_rows(table_data: list, group_id: str, category: str, start_no=1,
+                           input_type="table_group", row_keys=None):
+    """
+    표 형식 행 묶음을 배치 임베딩 + 한 번의 insert로 저장 (저장 작업 큐 / 대용량 가져오기용)
+
+    같은 그룹의 행이므로 행 단위 중복 제거는 하지 않음 (그룹 단위 판정은 등록 시 enqueue_table_group)
+
+    Args:
+        table_data: 정규화된 표 행 리스트 (NO, CATEGORY, DEPTH 1, ... 키, 빈 행은 제외됨)
+        group_id: 그룹 ID
+        category: 저장할 카테고리
+        start_no: NO가 비어 있을 때 쓸 시작 번호
+        input_type: data.input_type ("table_group", "ai_generated_group")
+        row_keys: 행별 고유 키 (저장 작업의 작업 ID + 행 번호) → 이미 저장된 키의 행은 다시 넣지 않음
+
+    Returns:
+        {'keep': n, 'skip': n, 'merge': n} (연결 실패 시 None, 이미 저장돼 있던 행은 keep에 포함)
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return None
+    if not table_data:
+        return summarize([])
+
+    records = table_to_records(
+        table_data, group_id, category, start_no=start_no, input_type=input_type, row_keys=row_keys
+    )
+    already_inserted = 0
+    if row_keys is not None:
+        # 이전 실행이 insert 후 완료 기록 전에 멈춘 배치 → 저장된 행은 건너뜀 (조회 실패 시 배치 실패로 재시도)
+        inserted = inserted_ingest_keys(supabase, group_id, [record['data']['ingest_key'] for record in records])
+        records = [record for record in records if record['data']['ingest_key'] not in inserted]
+        already_inserted = len(inserted)
+
+    report = insert_test_case_records(
+        supabase, [(record, test_case_embedding_text(record)) for record in records], dedup=False
+    )
+    report[KEEP] += already_inserted
+    return report
+
+
+def process_ingest_batch(rows: list, job: dict):
+    """저장 작업 큐 워커가 호출: 표 형식 행 배치를 임베딩 + 일괄 insert"""
+    row_nos = job.get('row_nos')
+    report = bulk_insert_table_rows(
+        rows, job['group_id'], job.get('category') or "입력 그룹", start_no=job.get('start_no', 1),
+        # AI 생성 그룹은 그대로, 표 저장 / 파일 가져오기는 표 그룹으로 저장
+        input_type="ai_generated_group" if job['kind'] == "ai_generated_group" else "table_group",
+        # 재처리(insert 후 완료 기록 전 종료)되어도 같은 행을 두 번 넣지 않도록 행마다 고정 키
+        row_keys=[f"{job['id']}:{row_no}" for row_no in row_nos] if row_nos else None
+    )
+    if report is None:
+        raise RuntimeError("Supabase 연결 실패")
+    return report[KEEP]
+
+
+def ingest_target_exists(job: dict):
+    """완료된 저장 작업의 그룹이 아직 있는지 (삭제됐으면 같은 요청이라도 다시 저장, 조회 실패 시 있다고 봄)"""
+    supabase = get_supabase_client()
+    if not supabase or not job.get('group_id'):
+        return True
+    try:
+        result = supabase.table(TABLE_NAME)\
+            .select('id')\
+            .eq('data->>group_id', job['group_id'])\
+            .limit(1)\
+            .execute()
+        return bool(result.data)
+    except Exception:
+        return True
+
+
+@st.cache_resource
+def get_ingest_queue():
+    """프로세스당 1개의 저장 작업 큐 (최초 호출 시 워커 시작 → 남은 작업 이어서 처리)"""
+    return IngestJobQueue(
+        INGEST_JOB_DB,
+        process_batch=process_ingest_batch,
+        workers=INGEST_WORKERS,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        idempotency_ttl=IDEMPOTENCY_TTL_MINUTES * 60,
+        target_exists=ingest_target_exists
+    ).start()
+
+
+def table_row_hashes(table_data, category: str, input_type="table_group"):
+    """표 행 → 저장될 레코드의 행 해시 (group_id는 해시에 들어가지 않음 → 청크마다 누적 가능)"""
+    return [row_hash(record) for record in table_to_records(table_data, None, category, input_type=input_type)]
+
+
+def find_duplicate_table_group(table_data, category: str, input_type="table_group", hashes=None):
+    """
+    표 행 그대로 그룹 단위 정확 중복 판정 (표 / AI 생성 저장, 파일 직접 가져오기 공용)
+
+    Args:
+        table_data: 저장하려는 표 행 (hashes를 넘기면 후보 조회용 앞쪽 청크만 있어도 됨)
+        category: 저장할 카테고리
+        hashes: 그룹 전체 행 해시 (청크로 읽는 파일은 table_row_hashes로 누적)
+
+    Returns:
+        같은 기존 group_id (없거나 연결/조회 실패 시 None)
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return None
+    records = table_to_records(table_data, None, category, input_type=input_type)
+    return find_duplicate_group(supabase, records, hashes=hashes)
+
+
+def enqueue_table_group(table_data: list, group_id: str, category: str, kind="table_group", nonce=None):
+    """
+    표 형식 그룹 저장을 작업 큐에 등록 (바로 반환)
+
+    - 같은 저장 동작(nonce + kind + category + 행)이 다시 들어오면(더블 클릭, rerun)
+      임베딩/insert 없이 이전 작업 ID를 그대로 반환 (IDEMPOTENCY_TTL_MINUTES 이내, 그룹이 삭제됐으면 새로 저장)
+    - 행 구성이 완전히 같은 그룹이 이미 저장되어 있으면 작업을 만들지 않음 (행 단위로는 빼지 않음)
+
+    Args:
+        nonce: 저장 동작 범위 (세션 + 폼 상태), 다른 nonce면 같은 내용이라도 새 작업
+
+    Returns:
+        {'job_id': 작업 ID 또는 None, 'reused': 이전 작업을 반환했으면 True,
+         'duplicate_group': 같은 기존 group_id 또는 None}
+    """
+    input_type = "ai_generated_group" if kind == "ai_generated_group" else "table_group"
+    existing_group = find_duplicate_table_group(table_data, category, input_type=input_type)
+    if existing_group:
+        return {'job_id': None, 'reused': False, 'duplicate_group': existing_group}
+
+    idempotency_key = make_idempotency_key(kind, nonce, category, table_data)
+    job_id, created = get_ingest_queue().enqueue(
+        kind, table_data, group_id=group_id, category=category, idempotency_key=idempotency_key
+    )
+    return {'job_id': job_id, 'reused': not created, 'duplicate_group': None}
+
+
+def edit_test_case_group(group_id: str, stored_rows: list, table_data: list, category=None):
+    """
+    표 그룹 수정 (변경분만 반영)
+
+    편집 표의 i번째 행 ↔ 저장된 i번째 행(id 오름차순)의 표 컬럼 8개(GROUP_ROW_FIELDS)만 비교해서
+    - 바뀐 행만 update (표 컬럼만 덮어씀 → input_type, merged_from 등 다른 data 키는 유지,
+      임베딩 텍스트가 바뀐 행만 재임베딩)
+    - 추가된 행만 insert (그룹의 input_type 그대로)
+    - 삭제/비워진 행은 한 번에 delete
+    update/insert/delete는 apply_test_case_group_edit RPC 안에서 하나의 트랜잭션으로 실행
+
+    Args:
+        group_id: 그룹 ID
+        stored_rows: 저장된 그룹 행 (id 오름차순)
+        table_data: 편집된 표 (DataFrame 또는 NO, CATEGORY, DEPTH 1, ... 키의 행 리스트)
+        category: 추가 행의 카테고리 (기본: 기존 행과 동일)
+
+    Returns:
+        {'updated': n, 'inserted': n, 'deleted': n} 또는 실패 시 None
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return None
+
+    if category is None:
+        category = stored_rows[0].get('category', '미분류') if stored_rows else '미분류'
+    group_input_type = (stored_rows[0].get('data') or {}).get('input_type') if stored_rows else None
+
+    updates, inserts, delete_ids = [], [], []
+    to_embed = []
+
+    try:
+        # 편집 표 전체를 한 번에 정규화 (빈 행도 위치 유지)
+        records = table_to_records(table_data, group_id, category, drop_incomplete=False)
+
+        for idx, record in enumerate(records):
+            stored = stored_rows[idx] if idx < len(stored_rows) else None
+
+            # 비워진 행 = 삭제
+            if not record['data']['category'] and not record['data']['depth1']:
+                if stored:
+                    delete_ids.append(stored['id'])
+                continue
+
+            if stored:
+                stored_data = stored.get('data') or {}
+                fields = {field: record['data'][field] for field in GROUP_ROW_FIELDS}
+                if (all(fields[field] == str(stored_data.get(field) or '') for field in GROUP_ROW_FIELDS)
+                        and record['name'] == stored.get('name')
+                        and record['description'] == stored.get('description')):
+                    continue
+
+                embedding_text = test_case_embedding_text({**record, 'data': {**stored_data, **fields}})
+                new_hash = content_hash(embedding_text)
+                update = {
+                    'id': stored['id'],
+                    'name': record['name'],
+                    'description': record['description'],
+                    'data': fields  # RPC가 기존 data에 병합
+                }
+                if new_hash != stored.get('content_hash'):
+                    update['content_hash'] = new_hash
+                    to_embed.append((update, embedding_text))
+                updates.append(update)
+            else:
+                if group_input_type:
+                    record['data']['input_type'] = group_input_type
+                embedding_text = test_case_embedding_text(record)
+                record['content_hash'] = content_hash(embedding_text)
+                inserts.append(record)
+                to_embed.append((record, embedding_text))
+
+        # 줄어든 행 = 삭제
+        delete_ids.extend(stored['id'] for stored in stored_rows[len(records):])
+
+        if not (updates or inserts or delete_ids):
+            return {'updated': 0, 'inserted': 0, 'deleted': 0}
+
+        queued = embed_records(to_embed)
+
+        try:
+            result = supabase.rpc('apply_test_case_group_edit', {
+                'p_updates': updates,
+                'p_inserts': inserts,
+                'p_delete_ids': delete_ids
+            }).execute()
+        except Exception as e:
+            refresh_active_embedding_model(e)
+            raise
+
+        if queued:
+            get_embedding_worker().notify()
+
+        return result.data
+
+    except Exception as e:
+        st.error(f"❌ 그룹 수정 실패: {str(e)}")
+        return None
+
+
+def save_test_case_to_supabase(test_case_data, report=None):
     """
-    테스트 케이스를 Supabase에 저장
+    테스트 케이스를 Supabase에 저장 (중복 / 유사 중복은 제외)
+
+    - 표 그룹: 행 구성이 완전히 같은 기존 그룹이 있으면 그룹 전체를 저장하지 않음 (행 단위로는 빼지 않음)
+    - 줄글 / 파일 업로드: 행마다 정확 중복 / 유사 중복 판정
     
     Args:
         test_case_data: dict 형태의 테스트 케이스
-            - input_type: "table_group", "free_form", "file_upload"
+            - input_type: "table_group", "ai_generated_group", "free_form", "file_upload"
             - category, name, link, description, data 등
+        report: dict를 넘기면 중복 제거 결과({'keep', 'skip', 'merge'}, 그룹 중복이면 'duplicate_group')를 채워 줌
     
     Returns:
         저장된 케이스 수
@@ -447,10 +1716,10 @@ def save_test_case_to_supabase(test_case_data):
         return 0
     
     input_type = test_case_data.get("input_type", "unknown")
-    saved_count = 0
+    records = []
     
     try:
-        if input_type == "table_group":
+        if input_type in ("table_group", "ai_generated_group"):
             # 표 형식: 각 행을 개별 케이스로 저장
             group_id = test_case_data.get("group_id")
             if not group_id:
@@ -458,47 +1727,13 @@ def save_test_case_to_supabase(test_case_data):
             
             table_data = test_case_data.get("table_data", [])
             category = test_case_data.get("category", "미분류")
-            
-            for idx, row in enumerate(table_data, 1):
-                # 빈 행 필터링
-                if not row.get('CATEGORY') and not row.get('DEPTH 1'):
-                    continue
-                
-                embedding = generate_embedding(
-                    f"{row.get('CATEGORY', '')} {row.get('DEPTH 1', '')} "
-                    f"{row.get('DEPTH 2', '')} {row.get('STEP', '')}"
-                )
-                
-                insert_data = {
-                    "category": category,
-                    "name": f"{row.get('DEPTH 1', '')} - {row.get('DEPTH 2', '')}",
-                    "link": "",
-                    "description": row.get('STEP', ''),
-                    "data": {
-                        "group_id": group_id,
-                        "input_type": "table_group",
-                        "no": row.get('NO', idx),
-                        "category": row.get('CATEGORY', ''),
-                        "depth1": row.get('DEPTH 1', ''),
-                        "depth2": row.get('DEPTH 2', ''),
-                        "depth3": row.get('DEPTH 3', ''),
-                        "pre_condition": row.get('PRE-CONDITION', ''),
-                        "step": row.get('STEP', ''),
-                        "expect_result": row.get('EXPECT RESULT', '')
-                    },
-                    "embedding": embedding
-                }
-                
-                supabase.table(TABLE_NAME).insert(insert_data).execute()
-                saved_count += 1
+
+            # CATEGORY, DEPTH 1 없는 행은 table_to_records가 제외
+            records = table_to_records(table_data, group_id, category, input_type=input_type)
         
         elif input_type == "free_form":
             # 줄글 형식: 단일 케이스로 저장
-            embedding = generate_embedding(
-                f"{test_case_data.get('name', '')} {test_case_data.get('description', '')}"
-            )
-            
-            insert_data = {
+            records.append({
                 "category": test_case_data.get("category", "미분류"),
                 "name": test_case_data.get("name", ""),
                 "link": test_case_data.get("link", ""),
@@ -506,12 +1741,8 @@ def save_test_case_to_supabase(test_case_data):
                 "data": {
                     "input_type": "free_form",
                     "content": test_case_data.get("content", "")
-                },
-                "embedding": embedding
-            }
-            
-            supabase.table(TABLE_NAME).insert(insert_data).execute()
-            saved_count = 1
+                }
+            })
         
         elif input_type == "file_upload":
             # 파일 업로드: 각 행을 개별 케이스로 저장
@@ -522,11 +1753,7 @@ def save_test_case_to_supabase(test_case_data):
                 if not row.get('제목'):
                     continue
                 
-                embedding = generate_embedding(
-                    f"{row.get('제목', '')} {row.get('내용', '')}"
-                )
-                
-                insert_data = {
+                records.append({
                     "category": category,
                     "name": row.get('제목', ''),
                     "link": row.get('링크', ''),
@@ -534,44 +1761,142 @@ def save_test_case_to_supabase(test_case_data):
                     "data": {
                         "input_type": "file_upload",
                         "content": row.get('추가정보', '')
-                    },
-                    "embedding": embedding
-                }
-                
-                supabase.table(TABLE_NAME).insert(insert_data).execute()
-                saved_count += 1
-        
-        return saved_count
+                    }
+                })
+
+        if not records:
+            return 0
+
+        is_group = input_type in ("table_group", "ai_generated_group")
+        if is_group:
+            existing_group = find_duplicate_group(supabase, records)
+            if existing_group:
+                if report is not None:
+                    report.update({KEEP: 0, SKIP: len(records), MERGE: 0, 'duplicate_group': existing_group})
+                return 0
+
+        result = insert_test_case_records(
+            supabase, [(record, test_case_embedding_text(record)) for record in records], dedup=not is_group
+        )
+        if report is not None:
+            report.update(result)
+        return result[KEEP]
         
     except Exception as e:
         st.error(f"❌ 저장 실패: {str(e)}")
         return 0
 
 
+# ========================================
+# 테스트 케이스 삭제 (단일 요청)
+# ========================================
+def delete_test_case_group(group_id: str):
+    """
+    group_id가 같은 행 전체를 한 번의 delete 문으로 삭제
+
+    Returns:
+        삭제된 행 수 (실패 시 None)
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return None
+
+    try:
+        result = supabase.table(TABLE_NAME)\
+            .delete(count='exact', returning='minimal')\
+            .eq('data->>group_id', group_id)\
+            .execute()
+        return result.count or 0
+    except Exception as e:
+        st.error(f"❌ 그룹 삭제 실패: {str(e)}")
+        return None
+
+
+def delete_test_cases(ids: list):
+    """
+    id 목록을 한 번의 delete 문으로 삭제
+
+    Returns:
+        삭제된 행 수 (실패 시 None)
+    """
+    if not ids:
+        return 0
+
+    supabase = get_supabase_client()
+    if not supabase:
+        return None
+
+    try:
+        result = supabase.table(TABLE_NAME)\
+            .delete(count='exact', returning='minimal')\
+            .in_('id', ids)\
+            .execute()
+        return result.count or 0
+    except Exception as e:
+        st.error(f"❌ 삭제 실패: {str(e)}")
+        return None
+
+
 def save_spec_doc_to_supabase(spec_doc_data):
     """
-    기획 문서를 Supabase에 저장
+    기획 문서를 Supabase에 저장 (link 기준 upsert, link가 없으면 제목 + 문서 유형 기준)
+
+    - 같은 문서가 없으면 insert
+    - 내용(content_hash)이 같으면 임베딩 호출 없이 메타데이터만 갱신
+    - 내용이 바뀌었으면 기존 행을 새 내용 + 새 임베딩으로 update (이전 버전 행을 남기지 않음)
+
+    Returns:
+        "inserted" / "updated" / "unchanged" (실패 시 False)
     """
     supabase = get_supabase_client()
     if not supabase:
         return False
     
     try:
-        embedding = generate_embedding(
-            f"{spec_doc_data.get('title', '')} {spec_doc_data.get('content', '')}"
-        )
-        
-        insert_data = {
+        doc = {
             "title": spec_doc_data.get("title", ""),
             "doc_type": spec_doc_data.get("doc_type", "Notion"),
             "link": spec_doc_data.get("link", ""),
-            "content": spec_doc_data.get("content", ""),
-            "embedding": embedding
+            "content": spec_doc_data.get("content", "")
         }
-        
-        supabase.table(SPEC_TABLE_NAME).insert(insert_data).execute()
-        return True
+
+        embedding_text = spec_doc_embedding_text(doc)
+        doc["content_hash"] = content_hash(embedding_text)
+
+        query = supabase.table(SPEC_TABLE_NAME).select('id, title, doc_type, content_hash')
+        if doc["link"]:
+            query = query.eq('link', doc["link"])
+        else:
+            query = query.eq('title', doc["title"]).eq('doc_type', doc["doc_type"])
+        existing = query.order('id', desc=True).limit(1).execute().data
+        existing = existing[0] if existing else None
+
+        if existing and existing.get('content_hash') == doc["content_hash"]:
+            # 내용 동일 → 임베딩 생략
+            if existing.get('title') != doc["title"] or existing.get('doc_type') != doc["doc_type"]:
+                supabase.table(SPEC_TABLE_NAME)\
+                    .update({'title': doc["title"], 'doc_type': doc["doc_type"]}, returning='minimal')\
+                    .eq('id', existing['id'])\
+                    .execute()
+            return "unchanged"
+
+        queued = embed_records([(doc, embedding_text)])
+
+        if existing:
+            supabase.table(SPEC_TABLE_NAME)\
+                .update(doc, returning='minimal')\
+                .eq('id', existing['id'])\
+                .execute()
+            status = "updated"
+        else:
+            supabase.table(SPEC_TABLE_NAME).insert(doc, returning='minimal').execute()
+            status = "inserted"
+
+        if queued:
+            get_embedding_worker().notify()
+        return status
         
     except Exception as e:
+        refresh_active_embedding_model(e)
         st.error(f"❌ 기획 문서 저장 실패: {str(e)}")
         return False
@@ -0,0 +1,73 @@
+"""
+대용량 CSV/Excel 직접 가져오기
+- 파일 전체를 data_editor/세션에 올리지 않고 청크 단위로 읽음
+- xlsx는 openpyxl read-only 모드로 한 행씩 스트리밍
+- 청크마다 컬럼 정규화(table_rows, 벡터 연산) → 호출 측에서 배치 임베딩 + 일괄 insert
+"""
+
+import pandas as pd
+
+from table_rows import TABLE_COLUMNS, clean_table
+
+# Excel 지원 확인
+try:
+    import openpyxl
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+
+def iter_table_chunks(uploaded_file, chunk_size=200):
+    """
+    업로드 파일을 chunk_size 행씩 DataFrame으로 반환 (제너레이터)
+
+    Yields:
+        (청크 DataFrame, 진행률 0~1 또는 알 수 없으면 None)
+
+    Raises:
+        ValueError: 필수 컬럼이 없는 경우
+    """
+    if uploaded_file.name.endswith('.csv'):
+        file_size = getattr(uploaded_file, 'size', 0)
+        reader = pd.read_csv(uploaded_file, chunksize=chunk_size, dtype=str, keep_default_na=False)
+        for chunk in reader:
+            check_columns(chunk.columns)
+            progress = min(uploaded_file.tell() / file_size, 1.0) if file_size else None
+            yield chunk, progress
+        return
+
+    if not EXCEL_AVAILABLE:
+        raise ValueError("openpyxl이 설치되어 있지 않아 Excel 파일을 읽을 수 없습니다.")
+
+    workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.active
+        total_rows = (worksheet.max_row or 1) - 1  # 헤더 제외 (read-only 모드는 시트 dimension 기준)
+        rows = worksheet.iter_rows(values_only=True)
+        header = [str(col).strip() if col is not None else '' for col in next(rows, [])]
+        check_columns(header)
+
+        read_rows = 0
+        buffer = []
+        for values in rows:
+            buffer.append(values)
+            if len(buffer) >= chunk_size:
+                read_rows += len(buffer)
+                yield pd.DataFrame(buffer, columns=header), (min(read_rows / total_rows, 1.0) if total_rows > 0 else None)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header), 1.0
+    finally:
+        workbook.close()
+
+
+def check_columns(columns):
+    """표 양식 컬럼이 모두 있는지 확인"""
+    missing = [col for col in TABLE_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"컬럼명이 일치하지 않습니다. 누락: {', '.join(missing)}")
+
+
+def normalize_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """청크 정규화 (표 양식 컬럼만, 빈 값 정리, CATEGORY/DEPTH 1 없는 행 제외)"""
+    return clean_table(chunk)
@@ -0,0 +1,128 @@
+"""
+표 형식 테스트 케이스 정규화 (표 저장, 그룹 수정, 파일 업로드 공용)
+- 행 단위 루프(iterrows, 셀마다 pd.isna/str) 없이 DataFrame 연산으로 처리
+- 컬럼 맞춤 → 빈 값('nan', 'None', NaN) 정리 → 필수 컬럼 필터 → test_cases 레코드 변환
+"""
+
+import pandas as pd
+
+TABLE_COLUMNS = ['NO', 'CATEGORY', 'DEPTH 1', 'DEPTH 2', 'DEPTH 3', 'PRE-CONDITION', 'STEP', 'EXPECT RESULT']
+REQUIRED_COLUMNS = ['CATEGORY', 'DEPTH 1']
+
+# 표 컬럼 → 레코드 data 키
+DATA_FIELDS = {
+    'NO': 'no',
+    'CATEGORY': 'category',
+    'DEPTH 1': 'depth1',
+    'DEPTH 2': 'depth2',
+    'DEPTH 3': 'depth3',
+    'PRE-CONDITION': 'pre_condition',
+    'STEP': 'step',
+    'EXPECT RESULT': 'expect_result',
+}
+
+# 문자열 변환 후 빈 값으로 볼 값
+EMPTY_VALUES = ['nan', 'NaN', 'None', '<NA>', 'NaT']
+
+
+def empty_table(rows=1) -> pd.DataFrame:
+    """빈 표 (편집기 초기값)"""
+    return pd.DataFrame({col: [''] * rows for col in TABLE_COLUMNS})
+
+
+def clean_table(df: pd.DataFrame, drop_incomplete=True, start_no=1) -> pd.DataFrame:
+    """
+    표 DataFrame 정규화
+
+    Args:
+        df: 편집기/업로드 DataFrame (컬럼 일부가 없어도 됨)
+        drop_incomplete: True면 CATEGORY, DEPTH 1 중 하나라도 빈 행 제외
+            (그룹 수정처럼 행 위치가 의미 있으면 False → 빈 행도 유지)
+        start_no: NO 컬럼이 아예 없을 때 채울 시작 번호
+
+    Returns:
+        TABLE_COLUMNS만 가진 문자열 DataFrame (앞뒤 공백 제거, 빈 값은 '')
+    """
+    # 같은 이름의 컬럼이 반복되면 첫 번째만 사용
+    # (엑셀 헤더 뒤쪽의 빈 칸/서식만 있는 칸은 모두 ''로 읽혀서 reindex가 실패함)
+    if df.columns.duplicated().any():
+        df = df.loc[:, ~df.columns.duplicated()]
+
+    if 'NO' not in df.columns:
+        df = df.assign(NO=range(start_no, start_no + len(df)))
+
+    table = df.reindex(columns=TABLE_COLUMNS).fillna('').astype(str)
+    columns = {}
+    for col in TABLE_COLUMNS:
+        values = table[col].str.strip()
+        columns[col] = values.mask(values.isin(EMPTY_VALUES), '')
+    table = pd.DataFrame(columns)
+    # 숫자로 읽힌 NO (1.0 → 1)
+    table['NO'] = table['NO'].str.replace(r'\.0$', '', regex=True)
+
+    if drop_incomplete:
+        table = table[complete_rows(table)]
+    return table.reset_index(drop=True)
+
+
+def complete_rows(table: pd.DataFrame) -> pd.Series:
+    """필수 컬럼(CATEGORY, DEPTH 1)이 모두 채워진 행 마스크"""
+    return (table[REQUIRED_COLUMNS] != '').all(axis=1)
+
+
+def _column_dicts(table: pd.DataFrame, keys: list) -> list:
+    """TABLE_COLUMNS 순서의 컬럼 → keys를 키로 하는 dict 리스트 (to_dict('records')보다 빠름)"""
+    return [dict(zip(keys, values)) for values in zip(*(table[col].tolist() for col in TABLE_COLUMNS))]
+
+
+def table_to_rows(df: pd.DataFrame, drop_incomplete=True) -> list:
+    """표 DataFrame → 행 dict 리스트 (NO, CATEGORY, DEPTH 1, ... 키)"""
+    return _column_dicts(clean_table(df, drop_incomplete=drop_incomplete), TABLE_COLUMNS)
+
+
+def table_to_records(table, group_id: str, category: str, start_no=1, input_type="table_group",
+                     drop_incomplete=True, row_keys=None) -> list:
+    """
+    표 행 → test_cases 레코드 리스트 (임베딩 제외)
+
+    Args:
+        table: 표 DataFrame 또는 행 dict 리스트
+        group_id: 그룹 ID
+        category: 저장할 카테고리
+        start_no: NO 컬럼이 없을 때 쓸 시작 번호
+        input_type: data.input_type ("table_group", "ai_generated_group")
+        drop_incomplete: True면 CATEGORY, DEPTH 1 중 하나라도 빈 행 제외
+            (그룹 수정처럼 행 위치가 의미 있으면 False → 빈 행도 변환)
+        row_keys: 입력 행마다 고유한 키 → data.ingest_key (저장 작업 재처리 시 이미 insert된 행 판별용)
+
+    Returns:
+        [{category, name, link, description, data}, ...] (입력 행 순서 유지)
+    """
+    if not isinstance(table, pd.DataFrame):
+        table = pd.DataFrame(list(table))
+    if table.empty:
+        return []
+    table = clean_table(table, drop_incomplete=False, start_no=start_no)
+    if row_keys is not None:
+        # 빈 행을 빼기 전에 키를 붙여야 입력 행과 키가 어긋나지 않음
+        table = table.assign(ingest_key=list(row_keys))
+    if drop_incomplete:
+        table = table[complete_rows(table)]
+
+    names = (table['DEPTH 1'] + ' - ' + table['DEPTH 2']).tolist()
+    data = _column_dicts(table, [DATA_FIELDS[col] for col in TABLE_COLUMNS])
+
+    records = [
+        {
+            "category": category,
+            "name": name,
+            "link": "",
+            "description": row_data['step'],
+            "data": {"group_id": group_id, "input_type": input_type, **row_data}
+        }
+        for name, row_data in zip(names, data)
+    ]
+    if row_keys is not None:
+        for record, key in zip(records, table['ingest_key'].tolist()):
+            record['data']['ingest_key'] = key
+    return records
@@ -0,0 +1,63 @@
+"""
+테스트 공용 설정
+- 저장소 루트 / benchmarks를 import 경로에 추가 (순수 모듈 테스트는 streamlit 없이 실행)
+- helpers: 임시 작업 폴더에 .streamlit/secrets.toml 작성 후 supabase_helpers import
+  (streamlit / supabase 패키지가 없으면 해당 테스트는 건너뜀)
+- fake_db: Supabase를 benchmarks/fake_supabase.py 인메모리 대체로 교체
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+EMBEDDING_DIM = 16
+
+# 오프라인 앱 설정 (스텁 LLM, 제한기 통과, 계측 로그 / 임베딩 큐 폴링 없음)
+TEST_SECRETS = """
+SUPABASE_URL = "http://offline.invalid"
+SUPABASE_KEY = "offline"
+GOOGLE_API_KEY = ""
+LLM_PROVIDER = "stub"
+GEMINI_RPM = 1000000
+GEMINI_TPM = 1000000000
+TIMING_LOG_PATH = ""
+EMBEDDING_QUEUE_POLL_SECONDS = 3600
+EMBEDDING_DIM = 16
+INGEST_WORKERS = 1
+"""
+
+
+@pytest.fixture(scope="session")
+def helpers(tmp_path_factory):
+    """supabase_helpers 모듈 (st.secrets는 작업 폴더의 secrets.toml을 읽으므로 import 전에 이동)"""
+    pytest.importorskip("streamlit")
+    pytest.importorskip("supabase")
+
+    workdir = tmp_path_factory.mktemp("app")
+    (workdir / ".streamlit").mkdir()
+    (workdir / ".streamlit" / "secrets.toml").write_text(TEST_SECRETS, encoding="utf-8")
+
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import supabase_helpers
+        yield supabase_helpers
+    finally:
+        os.chdir(original_cwd)
+
+
+@pytest.fixture
+def fake_db(helpers, monkeypatch):
+    """빈 인메모리 Supabase로 교체 (테스트마다 새로 만듦)"""
+    import streamlit as st
+    from fake_supabase import FakeSupabase
+
+    fake = FakeSupabase(EMBEDDING_DIM, tables=(helpers.TABLE_NAME, helpers.SPEC_TABLE_NAME))
+    monkeypatch.setattr(helpers, "get_supabase_client", lambda: fake)
+    st.cache_data.clear()
+    return fake
@@ -0,0 +1,79 @@
+from dedup import (
+    KEEP, SKIP, MERGE, row_hash, duplicate_group, exact_duplicates, batch_near_duplicates,
+    existing_near_duplicate, summarize,
+)
+from embedding_queue import content_hash, test_case_embedding_text as case_text
+from table_rows import table_to_records
+
+
+def table_row(**overrides):
+    row = {
+        'NO': '1', 'CATEGORY': '쿠폰', 'DEPTH 1': '주문서', 'DEPTH 2': '쿠폰 적용', 'DEPTH 3': '',
+        'PRE-CONDITION': '로그인 상태', 'STEP': '쿠폰 적용 후 결제', 'EXPECT RESULT': '할인된다',
+    }
+    row.update(overrides)
+    return row
+
+
+def test_rows_differing_only_in_depth3_or_expect_result_have_different_hashes():
+    """임베딩 텍스트(content_hash)가 같아도 DEPTH 3 / EXPECT RESULT가 다르면 다른 행"""
+    base, depth3, expect = table_to_records(
+        [table_row(), table_row(**{'DEPTH 3': '중복 쿠폰'}), table_row(**{'EXPECT RESULT': '오류 안내'})],
+        "g1", "쿠폰"
+    )
+
+    texts = {content_hash(case_text(r)) for r in (base, depth3, expect)}
+    assert len(texts) == 1
+    assert len({row_hash(base), row_hash(depth3), row_hash(expect)}) == 3
+
+
+def test_row_hash_ignores_provenance_and_whitespace():
+    """group_id / input_type / merged_from / ingest_key는 내용이 아님, 공백 차이와 숫자 NO도 같은 행"""
+    a = {'category': '쿠폰', 'name': 'a', 'data': {'no': 1, 'step': '쿠폰  적용', 'group_id': 'g1'}}
+    b = {'category': '쿠폰', 'name': 'a', 'data': {
+        'no': '1', 'step': '쿠폰 적용', 'group_id': 'g2', 'input_type': 'table_group', 'merged_from': ['x'],
+        'ingest_key': 'job1:1',
+    }}
+    assert row_hash(a) == row_hash(b)
+
+
+def test_duplicate_group_requires_identical_rows():
+    """행 구성이 완전히 같은(순서 무관) 그룹만 중복, 한 행만 달라도 중복 아님"""
+    rows = [table_row(NO=str(no), STEP=f"단계 {no}") for no in range(1, 4)]
+    stored = [row_hash(r) for r in table_to_records(rows, "old", "쿠폰")]
+
+    same = [row_hash(r) for r in table_to_records(list(reversed(rows)), "new", "쿠폰")]
+    assert duplicate_group(same, {"old": stored}) == "old"
+
+    changed = rows[:2] + [table_row(NO='3', STEP='단계 3', **{'EXPECT RESULT': '다른 결과'})]
+    different = [row_hash(r) for r in table_to_records(changed, "new", "쿠폰")]
+    assert duplicate_group(different, {"old": stored}) is None
+
+    # 기존 그룹의 일부만 저장 → 행 수가 달라서 중복 아님
+    assert duplicate_group(same[:2], {"old": stored}) is None
+    assert duplicate_group([], {"old": stored}) is None
+
+
+def test_exact_duplicates_against_existing_and_batch():
+    decisions = exact_duplicates(["a", "b", "a", "c"], {"c": 7})
+    assert [d['action'] for d in decisions] == [KEEP, KEEP, SKIP, SKIP]
+    assert decisions[2]['reason'] == 'batch_hash'
+    assert decisions[3]['target_id'] == 7
+
+
+def test_batch_near_duplicates_skips_only_later_similar_rows():
+    vectors = [[1.0, 0.0], [0.999, 0.01], [0.0, 1.0], None]
+    decisions = batch_near_duplicates(vectors, threshold=0.98)
+    assert [d['action'] for d in decisions] == [KEEP, SKIP, KEEP, KEEP]
+
+
+def test_existing_near_duplicate_thresholds():
+    assert existing_near_duplicate(0.99, 1, 0.98, 0.95)['action'] == SKIP
+    assert existing_near_duplicate(0.96, 1, 0.98, 0.95)['action'] == MERGE
+    assert existing_near_duplicate(0.90, 1, 0.98, 0.95)['action'] == KEEP
+    assert existing_near_duplicate(None, None, 0.98, 0.95)['action'] == KEEP
+
+
+def test_summarize():
+    decisions = exact_duplicates(["a", "a", "b"], {})
+    assert summarize(decisions) == {KEEP: 2, SKIP: 1, MERGE: 0}
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+from embedding_queue import EmbeddingWorker, content_hash, test_case_embedding_text as case_text
+
+
+class Query:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __getattr__(self, name):
+        # select / eq / lt / or_ / order / limit 체인은 조건 없이 통과
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+class Client:
+    """stale 행 조회 + RPC 호출 기록"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.rpcs = []
+
+    def table(self, name):
+        return Query(self.rows)
+
+    def rpc(self, name, params):
+        self.rpcs.append((name, params))
+        return Query([])
+
+
+def stale_rows():
+    return [
+        {'id': i, 'name': f"케이스 {i}", 'description': "bad" if i == 2 else "ok", 'data': {}}
+        for i in range(1, 4)
+    ]
+
+
+def embed(texts):
+    if any("bad" in text for text in texts):
+        raise ValueError("invalid input")
+    return [[1.0, 0.0] for _ in texts]
+
+
+def test_failing_row_does_not_block_others():
+    """배치가 실패하면 행 단위로 다시 시도 → 성공 행은 반영, 실패 행만 백오프 기록"""
+    client = Client(stale_rows())
+    worker = EmbeddingWorker(lambda: client, embed, {'test_cases': case_text},
+                             retry_base_seconds=30, retry_max_seconds=600)
+
+    assert worker.run_once()
+
+    applied = [params for name, params in client.rpcs if name == 'apply_embeddings']
+    assert [p['id'] for p in applied[0]['payload']] == [1, 3]
+    assert applied[0]['payload'][0]['content_hash'] == content_hash(case_text(stale_rows()[0]))
+
+    failures = [params for name, params in client.rpcs if name == 'record_embedding_failures']
+    assert len(failures) == 1
+    assert failures[0]['p_ids'] == [2]
+    assert failures[0]['p_error'] == "invalid input"
+    assert (failures[0]['p_base_seconds'], failures[0]['p_max_seconds']) == (30, 600)
+    assert (worker.processed, worker.failed) == (2, 1)
+
+
+def test_embed_rows_returns_errors_per_row():
+    worker = EmbeddingWorker(lambda: None, embed, {})
+    vectors, errors = worker.embed_rows(["ok", "bad", "ok"])
+    assert vectors[1] is None and vectors[0] is not None
+    assert errors == [None, "invalid input", None]
+
+
+def test_table_group_embedding_text_uses_table_columns():
+    for input_type in ("table_group", "ai_generated_group"):
+        row = {'name': 'n', 'description': 'd', 'data': {
+            'input_type': input_type, 'category': '쿠폰', 'depth1': '주문서', 'depth2': '적용', 'step': '결제',
+        }}
+        assert case_text(row) == "쿠폰 주문서 적용 결제"
+    assert case_text({'name': 'n', 'description': 'd', 'data': {}}) == "n d"
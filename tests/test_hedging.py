@@ -0,0 +1,82 @@
+import threading
+import time
+
+from hedging import Hedger, LatencyWindow
+
+
+def warmed(hedger, key="model", seconds=0.01, count=20):
+    for _ in range(count):
+        hedger.observe(key, seconds)
+    return hedger
+
+
+def test_latency_window_percentile():
+    window = LatencyWindow(size=5)
+    assert window.percentile(95) is None
+    for value in [5, 1, 4, 2, 3, 100]:
+        window.add(value)
+    # 최근 5개만 유지
+    assert window.percentile(0) == 1
+    assert window.percentile(100) == 100
+
+
+def test_no_hedge_without_enough_samples():
+    hedger = Hedger(min_samples=20)
+    calls = []
+    assert hedger.run("model", lambda cancelled: calls.append(1) or "ok") == "ok"
+    assert len(calls) == 1
+    assert hedger.hedge_delay("model") is None
+
+
+def test_slow_primary_is_hedged_and_fast_hedge_wins():
+    hedger = warmed(Hedger(min_delay_seconds=0.02, burst=1.0))
+    attempts = []
+    primary_cancelled = threading.Event()
+
+    def call(cancelled):
+        attempt = len(attempts)
+        attempts.append(attempt)
+        if attempt == 0:
+            time.sleep(0.3)
+            if cancelled.is_set():
+                primary_cancelled.set()
+            return "slow"
+        return "fast"
+
+    assert hedger.run("model", call) == "fast"
+    stats = hedger.stats()
+    assert stats['hedged'] == 1 and stats['hedge_wins'] == 1
+    # 느린 첫 시도는 응답을 버리도록 취소 신호를 받음
+    assert primary_cancelled.wait(1.0)
+
+
+def test_hedge_budget_limits_extra_calls():
+    hedger = warmed(Hedger(min_delay_seconds=0.01, burst=1.0, max_ratio=0.0))
+    attempts = []
+
+    def call(cancelled):
+        attempts.append(1)
+        time.sleep(0.05)
+        return "ok"
+
+    for _ in range(3):
+        hedger.run("model", call)
+    stats = hedger.stats()
+    assert stats['hedged'] == 1
+    assert stats['budget_denied'] == 2
+
+
+def test_invalid_response_waits_for_other_attempt():
+    hedger = warmed(Hedger(min_delay_seconds=0.02, burst=1.0))
+    attempts = []
+
+    def call(cancelled):
+        attempt = len(attempts)
+        attempts.append(attempt)
+        if attempt == 0:
+            time.sleep(0.05)
+            return ""
+        time.sleep(0.1)
+        return "valid"
+
+    assert hedger.run("model", call) == "valid"
@@ -0,0 +1,194 @@
+import threading
+
+import pytest
+
+from ingest_jobs import IngestJobQueue, make_idempotency_key
+
+
+class Store:
+    """저장 대상 흉내: group_id → 저장된 행"""
+
+    def __init__(self):
+        self.groups = {}
+
+    def process_batch(self, rows, job):
+        self.groups.setdefault(job['group_id'], []).extend(rows)
+        return len(rows)
+
+    def exists(self, job):
+        return bool(self.groups.get(job['group_id']))
+
+
+@pytest.fixture
+def store():
+    return Store()
+
+
+@pytest.fixture
+def queue(tmp_path, store):
+    return IngestJobQueue(str(tmp_path / "jobs.sqlite3"), store.process_batch, batch_size=2,
+                          target_exists=store.exists)
+
+
+def run_pending(queue):
+    while True:
+        job = queue._claim_job()
+        if job is None:
+            return
+        queue.run_job(job)
+
+
+ROWS = [{'NO': str(no), 'CATEGORY': '쿠폰', 'DEPTH 1': '주문서'} for no in range(1, 4)]
+
+
+def test_job_rows_are_processed_in_batches(queue, store):
+    batches = []
+
+    def process(rows, job):
+        batches.append((job['start_no'], job['row_nos']))
+        return store.process_batch(rows, job)
+
+    queue.process_batch = process
+    job_id, _ = queue.enqueue("table_group", ROWS, group_id="g1", category="쿠폰")
+    run_pending(queue)
+
+    assert batches == [(1, [1, 2]), (3, [3])]
+    job = queue.get_job(job_id)
+    assert (job['status'], job['rows_done'], job['total_rows']) == ('done', 3, 3)
+    assert store.groups["g1"] == ROWS
+
+
+def test_failed_batch_marks_job_failed(queue):
+    def fail(rows, job):
+        raise RuntimeError("insert 실패")
+
+    queue.process_batch = fail
+    job_id, _ = queue.enqueue("table_group", ROWS, group_id="g1")
+    run_pending(queue)
+    job = queue.get_job(job_id)
+    assert job['status'] == 'failed' and job['rows_failed'] == 3
+    assert job['error'] == "insert 실패"
+
+
+def test_running_job_resumes_after_restart(tmp_path, store):
+    """처리 도중 프로세스가 죽은 작업 → 다시 열면 pending, 완료된 행은 건너뛰고 이어서 처리"""
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = IngestJobQueue(path, store.process_batch, batch_size=2)
+    job_id, _ = queue.enqueue("table_group", ROWS, group_id="g1")
+    assert queue._claim_job()['id'] == job_id
+    with queue._connect() as conn:
+        conn.execute("update job_rows set status = 'done' where job_id = ? and row_no <= 2", (job_id,))
+
+    restarted = IngestJobQueue(path, store.process_batch, batch_size=2)
+    assert restarted.get_job(job_id)['status'] == 'pending'
+    run_pending(restarted)
+    assert store.groups["g1"] == ROWS[2:]
+
+
+def test_rows_skipped_counts_unsaved_rows(queue):
+    queue.process_batch = lambda rows, job: len(rows) - 1
+    job_id, _ = queue.enqueue("table_group", ROWS, group_id="g1")
+    run_pending(queue)
+    job = queue.get_job(job_id)
+    assert job['status'] == 'done'
+    assert job['rows_done'] == 3 and job['rows_skipped'] == 2
+
+
+def test_make_idempotency_key_is_scoped_to_nonce():
+    assert make_idempotency_key("table_group", "n1", ROWS) == make_idempotency_key("table_group", "n1", ROWS)
+    assert make_idempotency_key("table_group", "n1", ROWS) != make_idempotency_key("table_group", "n2", ROWS)
+    assert make_idempotency_key("file_import", b"abc") != make_idempotency_key("file_import", b"abd")
+
+
+def test_enqueue_reuses_job_for_same_key(queue, store):
+    key = make_idempotency_key("table_group", "n1", ROWS)
+    job_id, created = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key=key)
+    again, created_again = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key=key)
+    assert created and not created_again
+    assert again == job_id
+
+    run_pending(queue)
+    assert queue.get_job(job_id)['status'] == 'done'
+    assert queue.get_job(job_id)['rows_done'] == 3
+    # 완료 후 더블 클릭 / rerun → 다시 저장하지 않음
+    assert queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key=key) == (job_id, False)
+    assert len(store.groups["g1"]) == 3
+
+
+def test_resave_after_group_delete_inserts_again(queue, store):
+    """완료된 작업의 그룹이 삭제됐으면 같은 키라도 새 작업 → 행이 다시 저장됨"""
+    key = make_idempotency_key("table_group", "n1", ROWS)
+    first, _ = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key=key)
+    run_pending(queue)
+
+    del store.groups["g1"]
+
+    second, created = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key=key)
+    assert created and second != first
+    run_pending(queue)
+    assert len(store.groups["g1"]) == 3
+
+
+def test_expired_key_creates_new_job(tmp_path, store):
+    queue = IngestJobQueue(str(tmp_path / "jobs.sqlite3"), store.process_batch, idempotency_ttl=-1)
+    first, _ = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key="k")
+    second, created = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key="k")
+    assert created and second != first
+
+
+def test_failed_job_is_not_reused(queue):
+    def fail(rows, job):
+        raise RuntimeError("insert 실패")
+
+    queue.process_batch = fail
+    job_id, _ = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key="k")
+    run_pending(queue)
+    job = queue.get_job(job_id)
+    assert job['status'] == 'failed' and job['rows_failed'] == 3
+
+    retry, created = queue.enqueue("table_group", ROWS, group_id="g1", idempotency_key="k")
+    assert created and retry != job_id
+
+
+def test_discard_removes_rows_and_releases_key(queue):
+    job_id = queue.create_job("file_import", group_id="g1")
+    queue.add_rows(job_id, ROWS)
+    queue.discard(job_id, "파일 읽기 실패")
+
+    job = queue.get_job(job_id)
+    assert job['status'] == 'failed' and job['total_rows'] == 0
+    assert queue._claim_job() is None
+    assert queue.find_job("k") is None
+
+
+def test_submit_records_key_only_after_rows_are_added(queue):
+    job_id = queue.create_job("file_import", group_id="g1")
+    queue.add_rows(job_id, ROWS[:2])
+    # 등록 중인 draft 작업은 키로 찾을 수 없음
+    assert queue.find_job("k") is None
+    queue.add_rows(job_id, ROWS[2:])
+    assert queue.submit(job_id, idempotency_key="k") == job_id
+    assert queue.find_job("k")['id'] == job_id
+    assert queue.get_job(job_id)['total_rows'] == 3
+
+
+def test_concurrent_submits_with_same_key_keep_one_job(queue):
+    drafts = []
+    for _ in range(4):
+        job_id = queue.create_job("file_import", group_id="g1")
+        queue.add_rows(job_id, ROWS)
+        drafts.append(job_id)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda j=job_id: results.append(queue.submit(j, idempotency_key="k")))
+        for job_id in drafts
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1
+    statuses = [queue.get_job(job_id)['status'] for job_id in drafts]
+    assert statuses.count('pending') == 1 and statuses.count('failed') == 3
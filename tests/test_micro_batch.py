@@ -0,0 +1,56 @@
+import pytest
+
+from micro_batch import MicroBatcher
+
+
+def test_requests_are_batched_and_results_routed():
+    batches = []
+
+    def process(items, key):
+        batches.append((key, list(items)))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(6)]
+
+    assert [f.result(timeout=2) for f in futures] == [0, 10, 20, 30, 40, 50]
+    # 크기 상한 4 → 4개 + 2개
+    assert [len(items) for _, items in batches] == [4, 2]
+    assert batcher.stats()['largest_batch'] == 4
+
+
+def test_different_keys_are_not_mixed():
+    batches = []
+
+    def process(items, key):
+        batches.append((key, list(items)))
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=10, max_wait_ms=30)
+    futures = [batcher.submit("a", key=768), batcher.submit("b", key=256), batcher.submit("c", key=768)]
+    assert [f.result(timeout=2) for f in futures] == ["a", "b", "c"]
+    assert sorted(batches) == [(256, ["b"]), (768, ["a", "c"])]
+
+
+def test_item_errors_and_batch_errors():
+    def process(items, key):
+        if key == "broken":
+            raise RuntimeError("배치 실패")
+        return [ValueError(item) if item == "bad" else item for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=10, max_wait_ms=10)
+    good, bad = batcher.submit("ok"), batcher.submit("bad")
+    assert good.result(timeout=2) == "ok"
+    with pytest.raises(ValueError):
+        bad.result(timeout=2)
+
+    with pytest.raises(RuntimeError):
+        batcher.submit("x", key="broken").result(timeout=2)
+
+
+def test_result_count_mismatch_fails_all_requests():
+    batcher = MicroBatcher(lambda items, key: items[:1], max_batch_size=2, max_wait_ms=50)
+    futures = [batcher.submit(1), batcher.submit(2)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=2)
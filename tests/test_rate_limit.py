@@ -0,0 +1,59 @@
+import pytest
+
+from rate_limit import GeminiLimiter, TokenBucket, estimate_tokens, is_throttle_error
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+def test_is_throttle_error():
+    assert is_throttle_error(ResourceExhausted("x"))
+    assert is_throttle_error(RuntimeError("429 Too Many Requests"))
+    assert is_throttle_error(RuntimeError("RESOURCE_EXHAUSTED: quota"))
+    assert not is_throttle_error(RuntimeError("500 internal"))
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("가" * 30) == 10
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(rate_per_minute=60, burst_seconds=2)
+    assert bucket.capacity == 2.0
+    assert bucket.wait_time(1) == 0.0
+    bucket.take(2)
+    assert 0.9 < bucket.wait_time(1) <= 1.0
+
+
+def test_throttle_halves_concurrency_and_starts_cooldown():
+    limiter = GeminiLimiter(max_concurrency=8, cooldown_seconds=60)
+    with pytest.raises(ResourceExhausted):
+        with limiter.slot():
+            raise ResourceExhausted("429")
+
+    stats = limiter.stats()
+    assert stats['concurrency_limit'] == 4
+    assert stats['throttled'] == 1 and stats['in_flight'] == 0
+    assert limiter.cooldown_until > 0
+
+
+def test_success_increases_concurrency_up_to_max():
+    limiter = GeminiLimiter(max_concurrency=4)
+    limiter.concurrency_limit = 2.0
+    for _ in range(10):
+        with limiter.slot():
+            pass
+    assert limiter.stats()['concurrency_limit'] == 4
+    assert limiter.stats()['total_requests'] == 10
+
+
+def test_other_errors_keep_concurrency():
+    limiter = GeminiLimiter(max_concurrency=4)
+    limiter.concurrency_limit = 3.0
+    with pytest.raises(ValueError):
+        with limiter.slot():
+            raise ValueError("bad request")
+    assert limiter.concurrency_limit == 3.0
+    assert limiter.cooldown_until == 0.0
@@ -0,0 +1,118 @@
+"""표 그룹 저장 흐름 (supabase_helpers + 인메모리 Supabase)"""
+
+import time
+import uuid
+
+from table_rows import TABLE_COLUMNS
+
+
+def group_table(n_rows=3):
+    """DEPTH 3 / EXPECT RESULT만 다른 행이 섞인 표 (임베딩 텍스트는 모두 같음)"""
+    row = dict(zip(TABLE_COLUMNS, ['1', '쿠폰', '주문서', '쿠폰 적용', '', '로그인', '쿠폰 적용 후 결제', '할인']))
+    rows = [row, {**row, 'NO': '2', 'DEPTH 3': '중복 쿠폰'}, {**row, 'NO': '3', 'EXPECT RESULT': '오류 안내'}]
+    return rows[:n_rows]
+
+
+def stored_rows(fake, helpers, group_id):
+    return fake.table(helpers.TABLE_NAME).select('data').eq('data->>group_id', group_id).execute().data
+
+
+def wait_for_job(helpers, job_id, timeout=10):
+    queue = helpers.get_ingest_queue()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get_job(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"작업 {job_id}이 끝나지 않음")
+
+
+def test_ai_generated_group_keeps_input_type(helpers, fake_db):
+    group_id = f"g_{uuid.uuid4().hex[:8]}"
+    result = helpers.enqueue_table_group(group_table(2), group_id, '쿠폰', kind="ai_generated_group",
+                                         nonce=uuid.uuid4().hex)
+    assert wait_for_job(helpers, result['job_id'])['status'] == 'done'
+    rows = stored_rows(fake_db, helpers, group_id)
+    assert [r['data']['input_type'] for r in rows] == ["ai_generated_group"] * 2
+
+
+def test_group_keeps_rows_differing_only_in_depth3_or_expect_result(helpers, fake_db):
+    report = {}
+    saved = helpers.save_test_case_to_supabase({
+        'input_type': 'table_group', 'group_id': 'g_depth3', 'category': '쿠폰', 'table_data': group_table(),
+    }, report=report)
+
+    assert saved == 3
+    assert report['skip'] == 0 and report['merge'] == 0
+    rows = stored_rows(fake_db, helpers, 'g_depth3')
+    assert sorted(r['data']['no'] for r in rows) == ['1', '2', '3']
+
+
+def test_identical_group_is_skipped_as_a_whole(helpers, fake_db):
+    group = {'input_type': 'table_group', 'group_id': 'g_first', 'category': '쿠폰', 'table_data': group_table()}
+    assert helpers.save_test_case_to_supabase(group) == 3
+
+    report = {}
+    assert helpers.save_test_case_to_supabase({**group, 'group_id': 'g_second'}, report=report) == 0
+    assert report['duplicate_group'] == 'g_first'
+    assert stored_rows(fake_db, helpers, 'g_second') == []
+
+    # 한 행만 달라도 다른 그룹 → 전체 저장
+    changed = group_table()
+    changed[2] = {**changed[2], 'EXPECT RESULT': '다른 결과'}
+    assert helpers.save_test_case_to_supabase({**group, 'group_id': 'g_third', 'table_data': changed}) == 3
+
+
+def test_resave_after_delete_inserts_rows_again(helpers, fake_db):
+    """같은 저장 동작(nonce)이라도 그룹을 삭제한 뒤 다시 저장하면 새 작업으로 다시 insert"""
+    group_id, nonce = f"g_{uuid.uuid4().hex[:8]}", uuid.uuid4().hex
+
+    first = helpers.enqueue_table_group(group_table(), group_id, '쿠폰', nonce=nonce)
+    assert not first['reused'] and first['duplicate_group'] is None
+    assert wait_for_job(helpers, first['job_id'])['status'] == 'done'
+    assert len(stored_rows(fake_db, helpers, group_id)) == 3
+
+    # 더블 클릭 / rerun → 이전 작업 반환, 다시 저장하지 않음
+    again = helpers.enqueue_table_group(group_table(), group_id, '쿠폰', nonce=nonce)
+    assert again['duplicate_group'] == group_id or again['reused']
+    assert len(stored_rows(fake_db, helpers, group_id)) == 3
+
+    assert helpers.delete_test_case_group(group_id) == 3
+
+    resaved = helpers.enqueue_table_group(group_table(), group_id, '쿠폰', nonce=nonce)
+    assert not resaved['reused'] and resaved['job_id'] != first['job_id']
+    assert wait_for_job(helpers, resaved['job_id'])['status'] == 'done'
+    assert len(stored_rows(fake_db, helpers, group_id)) == 3
+
+
+def test_reimported_file_is_found_from_accumulated_chunk_hashes(helpers, fake_db):
+    """파일 직접 가져오기: 청크별 행 해시를 누적해서 첫 청크만으로 같은 그룹 판정"""
+    rows = [{**row, 'NO': str(no), 'STEP': f"단계 {no}"} for no, row in enumerate(group_table() * 4, 1)]
+    job = {'id': 'import1', 'kind': 'file_import', 'group_id': 'file_import_1', 'category': "입력 그룹"}
+    helpers.process_ingest_batch(rows, {**job, 'start_no': 1})
+
+    chunks = [rows[:5], rows[5:10], rows[10:]]
+    hashes = [h for chunk in chunks for h in helpers.table_row_hashes(chunk, "입력 그룹")]
+    assert helpers.find_duplicate_table_group(chunks[0], "입력 그룹", hashes=hashes) == 'file_import_1'
+
+    # 마지막 청크의 행 하나만 달라도 다른 파일
+    changed = chunks[2][:-1] + [{**chunks[2][-1], 'EXPECT RESULT': '다른 결과'}]
+    hashes = [h for chunk in (chunks[0], chunks[1], changed) for h in helpers.table_row_hashes(chunk, "입력 그룹")]
+    assert helpers.find_duplicate_table_group(chunks[0], "입력 그룹", hashes=hashes) is None
+    # 일부 행만 있는 파일도 다른 그룹
+    assert helpers.find_duplicate_table_group(chunks[0], "입력 그룹") is None
+
+
+def test_reprocessed_batch_is_not_inserted_twice(helpers, fake_db):
+    """insert 후 완료 기록 전에 워커가 죽어 같은 배치가 다시 처리돼도 행은 한 번만 저장"""
+    rows = group_table() + [dict.fromkeys(TABLE_COLUMNS, '')]
+    job = {'id': 'job_retry', 'kind': 'table_group', 'group_id': 'g_retry', 'category': '쿠폰'}
+
+    assert helpers.process_ingest_batch(rows[:2], {**job, 'start_no': 1, 'row_nos': [1, 2]}) == 2
+    # 재시작 후: 앞의 2행은 이미 저장됨, 나머지(빈 행 포함)만 새로
+    assert helpers.process_ingest_batch(rows, {**job, 'start_no': 1, 'row_nos': [1, 2, 3, 4]}) == 3
+    assert helpers.process_ingest_batch(rows, {**job, 'start_no': 1, 'row_nos': [1, 2, 3, 4]}) == 3
+
+    stored = stored_rows(fake_db, helpers, 'g_retry')
+    assert sorted(r['data']['ingest_key'] for r in stored) == ["job_retry:1", "job_retry:2", "job_retry:3"]
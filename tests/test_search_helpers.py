@@ -0,0 +1,72 @@
+import numpy as np
+
+
+def candidates(similarities):
+    return [{'id': i, 'similarity': s} for i, s in enumerate(similarities)]
+
+
+def test_adaptive_cutoff_cuts_at_knee(helpers):
+    pool, flat = helpers.adaptive_cutoff(candidates([0.9, 0.89, 0.88, 0.87, 0.86, 0.85, 0.3, 0.29, 0.28, 0.27]),
+                                         min_keep=2, relative_gap=0.5)
+    assert (pool, flat) == (6, False)
+
+
+def test_adaptive_cutoff_flat_distribution_keeps_all(helpers):
+    pool, flat = helpers.adaptive_cutoff(candidates([0.80, 0.79, 0.79, 0.78, 0.78, 0.78, 0.77]), min_keep=2)
+    assert (pool, flat) == (7, True)
+
+
+def test_adaptive_cutoff_respects_min_keep(helpers):
+    assert helpers.adaptive_cutoff(candidates([0.9, 0.2, 0.1]), min_keep=5) == (3, False)
+    pool, _ = helpers.adaptive_cutoff(candidates([0.9, 0.2, 0.19, 0.18, 0.17, 0.16]), min_keep=3)
+    assert pool == 3
+
+
+def test_collapse_groups_keeps_hit_ids(helpers):
+    rows = [
+        {'id': 1, 'similarity': 0.9, 'data': {'group_id': 'g'}},
+        {'id': 2, 'similarity': 0.5, 'data': {'group_id': 'g'}},
+        {'id': 3, 'similarity': 0.7, 'data': {}},
+    ]
+    collapsed = helpers.collapse_groups(rows, method="mean")
+    assert [c['id'] for c in collapsed] == [1, 3]
+    assert collapsed[0]['group_hit_ids'] == [1, 2]
+    assert collapsed[0]['similarity'] == 0.7
+
+
+def test_select_group_rows_keeps_hits_and_neighbours(helpers):
+    row_ids = list(range(100))
+    sizes = [10] * 100
+    assert helpers.select_group_rows(row_ids, sizes, hit_ids=[50], max_rows=5, max_chars=10_000) == [48, 49, 50, 51, 52]
+    assert helpers.select_group_rows(row_ids, sizes, hit_ids=[0, 99], max_rows=4, max_chars=10_000) == [0, 1, 98, 99]
+    # 글자 수 상한을 넘어도 걸린 행 1개는 유지
+    assert helpers.select_group_rows(row_ids, [5000] * 100, hit_ids=[5], max_rows=5, max_chars=100) == [5]
+
+
+def test_case_for_prompt_marks_omitted_rows(helpers):
+    group_rows = [
+        {'id': i, 'data': {'depth1': '주문서', 'step': f"단계 {i}", 'expect_result': '완료'}} for i in range(50)
+    ]
+    case = {'id': 10, 'name': 'n', 'group_id': 'g', 'group_hit_ids': [10], 'group_rows': group_rows}
+    prompt_case = helpers.case_for_prompt(case, ['id', 'name', 'data'])
+
+    assert 'data' not in prompt_case
+    assert len(prompt_case['group_rows']) == helpers.GROUP_PROMPT_MAX_ROWS
+    assert {'depth1': '주문서', 'step': "단계 10", 'expect_result': '완료'} in prompt_case['group_rows']
+    assert f"({50 - helpers.GROUP_PROMPT_MAX_ROWS}개 생략)" in prompt_case['group_rows_note']
+
+
+def test_mmr_select_drops_near_duplicates_and_diversifies(helpers):
+    rows = [
+        {'id': 1, 'embedding': [1.0, 0.0, 0.0]},
+        {'id': 2, 'embedding': "[0.999, 0.01, 0.0]"},   # 1과 거의 같음 → 중복 제외
+        {'id': 3, 'embedding': [0.7, 0.7, 0.0]},
+        {'id': 4, 'embedding': [0.0, 0.0, 1.0]},
+        {'id': 5, 'embedding': None},                    # 벡터 없음 → 뒤에 그대로
+    ]
+    picked = helpers.mmr_select(rows, np.array([1.0, 0.0, 0.0]), k=5, lambda_mult=0.7, duplicate_threshold=0.97)
+    ids = [row['id'] for row in picked]
+    assert ids[0] == 1
+    assert 2 not in ids
+    assert ids[-1] == 5
+    assert set(ids) == {1, 3, 4, 5}
@@ -0,0 +1,106 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from table_rows import TABLE_COLUMNS, clean_table, table_to_rows, table_to_records
+
+
+def frame():
+    """빈 행 / NaN / 'None' / 숫자 NO가 섞인 편집기 표"""
+    return pd.DataFrame([
+        ['1.0', '쿠폰', '주문서', '쿠폰 적용', '', '로그인', '쿠폰 적용', '할인'],
+        [np.nan, '', '', '', '', '', '', ''],
+        ['3', 'None', '주문서', '', '', '', '적용', '할인'],
+        [4, ' 적립금 ', '적립금 설정', np.nan, 'None', '', '적립금 입력', '차감'],
+    ], columns=TABLE_COLUMNS)
+
+
+def test_clean_table_normalizes_values_and_drops_incomplete_rows():
+    table = clean_table(frame())
+    assert table['NO'].tolist() == ['1', '4']
+    assert table['CATEGORY'].tolist() == ['쿠폰', '적립금']
+    assert table.loc[1, 'DEPTH 2'] == '' and table.loc[1, 'DEPTH 3'] == ''
+
+
+def test_clean_table_keeps_positions_when_not_dropping():
+    table = clean_table(frame(), drop_incomplete=False)
+    assert len(table) == 4
+    assert table.loc[1].tolist() == [''] * len(TABLE_COLUMNS)
+
+
+def test_clean_table_fills_missing_no():
+    table = clean_table(pd.DataFrame({'CATEGORY': ['a', 'b'], 'DEPTH 1': ['x', 'y']}), start_no=5)
+    assert table['NO'].tolist() == ['5', '6']
+
+
+def test_table_to_records_drops_empty_rows_and_keeps_input_type():
+    records = table_to_records(table_to_rows(frame(), drop_incomplete=False), "g1", "쿠폰",
+                               input_type="ai_generated_group")
+    assert [r['data']['no'] for r in records] == ['1', '4']
+    assert all(r['data']['input_type'] == "ai_generated_group" for r in records)
+    assert all(r['data']['group_id'] == "g1" for r in records)
+    assert records[0]['name'] == '주문서 - 쿠폰 적용'
+    assert records[0]['description'] == '쿠폰 적용'
+
+
+def test_table_to_records_keeps_rows_differing_only_in_depth3_or_expect_result():
+    """같은 그룹 안에서 DEPTH 3 / EXPECT RESULT만 다른 행도 모두 레코드로 변환"""
+    row = dict(zip(TABLE_COLUMNS, ['1', '쿠폰', '주문서', '쿠폰 적용', '', '', '쿠폰 적용', '할인']))
+    rows = [row, {**row, 'DEPTH 3': '중복 쿠폰'}, {**row, 'EXPECT RESULT': '오류 안내'}]
+    records = table_to_records(rows, "g1", "쿠폰")
+    assert len(records) == 3
+    assert [r['data']['depth3'] for r in records] == ['', '중복 쿠폰', '']
+    assert [r['data']['expect_result'] for r in records] == ['할인', '할인', '오류 안내']
+
+
+def test_table_to_records_without_drop_keeps_empty_rows():
+    records = table_to_records(frame(), "g1", "쿠폰", drop_incomplete=False)
+    assert len(records) == 4
+    assert records[1]['data']['category'] == ''
+
+
+def test_table_to_records_row_keys_follow_input_rows():
+    """빈 행이 빠져도 키는 원래 입력 행에 붙음"""
+    records = table_to_records(frame(), "g1", "쿠폰", row_keys=["j:1", "j:2", "j:3", "j:4"])
+    assert [(r['data']['no'], r['data']['ingest_key']) for r in records] == [('1', "j:1"), ('4', "j:4")]
+    assert 'ingest_key' not in table_to_records(frame(), "g1", "쿠폰")[0]['data']
+
+
+def test_table_to_records_empty_input():
+    assert table_to_records([], "g1", "쿠폰") == []
+
+
+def test_clean_table_ignores_repeated_blank_headers():
+    """엑셀 헤더 뒤쪽 빈 칸들은 모두 ''로 읽힘 → 같은 이름 컬럼이 여러 개여도 정규화"""
+    header = TABLE_COLUMNS + ['', '', '']
+    chunk = pd.DataFrame([['1', '쿠폰', '주문서', '', '', '', '적용', '할인', None, None, 'x']], columns=header)
+    table = clean_table(chunk)
+    assert table.columns.tolist() == TABLE_COLUMNS
+    assert table.loc[0, 'CATEGORY'] == '쿠폰'
+
+
+def test_xlsx_import_with_blank_padded_header(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    from table_import import iter_table_chunks, normalize_chunk
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(TABLE_COLUMNS + [None, None])
+    sheet.append(['1', '쿠폰', '주문서', '쿠폰 적용', '', '', '쿠폰 적용', '할인', None, None])
+    sheet.append(['2', '', '', '', '', '', '', '', None, None])
+    # 서식만 있는 헤더 칸 (값 없음)
+    sheet.cell(row=1, column=len(TABLE_COLUMNS) + 3).number_format = '0.00'
+    path = tmp_path / "cases.xlsx"
+    workbook.save(path)
+
+    # 업로드 파일처럼 name 속성이 있는 메모리 파일
+    upload = io.BytesIO(path.read_bytes())
+    upload.name = "cases.xlsx"
+    rows = [
+        row for chunk, _ in iter_table_chunks(upload, chunk_size=1)
+        for row in normalize_chunk(chunk).to_dict('records')
+    ]
+    assert [row['NO'] for row in rows] == ['1']
+    assert rows[0]['STEP'] == '쿠폰 적용'
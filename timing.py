@@ -0,0 +1,179 @@
+"""
+단계별 지연 시간 계측
+- start_trace(page): 요청(버튼 클릭 1회) 단위 추적 시작
+  (contextvars → 세션마다 독립, 헤지 시도 스레드에는 복사됨, 배치/백그라운드 워커는 추적 없음)
+- with stage("embedding") as event: ... event['rows'] = n → 소요 시간과 함께 기록
+- 이벤트는 현재 추적(디버그 표시)에 쌓이고, configure(path)가 있으면 JSONL 파일에 한 줄씩 기록
+  {"ts", "request_id", "page", "stage", "duration_ms", "ok", ...개수/토큰}
+  (max_bytes를 넘으면 path.1로 넘기고 새 파일 시작 → 최근 두 파일만 유지)
+- cached_call / mark_cache_miss: 캐시 함수의 적중 여부를 'cache' 이벤트로 기록
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+class Trace:
+    """요청 1건의 단계별 이벤트"""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.request_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.events = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self) -> list:
+        """단계별 합계 [{stage, calls, total_ms, max_ms}, ...] (처음 나온 순서)"""
+        stages = {}
+        with self._lock:
+            for event in self.events:
+                entry = stages.setdefault(event['stage'], {
+                    'stage': event['stage'], 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0
+                })
+                entry['calls'] += 1
+                entry['total_ms'] = round(entry['total_ms'] + event['duration_ms'], 2)
+                entry['max_ms'] = max(entry['max_ms'], event['duration_ms'])
+        return list(stages.values())
+
+
+class JsonlSink:
+    """이벤트를 JSONL 파일에 추가 (여러 세션/스레드에서 동시에 써도 한 줄씩)"""
+
+    CHECK_EVERY = 200   # 파일 크기 확인 주기 (쓰기 횟수)
+
+    def __init__(self, path: str, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def write(self, event: dict):
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._writes += 1
+            if self.max_bytes and self._writes % self.CHECK_EVERY == 0:
+                if os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+_sink = None
+
+
+_cache_state = threading.local()
+
+
+def configure(path, max_bytes=None):
+    """JSONL 기록 경로 설정 (None이면 파일 기록 안 함, 추적은 유지)"""
+    global _sink
+    _sink = JsonlSink(path, max_bytes) if path else None
+
+
+def start_trace(page: str) -> Trace:
+    trace = Trace(page)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace():
+    """현재 요청의 추적 (없으면 None)"""
+    return _current_trace.get()
+
+
+def clear_trace():
+    _current_trace.set(None)
+
+
+def finish_trace():
+    """현재 요청의 전체 소요 시간을 'total' 단계로 1번 기록 → 추적 반환 (없으면 None)"""
+    trace = current_trace()
+    if trace is not None and not trace.finished:
+        trace.finished = True
+        record("total", trace.elapsed_ms(), events=len(trace.events))
+    return trace
+
+
+def record(name: str, duration_ms: float, **fields):
+    """이벤트 1건 기록 (현재 추적 + JSONL)"""
+    trace = current_trace()
+    event = {
+        'ts': round(time.time(), 3),
+        'request_id': trace.request_id if trace else None,
+        'page': trace.page if trace else None,
+        'stage': name,
+        'duration_ms': round(duration_ms, 2),
+        'ok': True,
+        **fields,
+    }
+    if trace is not None:
+        trace.add(event)
+    if _sink is not None:
+        try:
+            _sink.write(event)
+        except OSError:
+            # 계측 실패로 요청을 막지 않음
+            pass
+    return event
+
+
+def record_since(name: str, started: float, **fields):
+    """started(time.perf_counter())부터 지금까지를 한 단계로 기록 (블록으로 감싸기 어려운 코드용)"""
+    return record(name, (time.perf_counter() - started) * 1000, **fields)
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """
+    with stage("rpc.match_test_cases_v21", threshold=0.3) as event:
+        ...
+        event['rows'] = len(rows)
+
+    예외가 나면 ok=False, error=예외 이름으로 기록하고 예외는 그대로 올림
+    """
+    event = dict(fields)
+    started = time.perf_counter()
+    try:
+        yield event
+    except Exception as e:
+        event['ok'] = False
+        event['error'] = type(e).__name__
+        raise
+    finally:
+        record_since(name, started, **event)
+
+
+# ========================================
+# 캐시 적중률
+# ========================================
+def mark_cache_miss():
+    """캐시 함수 본문 첫 줄에서 호출 (본문이 실행됐다 = 캐시 미스)"""
+    _cache_state.missed = True
+
+
+def cached_call(name: str, fn, *args, **kwargs):
+    """
+    캐시 함수 fn 호출 + 'cache' 이벤트 기록 (hit: 본문이 실행되지 않았으면 True)
+
+    st.cache_data는 같은 스레드에서 본문을 실행하므로 스레드 로컬 표시로 판별
+    """
+    _cache_state.missed = False
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    record_since("cache", started, cache=name, hit=not _cache_state.missed)
+    return result